@@ -0,0 +1,248 @@
+# Run from the project directory with `python -m benchmarks.bench_board`
+import random
+from typing import Callable, FrozenSet, List
+
+import numpy as np
+
+from benchmarks.timing import best_time
+from pycatan import Game, Player
+from pycatan.board import BeginnerBoard, Board, BuildingType, Coords, Intersection
+from pycatan.errors import InvalidCoordsError
+from tests.random_moves import play
+
+
+# Benchmark the adjacency tables against finding the neighbourhood of a location with Coords arithmetic and by checking
+# every path, halfway through a game
+def scan_paths(board: Board, coords: Coords) -> List[int]:
+    return [p for p, path_coords in enumerate(board.path_coords) if coords in path_coords]
+
+
+def scan_is_valid_settlement(board: Board, owner: int, coords: Coords) -> bool:
+    if board.intersection_owners[board.intersection_indices[coords]] >= 0:
+        return False
+    for offset in Intersection.CONNECTED_CORNER_OFFSETS:
+        neighbor = board.intersection_indices.get(coords + offset)
+        if neighbor is not None and board.intersection_owners[neighbor] >= 0:
+            return False
+    return any(board.path_owners[p] == owner for p in scan_paths(board, coords))
+
+
+def scan_is_valid_road(board: Board, owner: int, path_coords: FrozenSet[Coords]) -> bool:
+    if board.path_owners[board.path_indices[path_coords]] >= 0:
+        return False
+    for coords in path_coords:
+        end_owner = board.intersection_owners[board.intersection_indices[coords]]
+        if end_owner == owner or (
+            end_owner < 0 and any(board.path_owners[p] == owner for p in scan_paths(board, coords))
+        ):
+            return True
+    return False
+
+
+def bench_adjacency():
+    rng = random.Random(0)
+    game = Game(BeginnerBoard(), seed=0)
+    board = game.board
+    play(game, rng, 120)
+    player = game.players[0]
+    owner = board.get_player_index(player)
+    print(
+        "Halfway through a game, with %d buildings and %d roads:"
+        % ((board.intersection_owners >= 0).sum(), (board.path_owners >= 0).sum())
+    )
+    assert {
+        c for c in board.intersection_coords if scan_is_valid_settlement(board, owner, c)
+    } == board.get_valid_settlement_coords(player)
+    assert {
+        p for p in board.path_coords if scan_is_valid_road(board, owner, p)
+    } == board.get_valid_road_coords(player)
+    for name, scan, tables, number in (
+        (
+            "paths at every intersection",
+            lambda: [scan_paths(board, c) for c in board.intersection_coords],
+            lambda: [board.get_paths_for_intersection_coords(c) for c in board.intersection_coords],
+            20,
+        ),
+        (
+            "check every settlement",
+            lambda: [scan_is_valid_settlement(board, owner, c) for c in board.intersection_coords],
+            lambda: [
+                board.is_valid_settlement_coords(player, c, True) for c in board.intersection_coords
+            ],
+            20,
+        ),
+        (
+            "check every road",
+            lambda: [scan_is_valid_road(board, owner, p) for p in board.path_coords],
+            lambda: [board.is_valid_road_coords(player, p) for p in board.path_coords],
+            20,
+        ),
+    ):
+        print(
+            "  %-28s %8.0fus scanning -> %6.0fus with tables"
+            % (name, best_time(scan, number), best_time(tables, number))
+        )
+
+
+# Benchmark the longest road on random branching networks of 15 roads, against a breadth first search that copies the
+# roads used so far for every step
+def bfs_longest_road(board: Board, owner: int) -> int:
+    potential = [
+        (end, [p])
+        for p in np.flatnonzero(board.path_owners == owner).tolist()
+        for end in board._path_ends[p]
+    ]
+    longest = 1 if potential else 0
+    while potential:
+        index, used = potential.pop(0)
+        if board.intersection_owners[index] not in (-1, owner):
+            continue
+        for p in board._intersection_paths[index]:
+            if p not in used and board.path_owners[p] == owner:
+                a, b = board._path_ends[p]
+                potential.append((b if a == index else a, [p] + used))
+                longest = max(longest, len(used) + 1)
+    return longest
+
+
+def bench_longest_road():
+    networks = []
+    for seed in range(20):
+        rng = random.Random(seed)
+        game = Game(BeginnerBoard(), num_players=1, seed=seed)
+        player = game.players[0]
+        game.build_settlement(
+            player,
+            rng.choice(sorted(game.board.intersection_coords, key=lambda c: (c.q, c.r))),
+            cost_resources=False,
+            ensure_connected=False,
+        )
+        for _ in range(15):
+            options = sorted(
+                game.board.get_valid_road_coords(player),
+                key=lambda p: sorted((c.q, c.r) for c in p),
+            )
+            game.build_road(player, rng.choice(options), cost_resources=False)
+        networks.append((game.board, player))
+    for board, player in networks:
+        assert bfs_longest_road(board, 0) == board.calculate_player_longest_road(player)
+
+    def uncached_longest_roads():
+        for board, player in networks:
+            board._longest_roads.clear()
+            board.calculate_player_longest_road(player)
+
+    print("Longest road on 20 random networks of 15 roads, per call:")
+    print(
+        "  breadth first search %8.1fus"
+        % (best_time(lambda: [bfs_longest_road(b, 0) for b, _ in networks], 1) / 20)
+    )
+    print("  DFS, uncached        %8.1fus" % (best_time(uncached_longest_roads, 5) / 20))
+    print(
+        "  cached               %8.2fus"
+        % (best_time(lambda: [b.calculate_player_longest_road(p) for b, p in networks], 1000) / 20)
+    )
+
+
+# Benchmark the full scan done on each player's first query early, halfway through and late in a game, against checking
+# every location one at a time by catching the errors of the assert_valid_* methods, and by the is_valid_* methods
+def is_valid(assert_valid: Callable, *args) -> bool:
+    try:
+        assert_valid(*args)
+        return True
+    except InvalidCoordsError:
+        return False
+
+
+def raising_scan(board: Board, player: Player, ensure_connected: bool):
+    settlements = {
+        c
+        for c in board.intersection_coords
+        if is_valid(board.assert_valid_settlement_coords, c, player, ensure_connected)
+    }
+    roads = {
+        p
+        for p in board.path_coords
+        if is_valid(board.assert_valid_road_coords, player, p, ensure_connected)
+    }
+    cities = {
+        c
+        for c in board.intersection_coords
+        if ensure_connected and is_valid(board.assert_valid_city_coords, player, c)
+    }
+    return settlements, roads, cities
+
+
+def checking_scan(board: Board, player: Player, ensure_connected: bool):
+    return (
+        {
+            c
+            for c in board.intersection_coords
+            if board.is_valid_settlement_coords(player, c, ensure_connected)
+        },
+        {p for p in board.path_coords if board.is_valid_road_coords(player, p, ensure_connected)},
+        {
+            c
+            for c in board.intersection_coords
+            if ensure_connected and board.is_valid_city_coords(player, c)
+        },
+    )
+
+
+def vectorised_scan(board: Board, player: Player, ensure_connected: bool):
+    placements = board._scan_legal_placements(player if ensure_connected else None)
+    return (
+        placements[BuildingType.SETTLEMENT],
+        placements[BuildingType.ROAD],
+        placements.get(BuildingType.CITY, set()),
+    )
+
+
+def full_scan(board: Board, scan: Callable):
+    # Every player, and then the locations that ignore whether they are connected
+    return [scan(board, player, True) for player in board.players] + [
+        scan(board, board.players[0], False)
+    ]
+
+
+def bench_legality_scan():
+    rng = random.Random(0)
+    game = Game(BeginnerBoard(), seed=0)
+    board = game.board
+    print("Full scan for 4 players plus the unconnected locations, best of 5:")
+    for stage, moves in (("early", 10), ("halfway", 110), ("late", 180)):
+        play(game, rng, moves)
+        expected = full_scan(board, raising_scan)
+        assert full_scan(board, checking_scan) == expected
+        assert full_scan(board, vectorised_scan) == expected
+        print(
+            "  %-7s (%2d buildings, %2d roads) %6.0fus raising, %6.0fus checking, %4.0fus at once"
+            % (
+                stage,
+                (board.intersection_owners >= 0).sum(),
+                (board.path_owners >= 0).sum(),
+                best_time(lambda: full_scan(board, raising_scan), 5),
+                best_time(lambda: full_scan(board, checking_scan), 5),
+                best_time(lambda: full_scan(board, vectorised_scan), 20),
+            )
+        )
+    player = game.players[0]
+    # Most locations are invalid, which is when the errors are raised
+    invalid = next(
+        c for c in board.intersection_coords if not board.is_valid_settlement_coords(player, c, True)
+    )
+    print(
+        "Single invalid settlement check late in the game: %.2fus raising -> %.2fus checking"
+        % (
+            best_time(
+                lambda: is_valid(board.assert_valid_settlement_coords, invalid, player, True), 10000
+            ),
+            best_time(lambda: board.is_valid_settlement_coords(player, invalid, True), 10000),
+        )
+    )
+
+
+if __name__ == "__main__":
+    bench_adjacency()
+    bench_longest_road()
+    bench_legality_scan()
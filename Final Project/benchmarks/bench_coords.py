@@ -0,0 +1,61 @@
+# Run from the project directory with `python -m benchmarks.bench_coords`
+from benchmarks.timing import best_time
+from pycatan.board import BeginnerBoard, Coords, Intersection
+
+
+class PlainCoords:
+    """Coordinates with no slots, no cached hash and no interning, to compare Coords against."""
+
+    def __init__(self, q, r):
+        self.q = q
+        self.r = r
+
+    def __hash__(self):
+        return hash((self.q, self.r))
+
+    def __eq__(self, other):
+        return self.q == other.q and self.r == other.r
+
+    def __add__(self, other):
+        return PlainCoords(self.q + other.q, self.r + other.r)
+
+
+# Benchmark the interned Coords against plain coordinates, on the intersections of the beginner board
+def bench_coords():
+    board = BeginnerBoard()
+    intersections = list(board.intersection_coords)
+    offsets = list(Intersection.CONNECTED_CORNER_OFFSETS)
+    table = {c: i for i, c in enumerate(intersections)}
+    plain_table = {PlainCoords(c.q, c.r): i for i, c in enumerate(intersections)}
+    # The keys are looked up with coordinates made elsewhere, so the plain ones are equal but not the same objects
+    plain_intersections = [PlainCoords(c.q, c.r) for c in intersections]
+    plain_offsets = [PlainCoords(c.q, c.r) for c in offsets]
+    print("%d intersections, best of 7:" % len(intersections))
+    for name, plain, interned, number in (
+        (
+            "neighbour add + dict lookup",
+            lambda: [plain_table.get(c + o) for c in plain_intersections for o in plain_offsets],
+            lambda: [table.get(c + o) for c in intersections for o in offsets],
+            200,
+        ),
+        (
+            "dict lookups",
+            lambda: [plain_table[c] for c in plain_intersections],
+            lambda: [table[c] for c in intersections],
+            2000,
+        ),
+        (
+            "creating the coordinates",
+            lambda: [PlainCoords(c.q, c.r) for c in intersections],
+            lambda: [Coords(c.q, c.r) for c in intersections],
+            2000,
+        ),
+    ):
+        print(
+            "  %-28s %6.1fus plain -> %6.1fus interned"
+            % (name, best_time(plain, number, repeat=7), best_time(interned, number, repeat=7))
+        )
+
+
+if __name__ == "__main__":
+    bench_coords()
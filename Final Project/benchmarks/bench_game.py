@@ -0,0 +1,37 @@
+# Run from the project directory with `python -m benchmarks.bench_game`
+import copy
+import random
+import time
+
+from pycatan import DevelopmentCard, Game
+from pycatan.board import BeginnerBoard
+from tests.random_moves import play
+
+
+# Benchmark cloning the state at the end of a game, with random free building, rolls and robber moves and a
+# development card for each player, against a deep copy
+def bench_clone():
+    rng = random.Random(0)
+    game = Game(BeginnerBoard(), seed=0)
+    while max(game.victory_points_vector()) < 10:
+        play(game, rng, 1)
+    for player in game.players:
+        player.add_resource_counts(DevelopmentCard.get_required_resource_counts())
+        game.build_development_card(player)
+
+    clones = 100_000
+    start = time.perf_counter()
+    for _ in range(clones):
+        game.clone()
+    elapsed = time.perf_counter() - start
+    print("%d clones in %.3fs, %.1fus per clone" % (clones, elapsed, elapsed / clones * 1e6))
+    deep_copies = 100
+    start = time.perf_counter()
+    for _ in range(deep_copies):
+        copy.deepcopy(game)
+    elapsed = time.perf_counter() - start
+    print("%d deep copies in %.3fs, %.1fus per copy" % (deep_copies, elapsed, elapsed / deep_copies * 1e6))
+
+
+if __name__ == "__main__":
+    bench_clone()
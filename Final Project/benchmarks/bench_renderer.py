@@ -0,0 +1,27 @@
+# Run from the project directory with `python -m benchmarks.bench_renderer`
+import random
+import time
+
+from pycatan import Game
+from pycatan.board import BeginnerBoard, BoardRenderer
+from tests.random_moves import play
+
+
+# Benchmark rendering after every move of a full game, with random free building, rolls and robber moves
+def bench_render():
+    rng = random.Random(0)
+    game = Game(BeginnerBoard(), seed=0)
+    renderer = BoardRenderer(game.board, player_color_map={})
+    renders = 0
+    elapsed = 0.0
+    while max(game.victory_points_vector()) < 10:
+        play(game, rng, 1)
+        start = time.perf_counter()
+        renderer.get_board_as_string()
+        elapsed += time.perf_counter() - start
+        renders += 1
+    print("%d renders in %.3fs, %.0f renders per second" % (renders, elapsed, renders / elapsed))
+
+
+if __name__ == "__main__":
+    bench_render()
@@ -1,8 +1,9 @@
-from pycatan import Game, DevelopmentCard, Resource
-from pycatan.board import BeginnerBoard, BoardRenderer, BuildingType, Coords
+from pycatan import Game, DevelopmentCard, Resource, Replay, ReplayRecorder
+from pycatan.board import BeginnerBoard, BoardRenderer, BoardRasterRenderer, BuildingType, Coords
 from enums import GameStage
 import funcs
 import random
+import struct
 
 from typing import Optional
 import numpy as np
@@ -10,10 +11,16 @@ import numpy as np
 import gym
 from gym import spaces
 
+# The state kept outside of the game in the replay snapshots: stage, current player, rolled, turns, bought a development
+# card, played a development card
+_REPLAY_STATE = struct.Struct("<BB?I??")
+
 
 class CatanEnvironmentCoop(gym.Env):
+    metadata = {"render_modes": ["human", "rgb_array"]}
     game: Game
     renderer: BoardRenderer
+    raster_renderer: BoardRasterRenderer
     stage: GameStage
     current_player_number: int
     rolled: bool
@@ -22,10 +29,14 @@ class CatanEnvironmentCoop(gym.Env):
     bought_dev_card: bool
     played_dev_card: bool
     connected_intersection: Coords
+    recorder: Optional[ReplayRecorder]
 
     def __init__(self):
         super(CatanEnvironmentCoop, self).__init__()
         self.resets = 0
+        # Set to record each game from the next reset, to get with get_replay
+        self.record_replays = False
+        self.recorder = None
 
         # self.action_space = spaces.Discrete(72)
         self.action_space = spaces.MultiDiscrete([10, 25, 54])
@@ -40,58 +51,58 @@ class CatanEnvironmentCoop(gym.Env):
         })
 
     def _all_hex_coords(self):
-        return self.game.board.hexes.keys()
+        return funcs.BASELINE_HEX_COORDS
 
     def _all_intersection_coords(self):
-        return self.game.board.intersections.keys()
+        return funcs.BASELINE_INTERSECTION_COORDS
 
     def _all_path_coords(self):
-        return self.game.board.paths.keys()
+        return funcs.BASELINE_PATH_COORDS
 
     def _next_observation(self):
         obs = {'stage': self.stage.value}
 
-        hexes = {hex_coord: i for i, hex_coord in enumerate(self._all_hex_coords())}
-        obs['robber location'] = hexes[self.game.board.robber]
+        board = self.game.board
+        # The board is encoded in the order the trained models saw it in, not in index order
+        obs['robber location'] = int(funcs.BASELINE_HEX_POSITIONS[board.hex_indices[board.robber]])
+        intersection_owners = board.intersection_owners[funcs.BASELINE_INTERSECTION_INDICES]
+        intersection_types = board.intersection_types[funcs.BASELINE_INTERSECTION_INDICES]
+        path_owners = board.path_owners[funcs.BASELINE_PATH_INDICES]
 
         buildings = np.zeros((4, 180))
         for i in range(len(self.game.players)):
-            for j, coord in enumerate(self._all_intersection_coords()):
-                building = self.game.board.intersections[coord].building
-                if building is None:
-                    continue
-                if building.owner == self.game.players[(self.current_player_number + i) % 4]:
-                    col = j
-                    if building.building_type == BuildingType.CITY:
-                        col += 54
-                    buildings[i, col] = 1
-
-            for j, coord in enumerate(self._all_path_coords()):
-                building = self.game.board.paths[coord].building
-                if building is None:
-                    continue
-                if building.owner == self.game.players[(self.current_player_number + i) % 4]:
-                    buildings[i, j + 108] = 1
+            owner = board.get_player_index(self.game.players[(self.current_player_number + i) % 4])
+            owned = intersection_owners == owner
+            buildings[i, :54] = owned & (intersection_types == BuildingType.SETTLEMENT.value)
+            buildings[i, 54:108] = owned & (intersection_types == BuildingType.CITY.value)
+            buildings[i, 108:] = path_owners == owner
         obs['buildings'] = buildings
 
         cards = np.zeros((4, 11))
         for i in range(len(self.game.players)):
-            for j, res in enumerate(Resource):
-                cards[i, j] = self.game.players[(self.current_player_number + i) % 4].resources[res]
-            for j, dev in enumerate(DevelopmentCard):
-                cards[i, j + 5] = self.game.players[(self.current_player_number + i) % 4].development_cards[dev]
+            cards[i, :5] = self.game.players[(self.current_player_number + i) % 4].resource_counts
+            cards[i, 5:10] = self.game.players[(self.current_player_number + i) % 4].development_card_counts
             cards[i, 10] = self.game.players[(self.current_player_number + i) % 4].number_played_knights
         obs['cards in hand'] = cards
 
         return obs
 
     def step(self, action):
+        assert isinstance(action, np.ndarray)
+        reward, done = self._apply_action(action)
+        if done:
+            print(f"Done in {self.turns} turns!")
+            reward += 10000 // self.turns
+        return self._next_observation(), reward, done, {}
+
+    def _apply_action(self, action):
+        if self.recorder is not None:
+            self.recorder.record(action)
         next_stage: Optional[GameStage] = None
         reward = 0
         next_player_number = self.current_player_number
         current_player = self.game.players[self.current_player_number]
         pass_turn = False
-        assert isinstance(action, np.ndarray)
         try:
             match self.stage:
 
@@ -99,7 +110,7 @@ class CatanEnvironmentCoop(gym.Env):
                     if (action[0] % 2 == 0 or
                             current_player.development_cards[DevelopmentCard.KNIGHT] == 0 or
                             self.played_dev_card):
-                        dice = random.randint(1, 6) + random.randint(1, 6)
+                        dice = self.game.roll_dice()
                         self.rolled = True
                         if dice == 7:
                             next_stage = GameStage.MOVING_ROBBER
@@ -159,7 +170,7 @@ class CatanEnvironmentCoop(gym.Env):
                         next_stage = GameStage.TRADING
                     elif action[0] == 6:
                         valid_coords = self.game.board.get_valid_settlement_coords(current_player)
-                        if current_player.has_resources(BuildingType.SETTLEMENT.get_required_resources()) \
+                        if current_player.has_resource_counts(BuildingType.SETTLEMENT.get_required_resource_counts()) \
                                 and valid_coords:
                             coord = funcs.choose_intersection(valid_coords, action[1] % len(valid_coords))
                             self.game.build_settlement(current_player, coord)
@@ -168,7 +179,7 @@ class CatanEnvironmentCoop(gym.Env):
                             pass_turn = True
                     elif action[0] == 7:
                         valid_coords = self.game.board.get_valid_city_coords(current_player)
-                        if current_player.has_resources(BuildingType.CITY.get_required_resources()) \
+                        if current_player.has_resource_counts(BuildingType.CITY.get_required_resource_counts()) \
                                 and valid_coords:
                             coord = funcs.choose_intersection(valid_coords, action[1] % len(valid_coords))
                             self.game.upgrade_settlement_to_city(current_player, coord)
@@ -177,7 +188,7 @@ class CatanEnvironmentCoop(gym.Env):
                             pass_turn = True
                     elif action[0] == 8:
                         valid_coords = self.game.board.get_valid_road_coords(current_player)
-                        if current_player.has_resources(BuildingType.ROAD.get_required_resources()) \
+                        if current_player.has_resource_counts(BuildingType.ROAD.get_required_resource_counts()) \
                                 and valid_coords:
                             coord = funcs.choose_path(valid_coords, action[1] % len(valid_coords))
                             self.game.build_road(current_player, coord)
@@ -185,7 +196,7 @@ class CatanEnvironmentCoop(gym.Env):
                         else:
                             pass_turn = True
                     elif action[0] == 9:
-                        if current_player.has_resources(DevelopmentCard.get_required_resources()) and \
+                        if current_player.has_resource_counts(DevelopmentCard.get_required_resource_counts()) and \
                                 not self.bought_dev_card:
                             if self.game.build_development_card(current_player) == DevelopmentCard.VICTORY_POINT:
                                 reward += 10
@@ -196,15 +207,15 @@ class CatanEnvironmentCoop(gym.Env):
                         raise Exception
 
                 case GameStage.MOVING_ROBBER:
-                    valid_hexes = [coord for coord in self._all_hex_coords() if coord != self.game.board.robber]
-                    self.game.board.robber = funcs.choose_hex(valid_hexes, action[2] % len(valid_hexes))
+                    valid_hexes = funcs.BASELINE_ROBBER_DESTINATIONS[self.game.board.robber]
+                    self.game.board.robber = valid_hexes[action[2] % len(valid_hexes)]
                     next_stage = GameStage.STEALING
 
                 case GameStage.STEALING:
-                    targets = list(self.game.board.get_players_on_hex(self.game.board.robber))
+                    targets = self.game.board.get_players_on_hex_in_order(self.game.board.robber)
                     if len(targets) > 0:
                         target = targets[action[0] % len(targets)]
-                        resource = target.get_random_resource()
+                        resource = target.get_random_resource(self.game.steal_rng)
                         if resource is not None:
                             target.remove_resources({resource: 1})
                             current_player.add_resources({resource: 1})
@@ -239,24 +250,37 @@ class CatanEnvironmentCoop(gym.Env):
         if next_stage is not None:
             self.stage = next_stage
         self.current_player_number = next_player_number
-        done = self.game.get_victory_points(current_player) >= 10
-        if done:
-            print(f"Done in {self.turns} turns!")
-            reward += 10000 // self.turns
-        return self._next_observation(), reward, done, {}
+        self.game.set_turn(self.current_player_number, self.stage.value)
+        return reward, self.game.get_victory_points(current_player) >= 10
 
     def reset(self, *, seed: Optional[int] = None, return_info: bool = False, options: Optional[dict] = None):
-        self.game = Game(BeginnerBoard())
+        super().reset(seed=seed)
+        print(f"Reset {self.resets} times")
+        self.resets += 1
+        self._start_game(Game(BeginnerBoard(), seed=int(self.np_random.integers(2**63))))
+        self.recorder = None
+        if self.record_replays:
+            self.recorder = ReplayRecorder(self.game, get_extra_state=self._get_replay_state)
+        return self._next_observation()
+
+    def _start_game(self, game: Game, state: Optional[bytes] = None):
+        self.game = game
         self.renderer = BoardRenderer(self.game.board)
+        self.raster_renderer = BoardRasterRenderer(self.game.board)
+        if state is not None:
+            # Carry on from a replay snapshot
+            stage, self.current_player_number, self.rolled, self.turns, self.bought_dev_card, \
+                self.played_dev_card = _REPLAY_STATE.unpack(state)
+            self.stage = GameStage(stage)
+            return
         self.stage = GameStage.NOT_ROLLED
         self.current_player_number = 0
+        self.game.set_turn(self.current_player_number, self.stage.value)
         self.turns = 0
         # self.illegal_acts = 0
         self.rolled = False
         self.bought_dev_card = False
         self.played_dev_card = False
-        print(f"Reset {self.resets} times")
-        self.resets += 1
 
         starting_settlements = [Coords(-3, 2), Coords(-2, 3), Coords(1, 2), Coords(3, -1),
                                 Coords(1, -3), Coords(-2, 0), Coords(2, -2), Coords(-1, -2)]
@@ -272,15 +296,47 @@ class CatanEnvironmentCoop(gym.Env):
             if i >= 4:
                 player.add_resources(self.game.board.get_hex_resources_for_intersection(starting_settlements[i]))
 
+    def _get_replay_state(self):
+        return _REPLAY_STATE.pack(self.stage.value, self.current_player_number, self.rolled, self.turns,
+                                  self.bought_dev_card, self.played_dev_card)
+
+    def get_replay(self) -> Replay:
+        """Get the replay of the current game, which is recorded if record_replays was set when it was reset."""
+        return self.recorder.get_replay()
+
+    def load_replay(self, replay: Replay, step: Optional[int] = None):
+        """Put the environment in the state it was in after the first steps of a recorded game, by starting from the
+        last snapshot before then and taking the recorded actions again.
+
+        Args:
+            replay: The replay of the game
+            step: How many of the recorded actions to take. Defaults to all of them
+        Returns:
+            The observation at that step
+        """
+        if step is None:
+            step = len(replay)
+        start, game, state = replay.get_snapshot(step)
+        self.recorder = None
+        if game is None:
+            self._start_game(replay.new_game())
+        else:
+            self._start_game(game, state)
+        for action in replay.actions[start:step]:
+            self._apply_action(action)
         return self._next_observation()
 
     def render(self, mode="human"):
-        pass
+        if mode == "rgb_array":
+            # Copied, as the renderer draws every frame into the same array
+            return self.raster_renderer.render().copy()
 
 
 class CatanEnvironmentComp(gym.Env):
+    metadata = {"render_modes": ["human", "rgb_array"]}
     game: Game
     renderer: BoardRenderer
+    raster_renderer: BoardRasterRenderer
     stage: GameStage
     current_player_number: int
     rolled: bool
@@ -289,10 +345,14 @@ class CatanEnvironmentComp(gym.Env):
     bought_dev_card: bool
     played_dev_card: bool
     connected_intersection: Coords
+    recorder: Optional[ReplayRecorder]
 
     def __init__(self, models_to_beat):
         super(CatanEnvironmentComp, self).__init__()
         self.resets = 0
+        # Set to record each game from the next reset, to get with get_replay
+        self.record_replays = False
+        self.recorder = None
         self.models_to_beat = models_to_beat
 
         # self.action_space = spaces.Discrete(72)
@@ -308,46 +368,37 @@ class CatanEnvironmentComp(gym.Env):
         })
 
     def _all_hex_coords(self):
-        return self.game.board.hexes.keys()
+        return funcs.BASELINE_HEX_COORDS
 
     def _all_intersection_coords(self):
-        return self.game.board.intersections.keys()
+        return funcs.BASELINE_INTERSECTION_COORDS
 
     def _all_path_coords(self):
-        return self.game.board.paths.keys()
+        return funcs.BASELINE_PATH_COORDS
 
     def _next_observation(self):
         obs = {'stage': self.stage.value}
 
-        hexes = {hex_coord: i for i, hex_coord in enumerate(self._all_hex_coords())}
-        obs['robber location'] = hexes[self.game.board.robber]
+        board = self.game.board
+        # The board is encoded in the order the trained models saw it in, not in index order
+        obs['robber location'] = int(funcs.BASELINE_HEX_POSITIONS[board.hex_indices[board.robber]])
+        intersection_owners = board.intersection_owners[funcs.BASELINE_INTERSECTION_INDICES]
+        intersection_types = board.intersection_types[funcs.BASELINE_INTERSECTION_INDICES]
+        path_owners = board.path_owners[funcs.BASELINE_PATH_INDICES]
 
         buildings = np.zeros((4, 180))
         for i in range(len(self.game.players)):
-            for j, coord in enumerate(self._all_intersection_coords()):
-                building = self.game.board.intersections[coord].building
-                if building is None:
-                    continue
-                if building.owner == self.game.players[(self.current_player_number + i) % 4]:
-                    col = j
-                    if building.building_type == BuildingType.CITY:
-                        col += 54
-                    buildings[i, col] = 1
-
-            for j, coord in enumerate(self._all_path_coords()):
-                building = self.game.board.paths[coord].building
-                if building is None:
-                    continue
-                if building.owner == self.game.players[(self.current_player_number + i) % 4]:
-                    buildings[i, j + 108] = 1
+            owner = board.get_player_index(self.game.players[(self.current_player_number + i) % 4])
+            owned = intersection_owners == owner
+            buildings[i, :54] = owned & (intersection_types == BuildingType.SETTLEMENT.value)
+            buildings[i, 54:108] = owned & (intersection_types == BuildingType.CITY.value)
+            buildings[i, 108:] = path_owners == owner
         obs['buildings'] = buildings
 
         cards = np.zeros((4, 11))
         for i in range(len(self.game.players)):
-            for j, res in enumerate(Resource):
-                cards[i, j] = self.game.players[(self.current_player_number + i) % 4].resources[res]
-            for j, dev in enumerate(DevelopmentCard):
-                cards[i, j + 5] = self.game.players[(self.current_player_number + i) % 4].development_cards[dev]
+            cards[i, :5] = self.game.players[(self.current_player_number + i) % 4].resource_counts
+            cards[i, 5:10] = self.game.players[(self.current_player_number + i) % 4].development_card_counts
             cards[i, 10] = self.game.players[(self.current_player_number + i) % 4].number_played_knights
         obs['cards in hand'] = cards
 
@@ -366,7 +417,7 @@ class CatanEnvironmentComp(gym.Env):
                     if (action[0] % 2 == 0 or
                             current_player.development_cards[DevelopmentCard.KNIGHT] == 0 or
                             self.played_dev_card):
-                        dice = random.randint(1, 6) + random.randint(1, 6)
+                        dice = self.game.roll_dice()
                         self.rolled = True
                         if dice == 7:
                             next_stage = GameStage.MOVING_ROBBER
@@ -428,7 +479,7 @@ class CatanEnvironmentComp(gym.Env):
                         next_stage = GameStage.TRADING
                     elif action[0] == 6:
                         valid_coords = self.game.board.get_valid_settlement_coords(current_player)
-                        if current_player.has_resources(BuildingType.SETTLEMENT.get_required_resources()) \
+                        if current_player.has_resource_counts(BuildingType.SETTLEMENT.get_required_resource_counts()) \
                                 and valid_coords:
                             coord = funcs.choose_intersection(valid_coords, action[1] % len(valid_coords))
                             self.game.build_settlement(current_player, coord)
@@ -437,7 +488,7 @@ class CatanEnvironmentComp(gym.Env):
                             pass_turn = True
                     elif action[0] == 7:
                         valid_coords = self.game.board.get_valid_city_coords(current_player)
-                        if current_player.has_resources(BuildingType.CITY.get_required_resources()) \
+                        if current_player.has_resource_counts(BuildingType.CITY.get_required_resource_counts()) \
                                 and valid_coords:
                             coord = funcs.choose_intersection(valid_coords, action[1] % len(valid_coords))
                             self.game.upgrade_settlement_to_city(current_player, coord)
@@ -446,7 +497,7 @@ class CatanEnvironmentComp(gym.Env):
                             pass_turn = True
                     elif action[0] == 8:
                         valid_coords = self.game.board.get_valid_road_coords(current_player)
-                        if current_player.has_resources(BuildingType.ROAD.get_required_resources()) \
+                        if current_player.has_resource_counts(BuildingType.ROAD.get_required_resource_counts()) \
                                 and valid_coords:
                             coord = funcs.choose_path(valid_coords, action[1] % len(valid_coords))
                             self.game.build_road(current_player, coord)
@@ -454,7 +505,7 @@ class CatanEnvironmentComp(gym.Env):
                         else:
                             pass_turn = True
                     elif action[0] == 9:
-                        if current_player.has_resources(DevelopmentCard.get_required_resources()) and \
+                        if current_player.has_resource_counts(DevelopmentCard.get_required_resource_counts()) and \
                                 not self.bought_dev_card:
                             if self.game.build_development_card(current_player) == DevelopmentCard.VICTORY_POINT:
                                 reward += 10
@@ -465,15 +516,15 @@ class CatanEnvironmentComp(gym.Env):
                         raise Exception
 
                 case GameStage.MOVING_ROBBER:
-                    valid_hexes = [coord for coord in self._all_hex_coords() if coord != self.game.board.robber]
-                    self.game.board.robber = funcs.choose_hex(valid_hexes, action[2] % len(valid_hexes))
+                    valid_hexes = funcs.BASELINE_ROBBER_DESTINATIONS[self.game.board.robber]
+                    self.game.board.robber = valid_hexes[action[2] % len(valid_hexes)]
                     next_stage = GameStage.STEALING
 
                 case GameStage.STEALING:
-                    targets = list(self.game.board.get_players_on_hex(self.game.board.robber))
+                    targets = self.game.board.get_players_on_hex_in_order(self.game.board.robber)
                     if len(targets) > 0:
                         target = targets[action[0] % len(targets)]
-                        resource = target.get_random_resource()
+                        resource = target.get_random_resource(self.game.steal_rng)
                         if resource is not None:
                             target.remove_resources({resource: 1})
                             current_player.add_resources({resource: 1})
@@ -507,28 +558,32 @@ class CatanEnvironmentComp(gym.Env):
 
         return next_stage, reward, next_player_number, done
 
+    def _apply_action(self, action):
+        if self.recorder is not None:
+            self.recorder.record(action)
+        next_stage, reward, next_player_number, done = self._perform_action(action)
+        if next_stage is not None:
+            self.stage = next_stage
+        self.current_player_number = next_player_number
+        self.game.set_turn(self.current_player_number, self.stage.value)
+        return reward, done
+
     def step(self, action):
         assert isinstance(action, np.ndarray)
-        next_stage, reward, next_player_number, done = self._perform_action(action)
+        reward, done = self._apply_action(action)
 
         # if random.random() < 0.005:
         #     print(self.current_player_number, self.game.get_victory_points(current_player), self.stage, action)
 
-        if next_stage is not None:
-            self.stage = next_stage
-        self.current_player_number = next_player_number
-
         while self.current_player_number != 0 and not done:
             model = self.models_to_beat[self.current_player_number - 1]
             opp_action, _state = model.predict(self._next_observation(), deterministic=False)
-            next_stage, _, next_player_number, done = self._perform_action(opp_action)
-            if next_stage is not None:
-                self.stage = next_stage
-            self.current_player_number = next_player_number
+            _, done = self._apply_action(opp_action)
 
         if done:
-            vps = self.game.get_victory_points(self.game.players[0])
-            place = sum([vps > self.game.get_victory_points(player) for player in self.game.players])  # 3 = winner
+            victory_points = self.game.victory_points_vector()
+            vps = int(victory_points[0])
+            place = int((vps > victory_points).sum())  # 3 = winner
             print(f"Done in {self.turns} turns, earned {vps} points, in place {4-place}!")
 
             reward += 1000 * place
@@ -537,17 +592,33 @@ class CatanEnvironmentComp(gym.Env):
         return self._next_observation(), reward, done, {}
 
     def reset(self, *, seed: Optional[int] = None, return_info: bool = False, options: Optional[dict] = None):
-        self.game = Game(BeginnerBoard())
+        super().reset(seed=seed)
+        print(f"Reset {self.resets} times")
+        self.resets += 1
+        self._start_game(Game(BeginnerBoard(), seed=int(self.np_random.integers(2**63))))
+        self.recorder = None
+        if self.record_replays:
+            self.recorder = ReplayRecorder(self.game, get_extra_state=self._get_replay_state)
+        return self._next_observation()
+
+    def _start_game(self, game: Game, state: Optional[bytes] = None):
+        self.game = game
         self.renderer = BoardRenderer(self.game.board)
+        self.raster_renderer = BoardRasterRenderer(self.game.board)
+        if state is not None:
+            # Carry on from a replay snapshot
+            stage, self.current_player_number, self.rolled, self.turns, self.bought_dev_card, \
+                self.played_dev_card = _REPLAY_STATE.unpack(state)
+            self.stage = GameStage(stage)
+            return
         self.stage = GameStage.NOT_ROLLED
         self.current_player_number = 0
+        self.game.set_turn(self.current_player_number, self.stage.value)
         self.turns = 0
         # self.illegal_acts = 0
         self.rolled = False
         self.bought_dev_card = False
         self.played_dev_card = False
-        print(f"Reset {self.resets} times")
-        self.resets += 1
 
         starting_settlements = [Coords(-3, 2), Coords(-2, 3), Coords(1, 2), Coords(3, -1),
                                 Coords(1, -3), Coords(-2, 0), Coords(2, -2), Coords(-1, -2)]
@@ -563,15 +634,47 @@ class CatanEnvironmentComp(gym.Env):
             if i >= 4:
                 player.add_resources(self.game.board.get_hex_resources_for_intersection(starting_settlements[i]))
 
+    def _get_replay_state(self):
+        return _REPLAY_STATE.pack(self.stage.value, self.current_player_number, self.rolled, self.turns,
+                                  self.bought_dev_card, self.played_dev_card)
+
+    def get_replay(self) -> Replay:
+        """Get the replay of the current game, which is recorded if record_replays was set when it was reset."""
+        return self.recorder.get_replay()
+
+    def load_replay(self, replay: Replay, step: Optional[int] = None):
+        """Put the environment in the state it was in after the first steps of a recorded game, by starting from the
+        last snapshot before then and taking the recorded actions again, without asking any models for them.
+
+        Args:
+            replay: The replay of the game
+            step: How many of the recorded actions to take. Defaults to all of them
+        Returns:
+            The observation at that step
+        """
+        if step is None:
+            step = len(replay)
+        start, game, state = replay.get_snapshot(step)
+        self.recorder = None
+        if game is None:
+            self._start_game(replay.new_game())
+        else:
+            self._start_game(game, state)
+        for action in replay.actions[start:step]:
+            self._apply_action(action)
         return self._next_observation()
 
     def render(self, mode="human"):
-        pass
+        if mode == "rgb_array":
+            # Copied, as the renderer draws every frame into the same array
+            return self.raster_renderer.render().copy()
 
 
 class CatanEnvironmentDQN(gym.Env):
+    metadata = {"render_modes": ["human", "rgb_array"]}
     game: Game
     renderer: BoardRenderer
+    raster_renderer: BoardRasterRenderer
     stage: GameStage
     current_player_number: int
     rolled: bool
@@ -580,10 +683,14 @@ class CatanEnvironmentDQN(gym.Env):
     bought_dev_card: bool
     played_dev_card: bool
     connected_intersection: Coords
+    recorder: Optional[ReplayRecorder]
 
     def __init__(self, models_to_beat, opp_uses_dict):
         super(CatanEnvironmentDQN, self).__init__()
         self.resets = 0
+        # Set to record each game from the next reset, to get with get_replay
+        self.record_replays = False
+        self.recorder = None
         self.models_to_beat = models_to_beat
         self.opp_uses_dict = opp_uses_dict
 
@@ -607,47 +714,34 @@ class CatanEnvironmentDQN(gym.Env):
         self.observation_space = spaces.Box(low=0, high=256, shape=(4, 253))
 
     def _all_hex_coords(self):
-        return self.game.board.hexes.keys()
+        return funcs.BASELINE_HEX_COORDS
 
     def _all_intersection_coords(self):
-        return self.game.board.intersections.keys()
+        return funcs.BASELINE_INTERSECTION_COORDS
 
     def _all_path_coords(self):
-        return self.game.board.paths.keys()
+        return funcs.BASELINE_PATH_COORDS
 
     def _next_observation(self):
         obs = np.zeros((4, 253))
-        hexes = {hex_coord: i for i, hex_coord in enumerate(self._all_hex_coords())}
+        board = self.game.board
 
         # Stage
         obs[..., self.stage.value] = 255
 
-        # Robber Location
-        obs[..., 8 + hexes[self.game.board.robber]] = 255
+        # Robber Location, with the board encoded in the order the trained models saw it in, not in index order
+        obs[..., 8 + funcs.BASELINE_HEX_POSITIONS[board.hex_indices[board.robber]]] = 255
+        intersection_owners = board.intersection_owners[funcs.BASELINE_INTERSECTION_INDICES]
+        path_owners = board.path_owners[funcs.BASELINE_PATH_INDICES]
 
         # Buildings and cards
         for i in range(len(self.game.players)):
-            for j, coord in enumerate(self._all_intersection_coords()):
-                building = self.game.board.intersections[coord].building
-                if building is None:
-                    continue
-                if building.owner == self.game.players[(self.current_player_number + i) % 4]:
-                    col = 62 + j
-                    if building.building_type == BuildingType.CITY:
-                        col += 54
-                    obs[i, j] = 255
-
-            for j, coord in enumerate(self._all_path_coords()):
-                building = self.game.board.paths[coord].building
-                if building is None:
-                    continue
-                if building.owner == self.game.players[(self.current_player_number + i) % 4]:
-                    obs[i, 170 + j] = 255
-
-            for j, res in enumerate(Resource):
-                obs[i, 242 + j] = self.game.players[(self.current_player_number + i) % 4].resources[res]
-            for j, dev in enumerate(DevelopmentCard):
-                obs[i, 247 + j] = self.game.players[(self.current_player_number + i) % 4].development_cards[dev]
+            owner = board.get_player_index(self.game.players[(self.current_player_number + i) % 4])
+            obs[i, :54][intersection_owners == owner] = 255
+            obs[i, 170:242][path_owners == owner] = 255
+
+            obs[i, 242:247] = self.game.players[(self.current_player_number + i) % 4].resource_counts
+            obs[i, 247:252] = self.game.players[(self.current_player_number + i) % 4].development_card_counts
             obs[i, 252] = self.game.players[(self.current_player_number + i) % 4].number_played_knights
 
         return obs
@@ -655,35 +749,26 @@ class CatanEnvironmentDQN(gym.Env):
     def _next_observation_dict(self):
         obs = {'stage': self.stage.value}
 
-        hexes = {hex_coord: i for i, hex_coord in enumerate(self._all_hex_coords())}
-        obs['robber location'] = hexes[self.game.board.robber]
+        board = self.game.board
+        # The board is encoded in the order the trained models saw it in, not in index order
+        obs['robber location'] = int(funcs.BASELINE_HEX_POSITIONS[board.hex_indices[board.robber]])
+        intersection_owners = board.intersection_owners[funcs.BASELINE_INTERSECTION_INDICES]
+        intersection_types = board.intersection_types[funcs.BASELINE_INTERSECTION_INDICES]
+        path_owners = board.path_owners[funcs.BASELINE_PATH_INDICES]
 
         buildings = np.zeros((4, 180))
         for i in range(len(self.game.players)):
-            for j, coord in enumerate(self._all_intersection_coords()):
-                building = self.game.board.intersections[coord].building
-                if building is None:
-                    continue
-                if building.owner == self.game.players[(self.current_player_number + i) % 4]:
-                    col = j
-                    if building.building_type == BuildingType.CITY:
-                        col += 54
-                    buildings[i, col] = 1
-
-            for j, coord in enumerate(self._all_path_coords()):
-                building = self.game.board.paths[coord].building
-                if building is None:
-                    continue
-                if building.owner == self.game.players[(self.current_player_number + i) % 4]:
-                    buildings[i, j + 108] = 1
+            owner = board.get_player_index(self.game.players[(self.current_player_number + i) % 4])
+            owned = intersection_owners == owner
+            buildings[i, :54] = owned & (intersection_types == BuildingType.SETTLEMENT.value)
+            buildings[i, 54:108] = owned & (intersection_types == BuildingType.CITY.value)
+            buildings[i, 108:] = path_owners == owner
         obs['buildings'] = buildings
 
         cards = np.zeros((4, 11))
         for i in range(len(self.game.players)):
-            for j, res in enumerate(Resource):
-                cards[i, j] = self.game.players[(self.current_player_number + i) % 4].resources[res]
-            for j, dev in enumerate(DevelopmentCard):
-                cards[i, j + 5] = self.game.players[(self.current_player_number + i) % 4].development_cards[dev]
+            cards[i, :5] = self.game.players[(self.current_player_number + i) % 4].resource_counts
+            cards[i, 5:10] = self.game.players[(self.current_player_number + i) % 4].development_card_counts
             cards[i, 10] = self.game.players[(self.current_player_number + i) % 4].number_played_knights
         obs['cards in hand'] = cards
 
@@ -702,7 +787,7 @@ class CatanEnvironmentDQN(gym.Env):
                     if (action[0] % 2 == 0 or
                             current_player.development_cards[DevelopmentCard.KNIGHT] == 0 or
                             self.played_dev_card):
-                        dice = random.randint(1, 6) + random.randint(1, 6)
+                        dice = self.game.roll_dice()
                         self.rolled = True
                         if dice == 7:
                             next_stage = GameStage.MOVING_ROBBER
@@ -764,7 +849,7 @@ class CatanEnvironmentDQN(gym.Env):
                         next_stage = GameStage.TRADING
                     elif action[0] == 6:
                         valid_coords = self.game.board.get_valid_settlement_coords(current_player)
-                        if current_player.has_resources(BuildingType.SETTLEMENT.get_required_resources()) \
+                        if current_player.has_resource_counts(BuildingType.SETTLEMENT.get_required_resource_counts()) \
                                 and valid_coords:
                             coord = funcs.choose_intersection(valid_coords, action[1] % len(valid_coords))
                             self.game.build_settlement(current_player, coord)
@@ -773,7 +858,7 @@ class CatanEnvironmentDQN(gym.Env):
                             pass_turn = True
                     elif action[0] == 7:
                         valid_coords = self.game.board.get_valid_city_coords(current_player)
-                        if current_player.has_resources(BuildingType.CITY.get_required_resources()) \
+                        if current_player.has_resource_counts(BuildingType.CITY.get_required_resource_counts()) \
                                 and valid_coords:
                             coord = funcs.choose_intersection(valid_coords, action[1] % len(valid_coords))
                             self.game.upgrade_settlement_to_city(current_player, coord)
@@ -782,7 +867,7 @@ class CatanEnvironmentDQN(gym.Env):
                             pass_turn = True
                     elif action[0] == 8:
                         valid_coords = self.game.board.get_valid_road_coords(current_player)
-                        if current_player.has_resources(BuildingType.ROAD.get_required_resources()) \
+                        if current_player.has_resource_counts(BuildingType.ROAD.get_required_resource_counts()) \
                                 and valid_coords:
                             coord = funcs.choose_path(valid_coords, action[1] % len(valid_coords))
                             self.game.build_road(current_player, coord)
@@ -790,7 +875,7 @@ class CatanEnvironmentDQN(gym.Env):
                         else:
                             pass_turn = True
                     elif action[0] == 9:
-                        if current_player.has_resources(DevelopmentCard.get_required_resources()) and \
+                        if current_player.has_resource_counts(DevelopmentCard.get_required_resource_counts()) and \
                                 not self.bought_dev_card:
                             if self.game.build_development_card(current_player) == DevelopmentCard.VICTORY_POINT:
                                 reward += 10
@@ -801,15 +886,15 @@ class CatanEnvironmentDQN(gym.Env):
                         raise Exception
 
                 case GameStage.MOVING_ROBBER:
-                    valid_hexes = [coord for coord in self._all_hex_coords() if coord != self.game.board.robber]
-                    self.game.board.robber = funcs.choose_hex(valid_hexes, action[2] % len(valid_hexes))
+                    valid_hexes = funcs.BASELINE_ROBBER_DESTINATIONS[self.game.board.robber]
+                    self.game.board.robber = valid_hexes[action[2] % len(valid_hexes)]
                     next_stage = GameStage.STEALING
 
                 case GameStage.STEALING:
-                    targets = list(self.game.board.get_players_on_hex(self.game.board.robber))
+                    targets = self.game.board.get_players_on_hex_in_order(self.game.board.robber)
                     if len(targets) > 0:
                         target = targets[action[0] % len(targets)]
-                        resource = target.get_random_resource()
+                        resource = target.get_random_resource(self.game.steal_rng)
                         if resource is not None:
                             target.remove_resources({resource: 1})
                             current_player.add_resources({resource: 1})
@@ -843,30 +928,34 @@ class CatanEnvironmentDQN(gym.Env):
 
         return next_stage, reward, next_player_number, done
 
+    def _apply_action(self, action):
+        if self.recorder is not None:
+            self.recorder.record(action)
+        next_stage, reward, next_player_number, done = self._perform_action(action)
+        if next_stage is not None:
+            self.stage = next_stage
+        self.current_player_number = next_player_number
+        self.game.set_turn(self.current_player_number, self.stage.value)
+        return reward, done
+
     def step(self, action):
         assert isinstance(action, np.int32) or isinstance(action, np.int64)
         action = [action//(54*25), (action//54) % 25, action % 54]
-        next_stage, reward, next_player_number, done = self._perform_action(action)
+        reward, done = self._apply_action(action)
 
         # if random.random() < 0.005:
         #     print(self.current_player_number, self.game.get_victory_points(current_player), self.stage, action)
 
-        if next_stage is not None:
-            self.stage = next_stage
-        self.current_player_number = next_player_number
-
         while self.current_player_number != 0 and not done:
             model = self.models_to_beat[self.current_player_number - 1]
             obs = self._next_observation_dict if self.opp_uses_dict else self._next_observation
             opp_action, _state = model.predict(obs(), deterministic=False)
-            next_stage, _, next_player_number, done = self._perform_action(opp_action)
-            if next_stage is not None:
-                self.stage = next_stage
-            self.current_player_number = next_player_number
+            _, done = self._apply_action(opp_action)
 
         if done:
-            vps = self.game.get_victory_points(self.game.players[0])
-            place = sum([vps > self.game.get_victory_points(player) for player in self.game.players])  # 3 = winner
+            victory_points = self.game.victory_points_vector()
+            vps = int(victory_points[0])
+            place = int((vps > victory_points).sum())  # 3 = winner
             print(f"Done in {self.turns} turns, earned {vps} points, in place {4-place}!")
 
             reward += 1000 * place
@@ -882,20 +971,36 @@ class CatanEnvironmentDQN(gym.Env):
         return self._next_observation(), reward, done, {}
 
     def reset(self, *, seed: Optional[int] = None, return_info: bool = False, options: Optional[dict] = None):
-        self.game = Game(BeginnerBoard())
+        super().reset(seed=seed)
+        print(f"Reset {self.resets} times")
+        if self.resets % 10 == 0:
+            print(f"{self.first} first place, {self.second} second place, "
+                  f"{self.third} third place, {self.fourth} fourth place")
+        self.resets += 1
+        self._start_game(Game(BeginnerBoard(), seed=int(self.np_random.integers(2**63))))
+        self.recorder = None
+        if self.record_replays:
+            self.recorder = ReplayRecorder(self.game, get_extra_state=self._get_replay_state)
+        return self._next_observation()
+
+    def _start_game(self, game: Game, state: Optional[bytes] = None):
+        self.game = game
         self.renderer = BoardRenderer(self.game.board)
+        self.raster_renderer = BoardRasterRenderer(self.game.board)
+        if state is not None:
+            # Carry on from a replay snapshot
+            stage, self.current_player_number, self.rolled, self.turns, self.bought_dev_card, \
+                self.played_dev_card = _REPLAY_STATE.unpack(state)
+            self.stage = GameStage(stage)
+            return
         self.stage = GameStage.NOT_ROLLED
         self.current_player_number = 0
+        self.game.set_turn(self.current_player_number, self.stage.value)
         self.turns = 0
         # self.illegal_acts = 0
         self.rolled = False
         self.bought_dev_card = False
         self.played_dev_card = False
-        print(f"Reset {self.resets} times")
-        if self.resets % 10 == 0:
-            print(f"{self.first} first place, {self.second} second place, "
-                  f"{self.third} third place, {self.fourth} fourth place")
-        self.resets += 1
 
         starting_settlements = [Coords(-3, 2), Coords(-2, 3), Coords(1, 2), Coords(3, -1),
                                 Coords(1, -3), Coords(-2, 0), Coords(2, -2), Coords(-1, -2)]
@@ -911,15 +1016,47 @@ class CatanEnvironmentDQN(gym.Env):
             if i >= 4:
                 player.add_resources(self.game.board.get_hex_resources_for_intersection(starting_settlements[i]))
 
+    def _get_replay_state(self):
+        return _REPLAY_STATE.pack(self.stage.value, self.current_player_number, self.rolled, self.turns,
+                                  self.bought_dev_card, self.played_dev_card)
+
+    def get_replay(self) -> Replay:
+        """Get the replay of the current game, which is recorded if record_replays was set when it was reset."""
+        return self.recorder.get_replay()
+
+    def load_replay(self, replay: Replay, step: Optional[int] = None):
+        """Put the environment in the state it was in after the first steps of a recorded game, by starting from the
+        last snapshot before then and taking the recorded actions again, without asking any models for them.
+
+        Args:
+            replay: The replay of the game
+            step: How many of the recorded actions to take. Defaults to all of them
+        Returns:
+            The observation at that step
+        """
+        if step is None:
+            step = len(replay)
+        start, game, state = replay.get_snapshot(step)
+        self.recorder = None
+        if game is None:
+            self._start_game(replay.new_game())
+        else:
+            self._start_game(game, state)
+        for action in replay.actions[start:step]:
+            self._apply_action(action)
         return self._next_observation()
 
     def render(self, mode="human"):
-        pass
+        if mode == "rgb_array":
+            # Copied, as the renderer draws every frame into the same array
+            return self.raster_renderer.render().copy()
 
 
 class CatanEnvironmentDQNSettlements(gym.Env):
+    metadata = {"render_modes": ["human", "rgb_array"]}
     game: Game
     renderer: BoardRenderer
+    raster_renderer: BoardRasterRenderer
     stage: GameStage
     current_player_number: int
     rolled: bool
@@ -928,10 +1065,14 @@ class CatanEnvironmentDQNSettlements(gym.Env):
     bought_dev_card: bool
     played_dev_card: bool
     connected_intersection: Coords
+    recorder: Optional[ReplayRecorder]
 
     def __init__(self, model_to_use, models_to_beat, opp_uses_dict=True):
         super(CatanEnvironmentDQNSettlements, self).__init__()
         self.resets = 0
+        # Set to record each game from the next reset, to get with get_replay
+        self.record_replays = False
+        self.recorder = None
         self.model_to_use = model_to_use
         self.models_to_beat = models_to_beat
         self.opp_uses_dict = opp_uses_dict
@@ -956,47 +1097,34 @@ class CatanEnvironmentDQNSettlements(gym.Env):
         self.observation_space = spaces.Box(low=0, high=255, shape=(4, 253), dtype=np.byte)
 
     def _all_hex_coords(self):
-        return self.game.board.hexes.keys()
+        return funcs.BASELINE_HEX_COORDS
 
     def _all_intersection_coords(self):
-        return self.game.board.intersections.keys()
+        return funcs.BASELINE_INTERSECTION_COORDS
 
     def _all_path_coords(self):
-        return self.game.board.paths.keys()
+        return funcs.BASELINE_PATH_COORDS
 
     def _next_observation(self):
         obs = np.zeros((4, 253))
-        hexes = {hex_coord: i for i, hex_coord in enumerate(self._all_hex_coords())}
+        board = self.game.board
 
         # Stage
         obs[..., self.stage.value] = 255
 
-        # Robber Location
-        obs[..., 8 + hexes[self.game.board.robber]] = 255
+        # Robber Location, with the board encoded in the order the trained models saw it in, not in index order
+        obs[..., 8 + funcs.BASELINE_HEX_POSITIONS[board.hex_indices[board.robber]]] = 255
+        intersection_owners = board.intersection_owners[funcs.BASELINE_INTERSECTION_INDICES]
+        path_owners = board.path_owners[funcs.BASELINE_PATH_INDICES]
 
         # Buildings and cards
         for i in range(len(self.game.players)):
-            for j, coord in enumerate(self._all_intersection_coords()):
-                building = self.game.board.intersections[coord].building
-                if building is None:
-                    continue
-                if building.owner == self.game.players[(self.current_player_number + i) % 4]:
-                    col = 62 + j
-                    if building.building_type == BuildingType.CITY:
-                        col += 54
-                    obs[i, j] = 255
-
-            for j, coord in enumerate(self._all_path_coords()):
-                building = self.game.board.paths[coord].building
-                if building is None:
-                    continue
-                if building.owner == self.game.players[(self.current_player_number + i) % 4]:
-                    obs[i, 170 + j] = 255
-
-            for j, res in enumerate(Resource):
-                obs[i, 242 + j] = self.game.players[(self.current_player_number + i) % 4].resources[res]
-            for j, dev in enumerate(DevelopmentCard):
-                obs[i, 247 + j] = self.game.players[(self.current_player_number + i) % 4].development_cards[dev]
+            owner = board.get_player_index(self.game.players[(self.current_player_number + i) % 4])
+            obs[i, :54][intersection_owners == owner] = 255
+            obs[i, 170:242][path_owners == owner] = 255
+
+            obs[i, 242:247] = self.game.players[(self.current_player_number + i) % 4].resource_counts
+            obs[i, 247:252] = self.game.players[(self.current_player_number + i) % 4].development_card_counts
             obs[i, 252] = self.game.players[(self.current_player_number + i) % 4].number_played_knights
 
         return obs
@@ -1004,35 +1132,26 @@ class CatanEnvironmentDQNSettlements(gym.Env):
     def _next_observation_dict(self):
         obs = {'stage': self.stage.value}
 
-        hexes = {hex_coord: i for i, hex_coord in enumerate(self._all_hex_coords())}
-        obs['robber location'] = hexes[self.game.board.robber]
+        board = self.game.board
+        # The board is encoded in the order the trained models saw it in, not in index order
+        obs['robber location'] = int(funcs.BASELINE_HEX_POSITIONS[board.hex_indices[board.robber]])
+        intersection_owners = board.intersection_owners[funcs.BASELINE_INTERSECTION_INDICES]
+        intersection_types = board.intersection_types[funcs.BASELINE_INTERSECTION_INDICES]
+        path_owners = board.path_owners[funcs.BASELINE_PATH_INDICES]
 
         buildings = np.zeros((4, 180))
         for i in range(len(self.game.players)):
-            for j, coord in enumerate(self._all_intersection_coords()):
-                building = self.game.board.intersections[coord].building
-                if building is None:
-                    continue
-                if building.owner == self.game.players[(self.current_player_number + i) % 4]:
-                    col = j
-                    if building.building_type == BuildingType.CITY:
-                        col += 54
-                    buildings[i, col] = 1
-
-            for j, coord in enumerate(self._all_path_coords()):
-                building = self.game.board.paths[coord].building
-                if building is None:
-                    continue
-                if building.owner == self.game.players[(self.current_player_number + i) % 4]:
-                    buildings[i, j + 108] = 1
+            owner = board.get_player_index(self.game.players[(self.current_player_number + i) % 4])
+            owned = intersection_owners == owner
+            buildings[i, :54] = owned & (intersection_types == BuildingType.SETTLEMENT.value)
+            buildings[i, 54:108] = owned & (intersection_types == BuildingType.CITY.value)
+            buildings[i, 108:] = path_owners == owner
         obs['buildings'] = buildings
 
         cards = np.zeros((4, 11))
         for i in range(len(self.game.players)):
-            for j, res in enumerate(Resource):
-                cards[i, j] = self.game.players[(self.current_player_number + i) % 4].resources[res]
-            for j, dev in enumerate(DevelopmentCard):
-                cards[i, j + 5] = self.game.players[(self.current_player_number + i) % 4].development_cards[dev]
+            cards[i, :5] = self.game.players[(self.current_player_number + i) % 4].resource_counts
+            cards[i, 5:10] = self.game.players[(self.current_player_number + i) % 4].development_card_counts
             cards[i, 10] = self.game.players[(self.current_player_number + i) % 4].number_played_knights
         obs['cards in hand'] = cards
 
@@ -1051,7 +1170,7 @@ class CatanEnvironmentDQNSettlements(gym.Env):
                     if (action[0] % 2 == 0 or
                             current_player.development_cards[DevelopmentCard.KNIGHT] == 0 or
                             self.played_dev_card):
-                        dice = random.randint(1, 6) + random.randint(1, 6)
+                        dice = self.game.roll_dice()
                         self.rolled = True
                         if dice == 7:
                             next_stage = GameStage.MOVING_ROBBER
@@ -1113,7 +1232,7 @@ class CatanEnvironmentDQNSettlements(gym.Env):
                         next_stage = GameStage.TRADING
                     elif action[0] == 6:
                         valid_coords = self.game.board.get_valid_settlement_coords(current_player)
-                        if current_player.has_resources(BuildingType.SETTLEMENT.get_required_resources()) \
+                        if current_player.has_resource_counts(BuildingType.SETTLEMENT.get_required_resource_counts()) \
                                 and valid_coords:
                             coord = funcs.choose_intersection(valid_coords, action[1] % len(valid_coords))
                             self.game.build_settlement(current_player, coord)
@@ -1122,7 +1241,7 @@ class CatanEnvironmentDQNSettlements(gym.Env):
                             pass_turn = True
                     elif action[0] == 7:
                         valid_coords = self.game.board.get_valid_city_coords(current_player)
-                        if current_player.has_resources(BuildingType.CITY.get_required_resources()) \
+                        if current_player.has_resource_counts(BuildingType.CITY.get_required_resource_counts()) \
                                 and valid_coords:
                             coord = funcs.choose_intersection(valid_coords, action[1] % len(valid_coords))
                             self.game.upgrade_settlement_to_city(current_player, coord)
@@ -1131,7 +1250,7 @@ class CatanEnvironmentDQNSettlements(gym.Env):
                             pass_turn = True
                     elif action[0] == 8:
                         valid_coords = self.game.board.get_valid_road_coords(current_player)
-                        if current_player.has_resources(BuildingType.ROAD.get_required_resources()) \
+                        if current_player.has_resource_counts(BuildingType.ROAD.get_required_resource_counts()) \
                                 and valid_coords:
                             coord = funcs.choose_path(valid_coords, action[1] % len(valid_coords))
                             self.game.build_road(current_player, coord)
@@ -1139,7 +1258,7 @@ class CatanEnvironmentDQNSettlements(gym.Env):
                         else:
                             pass_turn = True
                     elif action[0] == 9:
-                        if current_player.has_resources(DevelopmentCard.get_required_resources()) and \
+                        if current_player.has_resource_counts(DevelopmentCard.get_required_resource_counts()) and \
                                 not self.bought_dev_card:
                             if self.game.build_development_card(current_player) == DevelopmentCard.VICTORY_POINT:
                                 reward += 10
@@ -1150,15 +1269,15 @@ class CatanEnvironmentDQNSettlements(gym.Env):
                         raise Exception
 
                 case GameStage.MOVING_ROBBER:
-                    valid_hexes = [coord for coord in self._all_hex_coords() if coord != self.game.board.robber]
-                    self.game.board.robber = funcs.choose_hex(valid_hexes, action[2] % len(valid_hexes))
+                    valid_hexes = funcs.BASELINE_ROBBER_DESTINATIONS[self.game.board.robber]
+                    self.game.board.robber = valid_hexes[action[2] % len(valid_hexes)]
                     next_stage = GameStage.STEALING
 
                 case GameStage.STEALING:
-                    targets = list(self.game.board.get_players_on_hex(self.game.board.robber))
+                    targets = self.game.board.get_players_on_hex_in_order(self.game.board.robber)
                     if len(targets) > 0:
                         target = targets[action[0] % len(targets)]
-                        resource = target.get_random_resource()
+                        resource = target.get_random_resource(self.game.steal_rng)
                         if resource is not None:
                             target.remove_resources({resource: 1})
                             current_player.add_resources({resource: 1})
@@ -1192,35 +1311,39 @@ class CatanEnvironmentDQNSettlements(gym.Env):
 
         return next_stage, reward, next_player_number, done
 
+    def _apply_action(self, action):
+        if self.recorder is not None:
+            self.recorder.record(action)
+        next_stage, reward, next_player_number, done = self._perform_action(action)
+        if next_stage is not None:
+            self.stage = next_stage
+        self.current_player_number = next_player_number
+        self.game.set_turn(self.current_player_number, self.stage.value)
+        return reward, done
+
     def step(self, settlement_loc):
         assert isinstance(settlement_loc, np.int32) or isinstance(settlement_loc, np.int64)
 
         action, _state = self.model_to_use.predict(self._next_observation_dict(), deterministic=False)
         if action[0] == 6 and \
                 self.game.board.get_valid_settlement_coords(self.game.players[0]) and \
-                self.game.players[0].has_resources(BuildingType.SETTLEMENT.get_required_resources()):
+                self.game.players[0].has_resource_counts(BuildingType.SETTLEMENT.get_required_resource_counts()):
             action[1] = settlement_loc
-        next_stage, reward, next_player_number, done = self._perform_action(action)
+        reward, done = self._apply_action(action)
 
         # if random.random() < 0.005:
         #     print(self.current_player_number, self.game.get_victory_points(current_player), self.stage, action)
 
-        if next_stage is not None:
-            self.stage = next_stage
-        self.current_player_number = next_player_number
-
         while self.current_player_number != 0 and not done:
             model = self.models_to_beat[self.current_player_number - 1]
             obs = self._next_observation_dict if self.opp_uses_dict else self._next_observation
             opp_action, _state = model.predict(obs(), deterministic=False)
-            next_stage, _, next_player_number, done = self._perform_action(opp_action)
-            if next_stage is not None:
-                self.stage = next_stage
-            self.current_player_number = next_player_number
+            _, done = self._apply_action(opp_action)
 
         if done:
-            vps = self.game.get_victory_points(self.game.players[0])
-            place = sum([vps > self.game.get_victory_points(player) for player in self.game.players])  # 3 = winner
+            victory_points = self.game.victory_points_vector()
+            vps = int(victory_points[0])
+            place = int((vps > victory_points).sum())  # 3 = winner
             print(f"Done in {self.turns} turns, earned {vps} points, in place {4-place}!")
 
             reward += 1000 * place
@@ -1236,20 +1359,36 @@ class CatanEnvironmentDQNSettlements(gym.Env):
         return self._next_observation(), reward, done, {}
 
     def reset(self, *, seed: Optional[int] = None, return_info: bool = False, options: Optional[dict] = None):
-        self.game = Game(BeginnerBoard())
+        super().reset(seed=seed)
+        print(f"Reset {self.resets} times")
+        if self.resets % 10 == 0:
+            print(f"{self.first} first place, {self.second} second place, "
+                  f"{self.third} third place, {self.fourth} fourth place")
+        self.resets += 1
+        self._start_game(Game(BeginnerBoard(), seed=int(self.np_random.integers(2**63))))
+        self.recorder = None
+        if self.record_replays:
+            self.recorder = ReplayRecorder(self.game, get_extra_state=self._get_replay_state)
+        return self._next_observation()
+
+    def _start_game(self, game: Game, state: Optional[bytes] = None):
+        self.game = game
         self.renderer = BoardRenderer(self.game.board)
+        self.raster_renderer = BoardRasterRenderer(self.game.board)
+        if state is not None:
+            # Carry on from a replay snapshot
+            stage, self.current_player_number, self.rolled, self.turns, self.bought_dev_card, \
+                self.played_dev_card = _REPLAY_STATE.unpack(state)
+            self.stage = GameStage(stage)
+            return
         self.stage = GameStage.NOT_ROLLED
         self.current_player_number = 0
+        self.game.set_turn(self.current_player_number, self.stage.value)
         self.turns = 0
         # self.illegal_acts = 0
         self.rolled = False
         self.bought_dev_card = False
         self.played_dev_card = False
-        print(f"Reset {self.resets} times")
-        if self.resets % 10 == 0:
-            print(f"{self.first} first place, {self.second} second place, "
-                  f"{self.third} third place, {self.fourth} fourth place")
-        self.resets += 1
 
         starting_settlements = [Coords(-3, 2), Coords(-2, 3), Coords(1, 2), Coords(3, -1),
                                 Coords(1, -3), Coords(-2, 0), Coords(2, -2), Coords(-1, -2)]
@@ -1265,7 +1404,37 @@ class CatanEnvironmentDQNSettlements(gym.Env):
             if i >= 4:
                 player.add_resources(self.game.board.get_hex_resources_for_intersection(starting_settlements[i]))
 
+    def _get_replay_state(self):
+        return _REPLAY_STATE.pack(self.stage.value, self.current_player_number, self.rolled, self.turns,
+                                  self.bought_dev_card, self.played_dev_card)
+
+    def get_replay(self) -> Replay:
+        """Get the replay of the current game, which is recorded if record_replays was set when it was reset."""
+        return self.recorder.get_replay()
+
+    def load_replay(self, replay: Replay, step: Optional[int] = None):
+        """Put the environment in the state it was in after the first steps of a recorded game, by starting from the
+        last snapshot before then and taking the recorded actions again, without asking any models for them.
+
+        Args:
+            replay: The replay of the game
+            step: How many of the recorded actions to take. Defaults to all of them
+        Returns:
+            The observation at that step
+        """
+        if step is None:
+            step = len(replay)
+        start, game, state = replay.get_snapshot(step)
+        self.recorder = None
+        if game is None:
+            self._start_game(replay.new_game())
+        else:
+            self._start_game(game, state)
+        for action in replay.actions[start:step]:
+            self._apply_action(action)
         return self._next_observation()
 
     def render(self, mode="human"):
-        pass
+        if mode == "rgb_array":
+            # Copied, as the renderer draws every frame into the same array
+            return self.raster_renderer.render().copy()
@@ -1,10 +1,46 @@
 from pycatan import Game, DevelopmentCard, Resource
-from pycatan.board import BeginnerBoard, BoardRenderer, BuildingType
+from pycatan.board import BeginnerBoard, BoardRenderer, BuildingType, Coords, Hex, Intersection
 import string
 
+import numpy as np
+
 game = Game(BeginnerBoard())
 renderer = BoardRenderer(game.board)
 
+# The hexes of the beginner board in the order it lists them. Boards used to be enumerated in the order their hexes
+# were given in, and not by index, and the trained models saw the board in that order.
+BASELINE_HEX_COORDS = (
+    Coords(4, -2), Coords(3, 0), Coords(2, 2), Coords(3, -3), Coords(2, -1), Coords(1, 1), Coords(0, 3),
+    Coords(2, -4), Coords(1, -2), Coords(0, 0), Coords(-1, 2), Coords(-2, 4), Coords(0, -3), Coords(-1, -1),
+    Coords(-2, 1), Coords(-3, 3), Coords(-2, -2), Coords(-3, 0), Coords(-4, 2),
+)
+# The intersections and paths in the order boards used to enumerate them. The corners of each hex were gathered into a
+# set, and each of them was then joined to its neighbours, so they came out in the iteration order of those sets.
+# Rebuilding the sets the same way gives the same order
+BASELINE_INTERSECTION_COORDS = tuple(
+    set(h + offset for h in BASELINE_HEX_COORDS for offset in Hex.CONNECTED_CORNER_OFFSETS)
+)
+BASELINE_PATH_COORDS = tuple(
+    dict.fromkeys(
+        frozenset((c, c + offset))
+        for c in BASELINE_INTERSECTION_COORDS
+        for offset in Intersection.CONNECTED_CORNER_OFFSETS
+        if c + offset in game.board.intersection_indices
+    )
+)
+# The board index of each hex, intersection and path in the old order, to encode observations in that order, and the
+# position of each hex in the old order, by board index
+BASELINE_HEX_INDICES = np.array([game.board.hex_indices[c] for c in BASELINE_HEX_COORDS])
+BASELINE_HEX_POSITIONS = np.argsort(BASELINE_HEX_INDICES)
+BASELINE_INTERSECTION_INDICES = np.array(
+    [game.board.intersection_indices[c] for c in BASELINE_INTERSECTION_COORDS]
+)
+BASELINE_PATH_INDICES = np.array([game.board.path_indices[p] for p in BASELINE_PATH_COORDS])
+# The hexes the robber can move to from each hex, in the old order
+BASELINE_ROBBER_DESTINATIONS = {
+    robber: tuple(c for c in BASELINE_HEX_COORDS if c != robber) for robber in BASELINE_HEX_COORDS
+}
+
 
 def get_coord_sort_by_xy(c):
     x, y = renderer.get_coords_as_xy(c)
@@ -15,14 +51,17 @@ label_letters = string.ascii_lowercase + string.ascii_uppercase + "123456789"
 
 
 def choose_intersection(intersection_coords, choice):
-    intersection_list = [game.board.intersections[i] for i in intersection_coords]
-    return intersection_list[choice].coords
+    # The board used to return the legal coordinates as a set built in the old order, and a choice is an index into the
+    # order that set iterates in. Building the set the same way keeps every choice on the same intersection, whatever
+    # order the coordinates are given in
+    intersection_list = list(set([c for c in BASELINE_INTERSECTION_COORDS if c in intersection_coords]))
+    return intersection_list[choice]
 
 
 def choose_path(path_coords, choice):
-    # Label all the paths with a letter
-    path_list = [game.board.paths[i] for i in path_coords]
-    return path_list[choice].path_coords
+    # Built the same way as in choose_intersection
+    path_list = list(set([p for p in BASELINE_PATH_COORDS if p in path_coords]))
+    return path_list[choice]
 
 
 def choose_hex(hex_coords, choice):  # choice: 0-143
@@ -50,7 +89,7 @@ def move_robber(player):
     # If they try and steal from another player they lose their chance to steal
     to_steal_from = game.players[p] if game.players[p] in potential_players else None
     if to_steal_from:
-        resource = to_steal_from.get_random_resource()
+        resource = to_steal_from.get_random_resource(game.steal_rng)
         player.add_resources({resource: 1})
         to_steal_from.remove_resources({resource: 1})
         print("Stole 1 %s for player %d" % (resource, p + 1))
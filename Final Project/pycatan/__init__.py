@@ -5,7 +5,17 @@ __version__ = "1.0.0"
 from ._development_card import DevelopmentCard
 from ._game import Game
 from ._player import Player
+from ._replay import Replay, ReplayRecorder
 from ._resource import Resource
 from ._roll_yield import RollYield
 
-__all__ = ["DevelopmentCard", "Game", "Player", "Resource", "RollYield", "board"]
+__all__ = [
+    "DevelopmentCard",
+    "Game",
+    "Player",
+    "Replay",
+    "ReplayRecorder",
+    "Resource",
+    "RollYield",
+    "board",
+]
@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Tuple
 from enum import Enum
 from ._resource import Resource
 
@@ -26,6 +26,15 @@ class DevelopmentCard(Enum):
         """
         return {Resource.WOOL: 1, Resource.GRAIN: 1, Resource.ORE: 1}
 
+    @staticmethod
+    def get_required_resource_counts() -> Tuple[int, ...]:
+        """Get the resources required to build a development card, as a count of each resource.
+
+        Returns:
+            How many of each resource is required to build a development card, indexed by the Resource value
+        """
+        return _REQUIRED_RESOURCE_COUNTS
+
     def __str__(self):
         return {
             DevelopmentCard.KNIGHT: "Knight",
@@ -37,3 +46,9 @@ class DevelopmentCard(Enum):
 
     def __repl__(self):
         return self.__str__()
+
+
+_REQUIRED_RESOURCE_COUNTS = tuple(
+    DevelopmentCard.get_required_resources().get(res, 0)
+    for res in Resource
+)
@@ -1,13 +1,49 @@
-from typing import Dict, Set, Optional
-from random import shuffle
+from typing import Dict, List, Set, Optional
+import random
+import struct
+
+import numpy as np
 
 from ._player import Player
 from .board._board import Board
+from .board._board_topology import BoardTopology
 from .board._coords import Coords
 from ._roll_yield import RollYield
 from .errors import NotEnoughResourcesError
 from .board._building_type import BuildingType
 from ._development_card import DevelopmentCard
+from ._resource import Resource
+from ._zobrist import get_zobrist_keys
+
+# The binary format used by Game.to_bytes. Increase the version whenever the format changes
+_SNAPSHOT_MAGIC = b"PCTN"
+_SNAPSHOT_VERSION = 1
+# Magic, version, number of players, size of the encoded layout
+_SNAPSHOT_HEADER = struct.Struct("<4sBBH")
+# Robber hex, longest road owner, largest army owner, current turn, turn stage, cards left in the deck
+_SNAPSHOT_STATE = struct.Struct("<BbbBBB")
+# The binary format used by Game.get_random_state. A PCG64 generator's state, increment, whether it has a spare 32 bits
+# and the spare bits
+_PCG64_STATE = struct.Struct("<16s16sBI")
+# Whether a block of dice has been drawn, and how many of its rolls have been used
+_DICE_STATE = struct.Struct("<BH")
+# A Mersenne Twister's key and position, and whether it has a spare Gaussian and the Gaussian
+_MT_STATE = struct.Struct("<625IBd")
+_RESOURCES = list(Resource)
+_DEVELOPMENT_CARDS = list(DevelopmentCard)
+# How many dice rolls to draw from the dice RNG at once
+_DICE_BLOCK_SIZE = 4096
+# The attributes holding the random number generators, which are shared between clones until they are used
+_RNG_ATTRIBUTES = ("_dice_rng", "_steal_rng", "_deck_rng")
+# The DevelopmentCard values of the cards in a full deck, before shuffling
+_DEVELOPMENT_CARD_DECK = np.array(
+    14 * [DevelopmentCard.KNIGHT.value]
+    + 5 * [DevelopmentCard.VICTORY_POINT.value]
+    + 2 * [DevelopmentCard.ROAD_BUILDING.value]
+    + 2 * [DevelopmentCard.YEAR_OF_PLENTY.value]
+    + 2 * [DevelopmentCard.MONOPOLY.value],
+    dtype=np.int8,
+)
 
 
 class Game:
@@ -16,30 +52,361 @@ class Game:
     Args:
             board: The board to use in the Catan game
             num_players: The number of players to start the game with. Defaults to 4
+            seed: The seed for the game's random number generators. The dice, the steals and the development card deck
+                each get their own independent stream, so the same seed always gives the same game for the same moves.
+                Defaults to None, which gives a different game every time
 
     Attributes:
             board (Board): The Catan board being used in this game
+            seed (int): The seed the random number generators were made from. If no seed was given, the entropy that
+                was used instead, so that the game can still be replayed
             players (List[Player]): The players in the game, ordered by (recommended) turn order
             longest_road_owner (Player): The player who has the longest road token, or None if no players
                 have a road of at least 5 length
             largest_army_owner (Player): The player how has the largest army, or None if no players have played at least 3 knight cards
-            development_card_deck (List[DevelopmentCard]): The deck of development cards
+            development_card_deck (List[DevelopmentCard]): The cards left in the development card deck, in the order
+                they will be drawn
+            dice_rng (np.random.Generator): The random number generator the dice are rolled with, in blocks
+            steal_rng (random.Random): The random number generator for picking which cards are stolen or discarded, to
+                pass to `Player.get_random_resource`
+            deck_rng (np.random.Generator): The random number generator the development card deck is shuffled with
+            current_turn (int): The index of the player whose turn it is, as set by `set_turn`
+            turn_stage (int): The stage of the current turn, as set by `set_turn`
+            open_moves (int): How many moves begun with `begin_move` have not been undone or ended yet
     """
 
-    def __init__(self, board: Board, num_players: Optional[int] = 4):
+    def __init__(self, board: Board, num_players: Optional[int] = 4, seed: Optional[int] = None):
         self.board = board
-        self.players = [Player() for i in range(num_players)]
-        self.longest_road_owner = None
-        self.largest_army_owner = None
-        self.development_card_deck = (
-            14 * [DevelopmentCard.KNIGHT]
-            + 5 * [DevelopmentCard.VICTORY_POINT]
-            + 2 * [DevelopmentCard.ROAD_BUILDING]
-            + 2 * [DevelopmentCard.YEAR_OF_PLENTY]
-            + 2 * [DevelopmentCard.MONOPOLY]
+        self.players = [Player(seat=i) for i in range(num_players)]
+        # Give the players the same indices on the board as in this game
+        for player in self.players:
+            self.board.add_player(player)
+        self._longest_road_owner = None
+        self._largest_army_owner = None
+        seed_sequence = np.random.SeedSequence(seed)
+        self.seed: int = seed_sequence.entropy
+        dice_sequence, steal_sequence, deck_sequence = seed_sequence.spawn(3)
+        self._dice_rng = np.random.default_rng(dice_sequence)
+        self._steal_rng = random.Random(
+            int.from_bytes(steal_sequence.generate_state(4).tobytes(), "little")
+        )
+        self._deck_rng = np.random.default_rng(deck_sequence)
+        # The generators that are shared with a clone, so have to be copied before they are used
+        self._shared_rngs: Set[str] = set()
+        # The rolls are drawn in blocks when they are first needed, and used up by moving the cursor along them. The
+        # dice RNG's state from before the block was drawn is kept so the block can be drawn again
+        self._dice: List[int] = []
+        self._dice_cursor = 0
+        self._dice_state: Optional[dict] = None
+        # The deck is shuffled up front, and drawn from by moving the cursor along it
+        self._deck: np.ndarray = self._deck_rng.permutation(_DEVELOPMENT_CARD_DECK)
+        self._deck_cursor = 0
+
+        self.current_turn = 0
+        self.turn_stage = 0
+        # The Zobrist hash of the state that isn't on the board or in the players' hands. Owner keys are indexed by
+        # the player's index, with the last key for no owner
+        self._longest_road_keys = get_zobrist_keys("longest_road", (num_players + 1,)).tolist()
+        self._largest_army_keys = get_zobrist_keys("largest_army", (num_players + 1,)).tolist()
+        self._deck_keys = get_zobrist_keys(
+            "deck", (len(_DEVELOPMENT_CARD_DECK) + 1,)
+        ).tolist()
+        self._turn_keys = get_zobrist_keys("turn", (num_players,)).tolist()
+        self._zobrist_hash = (
+            self._longest_road_keys[-1]
+            ^ self._largest_army_keys[-1]
+            ^ self._deck_keys[self._get_deck_size()]
+            ^ self._turn_keys[self.current_turn]
+            ^ self._get_stage_key(self.turn_stage)
+        )
+        # How to undo each change made since the first open move began, shared with the board and players while there
+        # are open moves, and where each open move starts in it
+        self._undo_log: Optional[List[tuple]] = None
+        self._move_starts: List[int] = []
+
+    @property
+    def dice_rng(self) -> np.random.Generator:
+        """The random number generator the dice are rolled with, in blocks."""
+        return self._get_rng("_dice_rng")
+
+    @property
+    def steal_rng(self) -> random.Random:
+        """The random number generator for picking which cards are stolen or discarded.
+
+        While a move is open, the generator's position is recorded each time it is got, so it can be undone.
+        """
+        rng = self._get_rng("_steal_rng")
+        if self._undo_log is not None:
+            self._undo_log.append((self._restore_steal_rng, rng.getstate()))
+        return rng
+
+    def _restore_steal_rng(self, state: tuple):
+        self._get_rng("_steal_rng").setstate(state)
+
+    @property
+    def deck_rng(self) -> np.random.Generator:
+        """The random number generator the development card deck is shuffled with."""
+        return self._get_rng("_deck_rng")
+
+    def _get_rng(self, attribute: str):
+        """Get one of the random number generators, first giving this game its own copy if it is shared with a clone."""
+        rng = getattr(self, attribute)
+        if attribute in self._shared_rngs:
+            if isinstance(rng, random.Random):
+                copy = random.Random.__new__(random.Random)
+                copy.setstate(rng.getstate())
+            else:
+                bit_generator = type(rng.bit_generator)()
+                bit_generator.state = rng.bit_generator.state
+                copy = np.random.Generator(bit_generator)
+            rng = copy
+            setattr(self, attribute, rng)
+            self._shared_rngs.discard(attribute)
+        return rng
+
+    def clone(self) -> "Game":
+        """Copy the game state, i.e. for searching ahead or playing out the game.
+
+        Only the state that can change is copied: the buildings, the robber, the players' hands, the longest road and
+        largest army owners, the development card deck and the random number generators. The board's layout is shared.
+        The copy rolls the same dice and draws the same cards as this game would.
+
+        Returns:
+            The copy, which can be changed without changing this game
+        """
+        clone = object.__new__(Game)
+        # Everything that isn't replaced below is either immutable or only ever replaced, never changed
+        clone.__dict__.update(self.__dict__)
+        players = {player: player.clone() for player in self.players}
+        clone.players = [players[player] for player in self.players]
+        clone.board = self.board.clone([players.get(p, p) for p in self.board.players])
+        clone._longest_road_owner = players.get(self._longest_road_owner, self._longest_road_owner)
+        clone._largest_army_owner = players.get(self._largest_army_owner, self._largest_army_owner)
+        # The clone starts without any open moves
+        clone._undo_log = None
+        clone._move_starts = []
+        # The generators are only copied when one of the games next uses them
+        self._shared_rngs = set(_RNG_ATTRIBUTES)
+        clone._shared_rngs = set(_RNG_ATTRIBUTES)
+        return clone
+
+    @property
+    def longest_road_owner(self) -> Optional[Player]:
+        """The player who has the longest road token, or None."""
+        return self._longest_road_owner
+
+    @longest_road_owner.setter
+    def longest_road_owner(self, player: Optional[Player]):
+        if self._undo_log is not None:
+            self._undo_log.append((setattr, self, "longest_road_owner", self._longest_road_owner))
+        self._zobrist_hash ^= self._longest_road_keys[
+            self._get_owner_index(self._longest_road_owner)
+        ] ^ self._longest_road_keys[self._get_owner_index(player)]
+        self._longest_road_owner = player
+
+    @property
+    def largest_army_owner(self) -> Optional[Player]:
+        """The player who has the largest army, or None."""
+        return self._largest_army_owner
+
+    @largest_army_owner.setter
+    def largest_army_owner(self, player: Optional[Player]):
+        if self._undo_log is not None:
+            self._undo_log.append((setattr, self, "largest_army_owner", self._largest_army_owner))
+        self._zobrist_hash ^= self._largest_army_keys[
+            self._get_owner_index(self._largest_army_owner)
+        ] ^ self._largest_army_keys[self._get_owner_index(player)]
+        self._largest_army_owner = player
+
+    def _get_owner_index(self, player: Optional[Player]) -> int:
+        return -1 if player is None else self.board.get_player_index(player)
+
+    @staticmethod
+    def _get_stage_key(stage: int) -> int:
+        return int(get_zobrist_keys("stage", (1,), stage)[0])
+
+    def set_turn(self, player_index: int, stage: Optional[int] = 0):
+        """Record whose turn it is and what stage the turn is at, so they are included in `zobrist_hash`.
+
+        The game logic does not use these, they are only kept for identifying the game state.
+
+        Args:
+            player_index: The index of the player whose turn it is
+            stage: A number for the stage of the turn, i.e. the value of a stage enum. Defaults to 0
+        """
+        if self._undo_log is not None:
+            self._undo_log.append((self.set_turn, self.current_turn, self.turn_stage))
+        self._zobrist_hash ^= (
+            self._turn_keys[self.current_turn] ^ self._turn_keys[player_index]
+        )
+        if stage != self.turn_stage:
+            self._zobrist_hash ^= self._get_stage_key(self.turn_stage) ^ self._get_stage_key(stage)
+        self.current_turn = player_index
+        self.turn_stage = stage
+
+    @property
+    def zobrist_hash(self) -> int:
+        """A 64-bit Zobrist hash of the game state.
+
+        Covers the buildings, the robber, each player's hand and played knights, the longest road and largest army
+        owners, the number of cards left in the development card deck, and the turn set by `set_turn`. It is updated
+        as the state changes, so can be used as the key of a transposition table. Equal states in different Game
+        objects have equal hashes.
+        """
+        zobrist_hash = self.board.zobrist_hash ^ self._zobrist_hash
+        for player in self.players:
+            zobrist_hash ^= player.zobrist_hash
+        return zobrist_hash
+
+    @property
+    def canonical_zobrist_hash(self) -> int:
+        """A Zobrist hash of the game state that is the same for states that are rotations or reflections of each other.
+
+        Only the symmetries that map the board's layout onto itself are used (see `BoardTopology.hex_symmetries`), so
+        for most layouts this is the same as `zobrist_hash`.
+        """
+        rest = self._zobrist_hash
+        for player in self.players:
+            rest ^= player.zobrist_hash
+        return int(np.min(self.board.symmetric_zobrist_hashes ^ np.uint64(rest)))
+
+    @property
+    def development_card_deck(self) -> List[DevelopmentCard]:
+        """The cards left in the development card deck, in the order they will be drawn."""
+        return [_DEVELOPMENT_CARDS[card] for card in self._deck[self._deck_cursor:].tolist()]
+
+    def _get_deck_size(self) -> int:
+        return len(self._deck) - self._deck_cursor
+
+    def _set_development_card_deck(self, deck: np.ndarray):
+        """Replace the cards left in the deck.
+
+        Args:
+            deck: The DevelopmentCard values of the cards, in the order they will be drawn
+        """
+        if self._undo_log is not None:
+            self._undo_log.append(
+                (self._set_development_card_deck, self._deck[self._deck_cursor:])
+            )
+        self._zobrist_hash ^= self._deck_keys[self._get_deck_size()] ^ self._deck_keys[len(deck)]
+        self._deck = np.array(deck, dtype=np.int8)
+        self._deck_cursor = 0
+
+    def _set_deck_cursor(self, cursor: int):
+        if self._undo_log is not None:
+            self._undo_log.append((self._set_deck_cursor, self._deck_cursor))
+        self._zobrist_hash ^= self._deck_keys[self._get_deck_size()]
+        self._deck_cursor = cursor
+        self._zobrist_hash ^= self._deck_keys[self._get_deck_size()]
+
+    def to_bytes(self) -> bytes:
+        """Encode the game state in a compact, versioned binary format.
+
+        Covers the board's layout and buildings, the robber, each player's resources, development cards and played
+        knights, the order of the development card deck, the longest road and largest army owners, and the turn set
+        by `set_turn`. Decode with `Game.from_bytes`.
+
+        Returns:
+            The encoded game, a few hundred bytes long
+        """
+        board = self.board
+        layout = board.topology.to_bytes()
+        hands = np.array(
+            [
+                p.resource_counts + p.development_card_counts + [p.number_played_knights]
+                for p in self.players
+            ],
+            dtype="<u2",
+        )
+        return b"".join(
+            (
+                _SNAPSHOT_HEADER.pack(
+                    _SNAPSHOT_MAGIC, _SNAPSHOT_VERSION, len(self.players), len(layout)
+                ),
+                layout,
+                board.intersection_owners.tobytes(),
+                board.intersection_types.tobytes(),
+                board.path_owners.tobytes(),
+                board.path_types.tobytes(),
+                _SNAPSHOT_STATE.pack(
+                    board.hex_indices[board.robber],
+                    self._get_owner_index(self.longest_road_owner),
+                    self._get_owner_index(self.largest_army_owner),
+                    self.current_turn,
+                    self.turn_stage,
+                    self._get_deck_size(),
+                ),
+                hands.tobytes(),
+                self._deck[self._deck_cursor:].tobytes(),
+            )
         )
 
-        shuffle(self.development_card_deck)
+    @staticmethod
+    def from_bytes(data: bytes) -> "Game":
+        """Decode a game encoded by `Game.to_bytes`.
+
+        The board is a plain Board with the encoded layout, even if the original was a subclass such as BeginnerBoard.
+
+        Args:
+            data: The encoded game
+        Returns:
+            The decoded game
+        Raises:
+            ValueError: If the data is not an encoded game, or was encoded with a different version of the format
+        """
+        magic, version, num_players, layout_size = _SNAPSHOT_HEADER.unpack_from(data)
+        if magic != _SNAPSHOT_MAGIC:
+            raise ValueError("The data is not an encoded Game")
+        if version != _SNAPSHOT_VERSION:
+            raise ValueError(
+                "Cannot decode version %d of the Game format, expected version %d"
+                % (version, _SNAPSHOT_VERSION)
+            )
+        offset = _SNAPSHOT_HEADER.size
+        topology = BoardTopology.from_bytes(data[offset:offset + layout_size])
+        offset += layout_size
+        buildings = []
+        for size in (
+            len(topology.intersection_coords),
+            len(topology.intersection_coords),
+            len(topology.path_coords),
+            len(topology.path_coords),
+        ):
+            buildings.append(np.frombuffer(data, np.int8, size, offset))
+            offset += size
+        (
+            robber,
+            longest_road_owner,
+            largest_army_owner,
+            current_turn,
+            turn_stage,
+            deck_size,
+        ) = _SNAPSHOT_STATE.unpack_from(data, offset)
+        offset += _SNAPSHOT_STATE.size
+        hand_size = len(_RESOURCES) + len(_DEVELOPMENT_CARDS) + 1
+        hands = np.frombuffer(data, "<u2", num_players * hand_size, offset)
+        offset += hands.nbytes
+        deck = data[offset:offset + deck_size]
+        if len(deck) != deck_size:
+            raise ValueError("The encoded Game is truncated")
+
+        game = Game(
+            Board(topology=topology, robber=topology.hex_coords[robber]), num_players
+        )
+        game.board.load_buildings(*buildings)
+        for player, hand in zip(game.players, hands.reshape(num_players, hand_size).tolist()):
+            player.add_resource_counts(hand[: len(_RESOURCES)])
+            for card, amount in zip(_DEVELOPMENT_CARDS, hand[len(_RESOURCES):]):
+                for _ in range(amount):
+                    player.add_development_card(card)
+            player.number_played_knights = hand[-1]
+        if longest_road_owner >= 0:
+            game.longest_road_owner = game.players[longest_road_owner]
+        if largest_army_owner >= 0:
+            game.largest_army_owner = game.players[largest_army_owner]
+        game._set_development_card_deck(np.frombuffer(deck, np.int8))
+        game.set_turn(current_turn, turn_stage)
+        return game
 
     def build_settlement(
         self,
@@ -62,9 +429,7 @@ class Game:
             NotConnectedError: If check_connection is True and the settlement would not be connected to any roads owned by the player
         """
         # Check the player has the resources
-        if cost_resources and not player.has_resources(
-            BuildingType.SETTLEMENT.get_required_resources()
-        ):
+        if cost_resources and not player.has_resource_counts(BuildingType.SETTLEMENT.get_required_resource_counts()):
             raise NotEnoughResourcesError(
                 "Player does not have enough resources to build a settlement"
             )
@@ -74,7 +439,7 @@ class Game:
         )
         # Remove the resources
         if cost_resources:
-            player.remove_resources(BuildingType.SETTLEMENT.get_required_resources())
+            player.remove_resource_counts(BuildingType.SETTLEMENT.get_required_resource_counts())
 
     def build_road(
         self,
@@ -99,9 +464,7 @@ class Game:
             CoordsBlockedError: If the position is already blocked by another road/other path building
         """
         # Check the player has the resources
-        if cost_resources and not player.has_resources(
-            BuildingType.ROAD.get_required_resources()
-        ):
+        if cost_resources and not player.has_resource_counts(BuildingType.ROAD.get_required_resource_counts()):
             raise NotEnoughResourcesError(
                 "Player doesn not have the resources to build a road"
             )
@@ -113,7 +476,7 @@ class Game:
         )
         # Remove the resources
         if cost_resources:
-            player.remove_resources(BuildingType.ROAD.get_required_resources())
+            player.remove_resource_counts(BuildingType.ROAD.get_required_resource_counts())
 
         # Check if the player gets longest road
         road_length = self.board.calculate_player_longest_road(player)
@@ -138,9 +501,7 @@ class Game:
             ValueError: If coords is not a valid intersection
             RequiresSettlementError: If there is not a valid settlement at the intersection to upgrade
         """
-        if cost_resources and not player.has_resources(
-            BuildingType.CITY.get_required_resources()
-        ):
+        if cost_resources and not player.has_resource_counts(BuildingType.CITY.get_required_resource_counts()):
             raise NotEnoughResourcesError(
                 "Player does not have the resources to build a city"
             )
@@ -150,15 +511,28 @@ class Game:
         )
 
         if cost_resources:
-            player.remove_resources(BuildingType.CITY.get_required_resources())
+            player.remove_resource_counts(BuildingType.CITY.get_required_resource_counts())
 
-    def add_yield_for_roll(self, roll: int):
+    def add_yield_for_roll(
+        self, roll: int, include_sources: Optional[bool] = False
+    ) -> Optional[Dict[Player, RollYield]]:
         """Add the resources to the player's hands for the dice roll given.
 
         Args:
             roll: The number that was rolled
+            include_sources: Whether to build and return the RollYields saying where the resources came from.
+                Defaults to False, which skips creating them
+        Returns:
+            The yield provided by Board.get_yield_for_roll if include_sources is True, otherwise None
         """
-        self.add_yield(self.board.get_yield_for_roll(roll))
+        if include_sources:
+            roll_yield = self.board.get_yield_for_roll(roll)
+            self.add_yield(roll_yield)
+            return roll_yield
+
+        for player, resources in self.board.get_yield_totals_for_roll(roll).items():
+            player.add_resources(resources)
+        return None
 
     def add_yield(self, roll_yield: Dict[Player, RollYield]):
         """Add the yield provided to the player's hands.
@@ -170,6 +544,179 @@ class Game:
         for p, y in roll_yield.items():
             p.add_resources(y.total_yield)
 
+    def roll_dice(self) -> int:
+        """Roll the two dice with `dice_rng`.
+
+        Returns:
+            The total of the two dice
+        """
+        refill = self._dice_cursor == len(self._dice)
+        if self._undo_log is not None:
+            self._undo_log.append(
+                (
+                    self._restore_dice,
+                    self._dice,
+                    self._dice_cursor,
+                    self._dice_state,
+                    self.dice_rng.bit_generator.state if refill else None,
+                )
+            )
+        if refill:
+            self._draw_dice()
+        roll = self._dice[self._dice_cursor]
+        self._dice_cursor += 1
+        return roll
+
+    def _draw_dice(self):
+        """Draw the next block of rolls from the dice RNG."""
+        rng = self.dice_rng
+        self._dice_state = rng.bit_generator.state
+        self._dice = rng.integers(1, 7, (_DICE_BLOCK_SIZE, 2), dtype=np.int8).sum(axis=1).tolist()
+        self._dice_cursor = 0
+
+    def _restore_dice(
+        self, dice: List[int], cursor: int, dice_state: Optional[dict], state: Optional[dict]
+    ):
+        self._dice = dice
+        self._dice_cursor = cursor
+        self._dice_state = dice_state
+        if state is not None:
+            self.dice_rng.bit_generator.state = state
+
+    def get_random_state(self) -> bytes:
+        """Encode the positions of the random number generators, which `to_bytes` leaves out.
+
+        Together with `to_bytes`, this is enough to carry on the game with the same rolls, steals and cards as this
+        game would have. Decode with `set_random_state`.
+
+        Returns:
+            The encoded state, a little over 2.5KB long, most of which is the steal RNG's state
+        """
+        if self._dice_state is None:
+            dice = self.dice_rng.bit_generator.state
+        else:
+            dice = self._dice_state
+        _, key, gauss = self._get_rng("_steal_rng").getstate()
+        return b"".join(
+            (
+                _DICE_STATE.pack(self._dice_state is not None, self._dice_cursor),
+                self._pack_pcg64_state(dice),
+                _MT_STATE.pack(*key, gauss is not None, gauss or 0.0),
+                self._pack_pcg64_state(self.deck_rng.bit_generator.state),
+            )
+        )
+
+    def set_random_state(self, data: bytes):
+        """Move the random number generators to the positions encoded by `get_random_state`.
+
+        Args:
+            data: The encoded state
+        Raises:
+            ValueError: If the data is not the size of an encoded state
+        """
+        if len(data) != _DICE_STATE.size + 2 * _PCG64_STATE.size + _MT_STATE.size:
+            raise ValueError("The encoded random state is the wrong size")
+        if self._undo_log is not None:
+            self._undo_log.append((self.set_random_state, self.get_random_state()))
+        drawn, cursor = _DICE_STATE.unpack_from(data)
+        offset = _DICE_STATE.size
+        self.dice_rng.bit_generator.state = self._unpack_pcg64_state(data, offset)
+        offset += _PCG64_STATE.size
+        if drawn:
+            # Draw the block again to get the rest of its rolls
+            self._draw_dice()
+            self._dice_cursor = cursor
+        else:
+            self._dice = []
+            self._dice_cursor = 0
+            self._dice_state = None
+        *key, has_gauss, gauss = _MT_STATE.unpack_from(data, offset)
+        offset += _MT_STATE.size
+        self._get_rng("_steal_rng").setstate((3, tuple(key), gauss if has_gauss else None))
+        self.deck_rng.bit_generator.state = self._unpack_pcg64_state(data, offset)
+
+    @staticmethod
+    def _pack_pcg64_state(state: dict) -> bytes:
+        return _PCG64_STATE.pack(
+            state["state"]["state"].to_bytes(16, "little"),
+            state["state"]["inc"].to_bytes(16, "little"),
+            state["has_uint32"],
+            state["uinteger"],
+        )
+
+    @staticmethod
+    def _unpack_pcg64_state(data: bytes, offset: int) -> dict:
+        state, inc, has_uint32, uinteger = _PCG64_STATE.unpack_from(data, offset)
+        return {
+            "bit_generator": "PCG64",
+            "state": {
+                "state": int.from_bytes(state, "little"),
+                "inc": int.from_bytes(inc, "little"),
+            },
+            "has_uint32": has_uint32,
+            "uinteger": uinteger,
+        }
+
+    @property
+    def open_moves(self) -> int:
+        """How many moves begun with `begin_move` have not been undone or ended yet."""
+        return len(self._move_starts)
+
+    def begin_move(self):
+        """Start recording the changes to the game, so they can be reverted with `undo`.
+
+        Every change made through the game, the board and the players is recorded until the move is undone or ended,
+        including the dice rolled and the cards drawn. Moves can be nested, i.e. to search several moves ahead, with
+        each `undo` reverting the innermost open move. `Board.load_buildings` and the deck's shuffle are not recorded.
+        """
+        if self._undo_log is None:
+            self._set_undo_log([])
+        self._move_starts.append(len(self._undo_log))
+
+    def end_move(self):
+        """Stop recording the innermost open move and keep its changes.
+
+        If there is an enclosing open move, the changes become part of it and are undone with it.
+
+        Raises:
+            IndexError: If there are no open moves
+        """
+        if not self._move_starts:
+            raise IndexError("There are no open moves to end")
+        self._move_starts.pop()
+        if not self._move_starts:
+            self._set_undo_log(None)
+
+    def undo(self):
+        """Revert every change made since the innermost open move began, and close the move.
+
+        The game is left exactly as it was, including the longest road and largest army owners, the Zobrist hash,
+        the development card deck and the position of the random number generators.
+
+        Raises:
+            IndexError: If there are no open moves
+        """
+        if not self._move_starts:
+            raise IndexError("There are no open moves to undo")
+        log = self._undo_log
+        start = self._move_starts.pop()
+        # Undo the changes without recording them
+        self._set_undo_log(None)
+        while len(log) > start:
+            change = log.pop()
+            change[0](*change[1:])
+        if self._move_starts:
+            self._set_undo_log(log)
+
+    def _set_undo_log(self, log: Optional[List[tuple]]):
+        """Give the game, board and players the undo log to record their changes in, or None to stop recording."""
+        self._undo_log = log
+        self.board._undo_log = log
+        for player in self.board.players:
+            player._undo_log = log
+        for player in self.players:
+            player._undo_log = log
+
     def move_robber(self, coords: Coords):
         """Move the robber to the coords specified.
 
@@ -190,17 +737,21 @@ class Game:
             player: The player building the development card
         Raises:
             NotEnoughResourcesError: If the player cannot afford to build a development card
+            IndexError: If there are no cards left in the deck
         Returns:
             The card that the player built and has been added to their hand
         """
-        if not player.has_resources(DevelopmentCard.get_required_resources()):
+        if not player.has_resource_counts(DevelopmentCard.get_required_resource_counts()):
             raise NotEnoughResourcesError(
                 "Player does not have enough resources to build a development card"
             )
 
-        card = self.development_card_deck.pop(0)
-        player.development_cards[card] += 1
-        player.remove_resources(DevelopmentCard.get_required_resources())
+        if self._deck_cursor == len(self._deck):
+            raise IndexError("The development card deck is empty")
+        card = _DEVELOPMENT_CARDS[self._deck[self._deck_cursor]]
+        self._set_deck_cursor(self._deck_cursor + 1)
+        player.add_development_card(card)
+        player.remove_resource_counts(DevelopmentCard.get_required_resource_counts())
         return card
 
     def play_development_card(self, player: Player, card: DevelopmentCard):
@@ -225,7 +776,7 @@ class Game:
             ):
                 self.largest_army_owner = player
 
-    def get_victory_points(self, player: Player):
+    def get_victory_points(self, player: Player) -> int:
         """Get the number of victory points the player has.
 
         Args:
@@ -233,21 +784,33 @@ class Game:
         Returns:
             The number of victory points
         """
-        victory_points = sum(
-            list(
-                map(
-                    lambda c: 2 if c.building.building_type is BuildingType.CITY else 1,
-                    [
-                        c
-                        for c in self.board.intersections.values()
-                        if c.building is not None and c.building.owner is player
-                    ],
-                )
-            )
-        )
-        if player is self.longest_road_owner:
+        index = self.board.get_player_index(player)
+        # A player who isn't on the board has no buildings
+        victory_points = self.board.building_points[index] if index >= 0 else 0
+        if player is self._longest_road_owner:
             victory_points += 2
-        if player is self.largest_army_owner:
+        if player is self._largest_army_owner:
             victory_points += 2
+        return victory_points + player.development_card_counts[DevelopmentCard.VICTORY_POINT.value]
+
+    def victory_points_vector(self) -> np.ndarray:
+        """Get the number of victory points every player has at once.
+
+        Returns:
+            The victory points of each player, in the order of `players`
+        """
+        board = self.board
+        indices = [board.get_player_index(player) for player in self.players]
+        # A player who isn't on the board has no buildings
+        victory_points = np.array(
+            [
+                (board.building_points[index] if index >= 0 else 0)
+                + player.development_card_counts[DevelopmentCard.VICTORY_POINT.value]
+                for index, player in zip(indices, self.players)
+            ]
+        )
+        for owner in (self._longest_road_owner, self._largest_army_owner):
+            if owner is not None and owner in self.players:
+                victory_points[self.players.index(owner)] += 2
+        return victory_points
 
-        return victory_points + player.development_cards[DevelopmentCard.VICTORY_POINT]
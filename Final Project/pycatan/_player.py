@@ -1,25 +1,241 @@
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, MutableMapping, Optional, Sequence, Tuple
+from operator import ge
 import random
 
 from ._resource import Resource
 from .errors import NotEnoughResourcesError
 from ._development_card import DevelopmentCard
+from ._zobrist import get_zobrist_keys
+
+# Counts in the hand are hashed modulo this
+_HASHED_COUNTS = 64
+# The Enum members in the order of their values, which is the order of the count arrays
+_RESOURCES = tuple(Resource)
+_DEVELOPMENT_CARDS = tuple(DevelopmentCard)
+
+_hand_keys: Dict[int, Tuple[List[List[int]], List[List[int]], List[int]]] = {}
+
+
+def _get_hand_keys(seat: int) -> Tuple[List[List[int]], List[List[int]], List[int]]:
+    """Get the Zobrist keys for each count of each resource, development card and played knights for a seat.
+
+    The resource and development card keys are indexed by the Enum value, then the count.
+    """
+    hand_keys = _hand_keys.get(seat)
+    if hand_keys is None:
+        keys = get_zobrist_keys(
+            "hand", (len(Resource) + len(DevelopmentCard) + 1, _HASHED_COUNTS), seat
+        ).tolist()
+        hand_keys = (
+            keys[: len(Resource)],
+            keys[len(Resource) : len(Resource) + len(DevelopmentCard)],
+            keys[-1],
+        )
+        _hand_keys[seat] = hand_keys
+    return hand_keys
+
+
+# The trades available with each set of rates and each set of resources the player has enough of to trade
+_trade_lists: Dict[Tuple[Tuple[int, ...], Tuple[bool, ...]], List[Dict[Resource, int]]] = {}
+
+
+def _get_trade_rates(harbors: frozenset) -> Tuple[int, ...]:
+    """Get how many of each resource a player connected to the harbors given has to give away for one other resource.
+
+    Only the best rate for each resource is used, i.e. a 2:1 harbor replaces the 3:1 or 4:1 trades for its resource.
+    """
+    generic_rate = 3 if any(h.resource is None for h in harbors) else 4
+    two_to_one = {h.resource for h in harbors if h.resource is not None}
+    return tuple(2 if res in two_to_one else generic_rate for res in _RESOURCES)
+
+
+def _get_trades(rates: Tuple[int, ...], affordable: Tuple[bool, ...]) -> List[Dict[Resource, int]]:
+    """Get the trades for the rates given, giving away each resource the player has enough of.
+
+    The trades are listed in the same order as the original implementation, which de-duplicated them through a set of
+    their items, since the environments pick trades by index. That order follows the hashes of the resources, so is only
+    fixed within a process, as it always was. It is worked out once for each set of rates and affordable resources.
+    """
+    key = (rates, affordable)
+    trades = _trade_lists.get(key)
+    if trades is None:
+        # The 2:1 trades were added before the 3:1 or 4:1 ones, which decides the order of items that clash in the set
+        added = [
+            {give: -rate, get: 1}
+            for two_to_one in (True, False)
+            for give, rate, can_afford in zip(_RESOURCES, rates, affordable)
+            if can_afford and (rate == 2) == two_to_one
+            for get in _RESOURCES
+            if get != give
+        ]
+        trades = [dict(t) for t in {tuple(d.items()) for d in added}]
+        _trade_lists[key] = trades
+    return trades
+
+
+class _HandView(MutableMapping):
+    """A dict-style view of one of the count arrays in a player's hand, keyed by the Resource or DevelopmentCard.
+
+    Setting a count through the view keeps the player's `zobrist_hash` up to date.
+
+    Args:
+        counts: The count array, indexed by the Enum value
+        keys: The Zobrist keys for each count
+        members: The Enum members, in the order of their values
+        player: The player whose hand it is
+    """
+
+    __slots__ = ("_counts", "_keys", "_members", "_player")
+
+    def __init__(self, counts: List[int], keys: List[List[int]], members: Tuple, player: "Player"):
+        self._counts = counts
+        self._keys = keys
+        self._members = members
+        self._player = player
+
+    def _get_index(self, key) -> int:
+        """Get the index of a key in the count array, raising KeyError for anything that isn't one of the members."""
+        if not isinstance(key, type(self._members[0])):
+            raise KeyError(key)
+        return key.value
+
+    def __getitem__(self, key) -> int:
+        return self._counts[self._get_index(key)]
+
+    def __setitem__(self, key, count: int):
+        self._player._set_count(self._counts, self._keys, self._get_index(key), count)
+
+    def __delitem__(self, key):
+        raise TypeError("Cannot remove a card type from a hand")
+
+    def __iter__(self) -> Iterator:
+        return iter(self._members)
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __repr__(self) -> str:
+        return repr(dict(zip(self._members, self._counts)))
 
 
 class Player:
     """A Player in a Catan game.
 
+    The resources and development cards should only be changed through the methods below or the dict-style views, so
+    that `zobrist_hash` is kept up to date.
+
+    Args:
+            seat: The player's position in the turn order, which gives them their own Zobrist keys. Defaults to 0
+
     Attributes:
-            resources (Dict[Resource, int]): How many of each resource this player has
-            development_cards (Dict[DevelopmentCard, int]): How many of each development card this player has
+            resource_counts (List[int]): How many of each resource this player has, indexed by the Resource value
+            development_card_counts (List[int]): How many of each development card this player has, indexed by the
+                DevelopmentCard value
+            resources (MutableMapping[Resource, int]): A dict-style view of resource_counts
+            development_cards (MutableMapping[DevelopmentCard, int]): A dict-style view of development_card_counts
             connected_harbors (Set[Harbor]): The harbors this player is connected to. Used to determine the valid trades
+            number_played_knights (int): How many knight cards this player has played
+            zobrist_hash (int): A 64-bit Zobrist hash of the player's hand and played knights
     """
 
-    def __init__(self):
-        self.resources: Dict[Resource, int] = {res: 0 for res in Resource}
-        self.development_cards = {d: 0 for d in DevelopmentCard}
+    __slots__ = (
+        "resource_counts",
+        "development_card_counts",
+        "resources",
+        "development_cards",
+        "connected_harbors",
+        "_trade_harbors",
+        "_trade_rates",
+        "_number_played_knights",
+        "_resource_keys",
+        "_development_card_keys",
+        "_knight_keys",
+        "zobrist_hash",
+        "_undo_log",
+        "__weakref__",
+    )
+
+    def __init__(self, seat: Optional[int] = 0):
+        (
+            self._resource_keys,
+            self._development_card_keys,
+            self._knight_keys,
+        ) = _get_hand_keys(seat)
+        self.resource_counts: List[int] = [0] * len(Resource)
+        self.development_card_counts: List[int] = [0] * len(DevelopmentCard)
+        self.resources: MutableMapping[Resource, int] = _HandView(
+            self.resource_counts, self._resource_keys, _RESOURCES, self
+        )
+        self.development_cards: MutableMapping[DevelopmentCard, int] = _HandView(
+            self.development_card_counts, self._development_card_keys, _DEVELOPMENT_CARDS, self
+        )
         self.connected_harbors = set()
-        self.number_played_knights = 0
+        # The harbors the trade table was last built for
+        self._trade_harbors = frozenset()
+        self._trade_rates = _get_trade_rates(self._trade_harbors)
+        self._number_played_knights = 0
+        # Each count is hashed relative to 0, so an empty hand hashes to 0
+        self.zobrist_hash = 0
+        # Where to record how to undo each change, while a Game has a move open
+        self._undo_log: Optional[List[tuple]] = None
+
+    def clone(self) -> "Player":
+        """Copy the player's hand, played knights and harbors.
+
+        Returns:
+            The copy, which can be changed without changing this player
+        """
+        clone = Player.__new__(Player)
+        clone._resource_keys = self._resource_keys
+        clone._development_card_keys = self._development_card_keys
+        clone._knight_keys = self._knight_keys
+        clone.resource_counts = self.resource_counts[:]
+        clone.development_card_counts = self.development_card_counts[:]
+        clone.resources = _HandView(
+            clone.resource_counts, clone._resource_keys, _RESOURCES, clone
+        )
+        clone.development_cards = _HandView(
+            clone.development_card_counts, clone._development_card_keys, _DEVELOPMENT_CARDS, clone
+        )
+        clone.connected_harbors = set(self.connected_harbors)
+        # The trade table is shared and never changed
+        clone._trade_harbors = self._trade_harbors
+        clone._trade_rates = self._trade_rates
+        clone._number_played_knights = self._number_played_knights
+        clone.zobrist_hash = self.zobrist_hash
+        clone._undo_log = None
+        return clone
+
+    @property
+    def number_played_knights(self) -> int:
+        """How many knight cards this player has played."""
+        return self._number_played_knights
+
+    @number_played_knights.setter
+    def number_played_knights(self, number: int):
+        if self._undo_log is not None:
+            self._undo_log.append(
+                (setattr, self, "number_played_knights", self._number_played_knights)
+            )
+        self._rehash_count(self._knight_keys, self._number_played_knights, number)
+        self._number_played_knights = number
+
+    def _rehash_count(self, keys: List[int], old: int, new: int):
+        """Update the Zobrist hash for a count in the player's hand changing.
+
+        Args:
+            keys: The keys for each value of the count
+            old: The old count
+            new: The new count
+        """
+        self.zobrist_hash ^= keys[old % _HASHED_COUNTS] ^ keys[new % _HASHED_COUNTS]
+
+    def _set_count(self, counts: List[int], keys: List[List[int]], index: int, new: int):
+        """Set one of the counts in the player's hand, updating the Zobrist hash."""
+        if self._undo_log is not None:
+            self._undo_log.append((self._set_count, counts, keys, index, counts[index]))
+        self._rehash_count(keys[index], counts[index], new)
+        counts[index] = new
 
     def has_resources(self, resources: Dict[Resource, int]) -> bool:
         """Check if the player has the resources given.
@@ -30,11 +246,24 @@ class Player:
         Returns:
             bool: True if the player has the resources, false otherwise
         """
+        counts = self.resource_counts
         for res, num in resources.items():
-            if self.resources[res] < num:
+            if counts[res.value] < num:
                 return False
         return True
 
+    def has_resource_counts(self, counts: Sequence[int]) -> bool:
+        """Check if the player has the resources given as a count of each resource.
+
+        Args:
+            counts: How many of each resource to check the player has, indexed by the Resource value, i.e. from
+                `BuildingType.get_required_resource_counts`
+
+        Returns:
+            bool: True if the player has the resources, false otherwise
+        """
+        return all(map(ge, self.resource_counts, counts))
+
     def remove_resources(self, resources: Dict[Resource, int]):
         """Remove the given resources from the player's hand.
 
@@ -49,8 +278,24 @@ class Player:
                 "The player does not have the resources to remove"
             )
 
+        counts = self.resource_counts
         for res, num in resources.items():
-            self.resources[res] -= num
+            self._set_count(counts, self._resource_keys, res.value, counts[res.value] - num)
+
+    def remove_resource_counts(self, counts: Sequence[int]):
+        """Remove the given resources from the player's hand, given as a count of each resource.
+
+        Args:
+            counts: How many of each resource to remove, indexed by the Resource value
+
+        Raises:
+            NotEnoughResourcesError: If the player does not have the resources
+        """
+        if not self.has_resource_counts(counts):
+            raise NotEnoughResourcesError(
+                "The player does not have the resources to remove"
+            )
+        self._add_resource_counts(counts, -1)
 
     def add_resources(self, resources: Dict[Resource, int]):
         """Add some resources to this player's hand.
@@ -58,45 +303,39 @@ class Player:
         Args:
             resources: The resources to add
         """
+        counts = self.resource_counts
         for res, num in resources.items():
-            self.resources[res] += num
+            self._set_count(counts, self._resource_keys, res.value, counts[res.value] + num)
+
+    def add_resource_counts(self, counts: Sequence[int]):
+        """Add some resources to this player's hand, given as a count of each resource.
+
+        Args:
+            counts: How many of each resource to add, indexed by the Resource value
+        """
+        self._add_resource_counts(counts, 1)
+
+    def _add_resource_counts(self, counts: Sequence[int], sign: int):
+        hand = self.resource_counts
+        for i, num in enumerate(counts):
+            if num:
+                self._set_count(hand, self._resource_keys, i, hand[i] + sign * num)
 
     def get_possible_trades(self) -> List[Dict[Resource, int]]:
         """Get a list of the possible trades for this player.
 
+        The trades come in the same order as they always have, so the environments' trade actions are unchanged. The
+        trades are shared between calls, so must not be modified.
+
         Returns:
             The possible trades for this player.
             Negative numbers mean the player would give away those resources, positive numbers mean the player would receive those resources
         """
-        trades = []
-        # Use this map to avoid including a worse deal
-        has_two_to_one = {res: False for res in Resource}
-        # Add 2:1 harbor trades
-        for harbor in self.connected_harbors:
-            # Generic harbors willbe handled with the 4:1 trades
-            if harbor.resource is None:
-                continue
-            has_two_to_one[harbor.resource] = True
-            if self.has_resources({harbor.resource: 2}):
-                for r in Resource:
-                    if r != harbor.resource:
-                        trades.append({harbor.resource: -2, r: 1})
-
-        # Add 3:1 and 4:1 trades
-        has_generic_harbor = (
-            len([h for h in self.connected_harbors if h.resource is None]) != 0
-        )
-        for res in Resource:
-            if has_two_to_one[res]:
-                continue
-            amount = 3 if has_generic_harbor else 4
-            if self.has_resources({res: amount}):
-                # Add the 4-1 trades
-                for r in Resource:
-                    if r != res:
-                        trades.append({res: -amount, r: 1})
-        # Filter out duplicates
-        return [dict(t) for t in {tuple(d.items()) for d in trades}]
+        if self.connected_harbors != self._trade_harbors:
+            self._trade_harbors = frozenset(self.connected_harbors)
+            self._trade_rates = _get_trade_rates(self._trade_harbors)
+        counts = self.resource_counts
+        return _get_trades(self._trade_rates, tuple(counts[i] >= rate for i, rate in enumerate(self._trade_rates)))
 
     def play_development_card(self, card: DevelopmentCard):
         """Mark a development card as played.
@@ -108,24 +347,82 @@ class Player:
         Raises:
             ValueError: If the player does not have the card
         """
-        if self.development_cards[card] < 1:
+        if self.development_card_counts[card.value] < 1:
             raise ValueError(
                 "Cannot play a development card that the player doesn't have!"
             )
-        self.development_cards[card] -= 1
+        self._add_development_cards(card, -1)
+
+    def add_development_card(self, card: DevelopmentCard):
+        """Add a development card to the player's hand.
+
+        Args:
+            card: The card to add
+        """
+        self._add_development_cards(card, 1)
+
+    def _add_development_cards(self, card: DevelopmentCard, amount: int):
+        counts = self.development_card_counts
+        self._set_count(counts, self._development_card_keys, card.value, counts[card.value] + amount)
 
-    def get_random_resource(self) -> Optional[Resource]:
+    def get_random_resource(self, rng: Optional[random.Random] = None) -> Optional[Resource]:
         """Get a random resource from this player.
 
         Weighs the different resources depending on how many the player has in their hand.
         This is equavalent to randomly picking a resource out of the player's hand, i.e. when stealing a card via a knight card or rolling a 7.
 
+        Args:
+            rng: The random number generator to draw with, i.e. the game's. Defaults to the `random` module
+
         Returns:
             The resource, or None if the player has no resources
         """
-        resources = sum([[res] * amount for res, amount in self.resources.items()], [])
-        return (
-            resources[random.randint(0, len(resources) - 1)]
-            if len(resources) > 0
-            else None
-        )
+        total = sum(self.resource_counts)
+        if total == 0:
+            return None
+        # Find the resource the card falls in by counting through the cumulative counts
+        card = (rng or random).randint(0, total - 1)
+        for res, count in zip(_RESOURCES, self.resource_counts):
+            card -= count
+            if card < 0:
+                return res
+
+    def get_random_resource_counts(
+        self, amount: int, rng: Optional[random.Random] = None
+    ) -> List[int]:
+        """Get several random resources from this player at once, without replacement.
+
+        This is equivalent to calling `get_random_resource` and removing the resource from the hand `amount` times, i.e.
+        when discarding half of a hand after a 7 is rolled. The player's hand is not changed.
+
+        Args:
+            amount: How many resources to pick
+            rng: The random number generator to draw with, i.e. the game's. Defaults to the `random` module
+
+        Returns:
+            How many of each resource was picked, indexed by the Resource value. Can be passed straight to
+            `remove_resource_counts`
+
+        Raises:
+            NotEnoughResourcesError: If the player has fewer than `amount` resources
+        """
+        counts = list(self.resource_counts)
+        total = sum(counts)
+        if amount > total:
+            raise NotEnoughResourcesError(
+                "The player does not have %d resources to pick" % amount
+            )
+        randint = (rng or random).randint
+        picked = [0] * len(counts)
+        for _ in range(amount):
+            card = randint(0, total - 1)
+            i = 0
+            card -= counts[0]
+            while card >= 0:
+                i += 1
+                card -= counts[i]
+            counts[i] -= 1
+            picked[i] += 1
+            total -= 1
+        return picked
+
@@ -0,0 +1,305 @@
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import struct
+import zlib
+
+import numpy as np
+
+from ._game import Game
+from .board._board import Board
+from .board._board_topology import BoardTopology
+
+# The binary format used by Replay.to_bytes. Increase the version whenever the format changes
+_REPLAY_MAGIC = b"PCRP"
+_REPLAY_VERSION = 1
+# Magic, version, number of players, values in each action, steps between snapshots (0 for none)
+_REPLAY_HEADER = struct.Struct("<4sBBBI")
+# Size of the seed, size of the layout, number of steps, whether the actions are delta encoded, bytes per encoded action
+# value, number of snapshots
+_REPLAY_BODY = struct.Struct("<BHI?BI")
+# The step a snapshot was taken before, and its size
+_SNAPSHOT_ENTRY = struct.Struct("<II")
+# The sizes of the encoded game and random state at the start of a snapshot
+_SNAPSHOT_SIZES = struct.Struct("<HH")
+
+
+class Replay:
+    """A game recorded as its seed, its board layout and the actions taken in it, with snapshots every few steps.
+
+    The actions are whatever the game was stepped with, i.e. the action triples of the environments, so replaying them
+    needs the code that applied them. Record with `ReplayRecorder`.
+
+    Args:
+        seed: The seed of the game
+        layout: The layout of the board, as encoded by `BoardTopology.to_bytes`
+        num_players: The number of players in the game
+        actions: The actions taken, with one row for each step
+        snapshot_interval: How many steps were taken between snapshots, or None if no snapshots were taken
+        snapshots: The encoded snapshots, keyed by the step they were taken before
+
+    Attributes:
+        seed (int): The seed of the game
+        layout (bytes): The layout of the board, as encoded by `BoardTopology.to_bytes`
+        num_players (int): The number of players in the game
+        actions (np.ndarray): The actions taken, with shape (steps, values in each action)
+        snapshot_interval (Optional[int]): How many steps were taken between snapshots, or None if no snapshots were
+            taken
+        snapshots (Dict[int, bytes]): The encoded snapshots, keyed by the step they were taken before
+    """
+
+    def __init__(
+        self,
+        seed: int,
+        layout: bytes,
+        num_players: int,
+        actions: np.ndarray,
+        snapshot_interval: Optional[int] = None,
+        snapshots: Optional[Dict[int, bytes]] = None,
+    ):
+        self.seed = seed
+        self.layout = layout
+        self.num_players = num_players
+        self.actions = actions
+        self.snapshot_interval = snapshot_interval
+        self.snapshots = {} if snapshots is None else snapshots
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def new_game(self) -> Game:
+        """Start a new game with the recorded seed and layout, the same as the recorded game was started.
+
+        Returns:
+            The new game, which rolls the same dice and draws the same cards as the recorded game when given the same
+            actions
+        """
+        return Game(
+            Board(topology=BoardTopology.from_bytes(self.layout)), self.num_players, self.seed
+        )
+
+    def get_snapshot(self, step: int) -> Tuple[int, Optional[Game], bytes]:
+        """Restore the game from the last snapshot taken before or at a step.
+
+        Args:
+            step: The step to restore the game for
+        Returns:
+            The step the snapshot was taken before, the restored game and the extra state given by the recorder's
+            get_extra_state. If there are no snapshots that early, 0, None and empty bytes, and the game has to be
+            started again with `new_game`
+        """
+        snapshot_step = max((s for s in self.snapshots if s <= step), default=None)
+        if snapshot_step is None:
+            return 0, None, b""
+        data = self.snapshots[snapshot_step]
+        game_size, random_size = _SNAPSHOT_SIZES.unpack_from(data)
+        offset = _SNAPSHOT_SIZES.size
+        game = Game.from_bytes(data[offset:offset + game_size])
+        offset += game_size
+        game.set_random_state(data[offset:offset + random_size])
+        game.seed = self.seed
+        return snapshot_step, game, data[offset + random_size:]
+
+    def to_bytes(self) -> bytes:
+        """Encode the replay in a compact, versioned binary format.
+
+        Each action value is stored as the difference from the value in the step before, so runs of repeated actions
+        become runs of zeros, unless storing the values themselves compresses better. Everything after the header is
+        compressed. Decode with `Replay.from_bytes`.
+
+        Returns:
+            The encoded replay
+        """
+        seed = self.seed.to_bytes((self.seed.bit_length() + 7) // 8, "little")
+        # The differences only help when actions are repeated, and not i.e. for a uniformly random policy
+        delta, width, actions = min(
+            (
+                (delta,) + Replay._encode_actions(self.actions, delta)
+                for delta in (True, False)
+            ),
+            key=lambda encoding: len(zlib.compress(encoding[2])),
+        )
+        body = [
+            _REPLAY_BODY.pack(
+                len(seed), len(self.layout), len(self.actions), delta, width, len(self.snapshots)
+            ),
+            seed,
+            self.layout,
+            actions,
+        ]
+        for step, snapshot in sorted(self.snapshots.items()):
+            body.append(_SNAPSHOT_ENTRY.pack(step, len(snapshot)))
+            body.append(snapshot)
+        return _REPLAY_HEADER.pack(
+            _REPLAY_MAGIC,
+            _REPLAY_VERSION,
+            self.num_players,
+            self.actions.shape[1],
+            self.snapshot_interval or 0,
+        ) + zlib.compress(b"".join(body), 9)
+
+    @staticmethod
+    def from_bytes(data: bytes) -> "Replay":
+        """Decode a replay encoded by `Replay.to_bytes`.
+
+        Args:
+            data: The encoded replay
+        Returns:
+            The decoded replay
+        Raises:
+            ValueError: If the data is not an encoded replay, was encoded with a different version of the format, or is
+                truncated
+        """
+        (
+            magic,
+            version,
+            num_players,
+            action_size,
+            snapshot_interval,
+        ) = _REPLAY_HEADER.unpack_from(data)
+        if magic != _REPLAY_MAGIC:
+            raise ValueError("The data is not an encoded Replay")
+        if version != _REPLAY_VERSION:
+            raise ValueError(
+                "Cannot decode version %d of the Replay format, expected version %d"
+                % (version, _REPLAY_VERSION)
+            )
+        try:
+            body = zlib.decompress(data[_REPLAY_HEADER.size:])
+        except zlib.error:
+            raise ValueError("The encoded Replay is truncated")
+        (
+            seed_size,
+            layout_size,
+            num_steps,
+            delta,
+            width,
+            num_snapshots,
+        ) = _REPLAY_BODY.unpack_from(body)
+        offset = _REPLAY_BODY.size
+        seed = int.from_bytes(body[offset:offset + seed_size], "little")
+        offset += seed_size
+        layout = body[offset:offset + layout_size]
+        offset += layout_size
+        actions_size = num_steps * action_size * width
+        actions = Replay._decode_actions(
+            body[offset:offset + actions_size], num_steps, action_size, delta, width
+        )
+        offset += actions_size
+        snapshots = {}
+        for _ in range(num_snapshots):
+            step, size = _SNAPSHOT_ENTRY.unpack_from(body, offset)
+            offset += _SNAPSHOT_ENTRY.size
+            snapshots[step] = body[offset:offset + size]
+            offset += size
+        return Replay(seed, layout, num_players, actions, snapshot_interval or None, snapshots)
+
+    @staticmethod
+    def _encode_actions(actions: np.ndarray, delta: bool) -> Tuple[int, bytes]:
+        """Encode the actions one value at a time, in the smallest integers they fit in.
+
+        Args:
+            actions: The actions
+            delta: Whether to store the difference from the value in the step before instead of the value
+        Returns:
+            How many bytes each encoded value takes, and the encoded values
+        """
+        values = actions.astype(np.int64)
+        if delta:
+            values = np.diff(values, axis=0, prepend=np.zeros((1, values.shape[1]), np.int64))
+        # Zigzag the values so that small negative ones stay small
+        encoded = ((values << 1) ^ (values >> 63)).view(np.uint64)
+        largest = int(encoded.max(initial=0))
+        width = next(w for w in (1, 2, 4, 8) if largest < 1 << (8 * w))
+        # Each value's column is stored in one run, so its differences are next to each other
+        return width, encoded.T.astype("<u%d" % width).tobytes()
+
+    @staticmethod
+    def _decode_actions(
+        data: bytes, num_steps: int, action_size: int, delta: bool, width: int
+    ) -> np.ndarray:
+        """Decode actions encoded by `_encode_actions`."""
+        if len(data) != num_steps * action_size * width:
+            raise ValueError("The encoded Replay is truncated")
+        encoded = np.frombuffer(data, "<u%d" % width).reshape(action_size, num_steps).T
+        encoded = encoded.astype(np.int64)
+        values = (encoded >> 1) ^ -(encoded & 1)
+        if delta:
+            values = np.cumsum(values, axis=0)
+        return values
+
+
+class ReplayRecorder:
+    """Records the actions taken in a game, to keep it as a `Replay`.
+
+    The game has to be recorded from its start so that it can be started again from its seed and layout. Any setup that
+    isn't done with recorded actions, i.e. placing the starting settlements, has to be done again when replaying.
+
+    Args:
+        game: The game to record
+        action_size: How many values are in each action. Defaults to 3
+        snapshot_interval: How many steps to take between snapshots of the game, so that a replay can be picked up
+            part way through. Defaults to 1024. None takes no snapshots
+        get_extra_state: Encodes the state kept outside of the game that is needed to carry on from a snapshot, i.e.
+            the stage of the turn. Defaults to None
+
+    Raises:
+        ValueError: If the snapshot interval is not positive
+    """
+
+    def __init__(
+        self,
+        game: Game,
+        action_size: Optional[int] = 3,
+        snapshot_interval: Optional[int] = 1024,
+        get_extra_state: Optional[Callable[[], bytes]] = None,
+    ):
+        if snapshot_interval is not None and snapshot_interval <= 0:
+            raise ValueError("snapshot_interval must be positive")
+        self.game = game
+        self.action_size = action_size
+        self.snapshot_interval = snapshot_interval
+        self.get_extra_state = get_extra_state
+        self._seed = game.seed
+        self._layout = game.board.topology.to_bytes()
+        self._actions: List[List[int]] = []
+        self._snapshots: Dict[int, bytes] = {}
+
+    def record(self, action: Sequence[int]):
+        """Record an action, before it is taken.
+
+        Args:
+            action: The action
+        Raises:
+            ValueError: If the action has the wrong number of values
+        """
+        action = [int(a) for a in action]
+        if len(action) != self.action_size:
+            raise ValueError(
+                "Expected an action with %d values, got %d" % (self.action_size, len(action))
+            )
+        step = len(self._actions)
+        if self.snapshot_interval is not None and step > 0 and step % self.snapshot_interval == 0:
+            self._snapshots[step] = self._take_snapshot()
+        self._actions.append(action)
+
+    def _take_snapshot(self) -> bytes:
+        game = self.game.to_bytes()
+        random_state = self.game.get_random_state()
+        extra_state = b"" if self.get_extra_state is None else self.get_extra_state()
+        return b"".join(
+            (_SNAPSHOT_SIZES.pack(len(game), len(random_state)), game, random_state, extra_state)
+        )
+
+    def get_replay(self) -> Replay:
+        """Get the replay of the actions recorded so far.
+
+        Returns:
+            The replay
+        """
+        return Replay(
+            self._seed,
+            self._layout,
+            len(self.game.players),
+            np.array(self._actions, np.int64).reshape(-1, self.action_size),
+            self.snapshot_interval,
+            dict(self._snapshots),
+        )
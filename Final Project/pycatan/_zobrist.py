@@ -0,0 +1,31 @@
+from typing import Dict, Tuple
+import zlib
+
+import numpy as np
+
+_SEED = 0x5EEDCA7A
+
+_tables: Dict[Tuple[str, Tuple[int, ...], int], np.ndarray] = {}
+
+
+def get_zobrist_keys(table: str, shape: Tuple[int, ...], stream: int = 0) -> np.ndarray:
+    """Get a table of random 64-bit keys for Zobrist hashing.
+
+    The keys are generated from a fixed seed, the table's name and the stream, so every process gets the same keys and
+    the hashes can be compared between processes. The tables are shared, so they must not be modified.
+
+    Args:
+        table: The name of the table, i.e. what the keys are for
+        shape: The shape of the table
+        stream: Gives a different table with the same name, i.e. one table for each player. Defaults to 0
+    Returns:
+        An array of uint64 keys with the shape given
+    """
+    key = (table, tuple(shape), stream)
+    keys = _tables.get(key)
+    if keys is None:
+        rng = np.random.default_rng([_SEED, zlib.crc32(table.encode()), stream])
+        keys = rng.integers(0, 2**64, size=shape, dtype=np.uint64)
+        keys.flags.writeable = False
+        _tables[key] = keys
+    return keys
@@ -1,7 +1,10 @@
 """Submodule that is used to hold the board state."""
 
 from ._board import Board
+from ._board_topology import BoardTopology
 from ._board_renderer import BoardRenderer
+from ._board_raster_renderer import BoardRasterRenderer
+from ._board_stream_renderer import BoardStreamRenderer
 from ._beginner_board import BeginnerBoard
 from ._building import Building, PathBuilding, IntersectionBuilding
 from ._building_type import BuildingType
@@ -11,11 +14,15 @@ from ._hex import Hex
 from ._hex_type import HexType
 from ._intersection import Intersection
 from ._path import Path
-from ._random_board import RandomBoard
+from ._random_board import RandomBoard, RandomBoardLayouts, BoardConstraints
+from ._board_analyzer import BoardAnalyzer, BoardStatistics
 
 __all__ = [
     "Board",
+    "BoardTopology",
     "BoardRenderer",
+    "BoardRasterRenderer",
+    "BoardStreamRenderer",
     "BeginnerBoard",
     "Building",
     "PathBuilding",
@@ -28,4 +35,8 @@ __all__ = [
     "Intersection",
     "Path",
     "RandomBoard",
+    "RandomBoardLayouts",
+    "BoardConstraints",
+    "BoardAnalyzer",
+    "BoardStatistics",
 ]
@@ -1,4 +1,5 @@
 from ._board import Board
+from ._board_topology import BoardTopology
 from ._hex import Hex
 from ._coords import Coords
 from ._hex_type import HexType
@@ -9,8 +10,17 @@ from .._resource import Resource
 class BeginnerBoard(Board):
     """The beginner board, as outlined in the Catan rules."""
 
+    _topology = None
+
     def __init__(self):
-        super().__init__(
+        # The layout never changes, so only build its topology once
+        if BeginnerBoard._topology is None:
+            BeginnerBoard._topology = BeginnerBoard._build_topology()
+        super().__init__(topology=BeginnerBoard._topology)
+
+    @staticmethod
+    def _build_topology() -> BoardTopology:
+        return BoardTopology.get(
             hexes={
                 Hex(Coords(4, -2), HexType.MOUNTAINS, 10),
                 Hex(Coords(3, 0), HexType.PASTURE, 2),
@@ -1,16 +1,30 @@
-from typing import Dict, Set, Optional, FrozenSet
-from itertools import product
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Set,
+    Optional,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    Sequence,
+    Mapping,
+    Tuple,
+    TypeVar,
+)
+
+import numpy as np
 
+from ._board_topology import BoardTopology
 from ._coords import Coords
 from ._hex import Hex
-from ._hex_type import HexType
 from ._intersection import Intersection
 from ._path import Path
 from .._player import Player
-from ._building import IntersectionBuilding, PathBuilding
 from ._harbor import Harbor
 from ._building_type import BuildingType
 from .._resource import Resource
+from .._zobrist import get_zobrist_keys
 from ..errors import (
     InvalidCoordsError,
     TooCloseToBuildingError,
@@ -21,6 +35,52 @@ from ..errors import (
 from .._roll_yield import RollYield, RollYieldSource
 
 
+_NUM_BUILDING_TYPES = len(BuildingType)
+_RESOURCES = list(Resource)
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class _Views(Mapping[K, V]):
+    """A read-only mapping from coordinates to the views over a board's arrays, creating each view on first use.
+
+    Args:
+        indices: The index of each key in the board's arrays
+        create: Creates the view for an index
+    """
+
+    def __init__(self, indices: Dict[K, int], create: Callable[[int], V]):
+        self._indices = indices
+        self._create = create
+        self._views: List[Optional[V]] = [None] * len(indices)
+
+    def view(self, index: int) -> V:
+        """Get the view for the index given.
+
+        Args:
+            index: The index in the board's arrays
+        Returns:
+            The view
+        """
+        view = self._views[index]
+        if view is None:
+            view = self._views[index] = self._create(index)
+        return view
+
+    def __getitem__(self, key: K) -> V:
+        return self.view(self._indices[key])
+
+    def __contains__(self, key) -> bool:
+        return key in self._indices
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self._indices)
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+
 class Board:
     """An interface for holding the state of Catan boards.
 
@@ -29,6 +89,11 @@ class Board:
     generate the intersections and paths from a dict of hexes,
     assuming all the hexes tile correctly.
 
+    The hexes, intersections and paths are numbered densely (sorted by their coordinates), and the buildings are
+    stored in NumPy arrays indexed by those numbers. The Coords-based API is a view over those arrays. Everything
+    that does not change during a game is kept in a BoardTopology shared by all boards with the same layout, so the
+    board itself only holds the buildings and the robber.
+
     Args:
                     hexes:
                         The hexes on the board, keyed by their coordinates
@@ -37,51 +102,224 @@ class Board:
                     robber:
                         The inital coordinates of the robber. If None, then will automatically place the robber on the first
                         desert hex it can find, and raise an error if there are non
+                    topology:
+                        The topology to use instead of building one from hexes and harbors
 
     Attributes:
+                    topology (BoardTopology):
+                        The static layout of the board, shared with other boards with the same layout
                     hexes (Dict[Coord, Hex]):
                         The hexes on this catan board, keyed by their coordinates
-                    intersections: (Dict[Coords, Intersection]):
+                    intersections: (Mapping[Coords, Intersection]):
                         The intersections on the board, keyed by their coordinates
-                    paths (Dict[frozenset[Coords], Path]):
+                    paths (Mapping[frozenset[Coords], Path]):
                         The paths on the board, keyed by the coordinates of the two intersections they connect
                     harbors (Dict[frozenset[Coords], Harbor]):
                         The harbors on the board, keyed by the coords of the path they are attached to
                     robber (Set[Coords]): The location of the robber
+                    hex_coords (Tuple[Coords]):
+                        The coordinates of the hexes, in index order
+                    intersection_coords (Tuple[Coords]):
+                        The coordinates of the intersections, in index order
+                    path_coords (Tuple[frozenset[Coords]]):
+                        The coordinates of the paths, in index order
+                    hex_indices (Dict[Coords, int]):
+                        The index of each hex, keyed by its coordinates
+                    intersection_indices (Dict[Coords, int]):
+                        The index of each intersection, keyed by its coordinates
+                    path_indices (Dict[frozenset[Coords], int]):
+                        The index of each path, keyed by its coordinates
+                    players (List[Player]):
+                        The players on this board, in the order of the indices used in the owner arrays
+                    intersection_owners (np.ndarray):
+                        The index of the player who owns the building on each intersection, or -1 if it is empty
+                    intersection_types (np.ndarray):
+                        The BuildingType value of the building on each intersection, or -1 if it is empty
+                    path_owners (np.ndarray):
+                        The index of the player who owns the building on each path, or -1 if it is empty
+                    path_types (np.ndarray):
+                        The BuildingType value of the building on each path, or -1 if it is empty
+                    hex_building_counts (np.ndarray):
+                        The number of buildings each player has around each hex, with shape (hexes, players)
+                    building_points (List[int]):
+                        The victory points each player has from their settlements and cities, in the order of `players`
+                    zobrist_hash (int):
+                        A 64-bit Zobrist hash of the buildings and the robber
     """
 
     def __init__(
-        self, hexes: Set[Hex], harbors: Optional[Set[Harbor]] = None, robber: Coords = None
+        self,
+        hexes: Optional[Set[Hex]] = None,
+        harbors: Optional[Set[Harbor]] = None,
+        robber: Coords = None,
+        topology: Optional[BoardTopology] = None,
     ):
-        if harbors is None:
-            harbors = set()
-        self.hexes: Dict[Coords, Hex] = dict(zip((h.coords for h in hexes), hexes))
-        self.harbors = {frozenset(h.path_coords): h for h in harbors}
+        # The static parts of the board are shared between every board with the same layout
+        if topology is None:
+            topology = BoardTopology.get(hexes, harbors)
+        self.topology = topology
+        self.hexes = self.topology.hexes
+        self.harbors = self.topology.harbors
         # Position the robber on the desert
         if robber:
-            self.robber = robber
+            self._robber = robber
+        elif self.topology.desert is not None:
+            self._robber = self.topology.desert
         else:
-            self.robber = [
-                h.coords for h in self.hexes.values() if h.hex_type == HexType.DESERT
-            ][0]
-        # Gather the points around each hex into a set
-        intersection_coords = set(
-            map(
-                lambda x: x[0] + x[1],
-                list(product(*[self.hexes.keys(), Hex.CONNECTED_CORNER_OFFSETS])),
-            )
+            raise ValueError("There is no desert hex to place the robber on")
+        self.hex_coords = self.topology.hex_coords
+        self.hex_indices = self.topology.hex_indices
+        self.intersection_coords = self.topology.intersection_coords
+        self.intersection_indices = self.topology.intersection_indices
+        self.path_coords = self.topology.path_coords
+        self.path_indices = self.topology.path_indices
+        self._path_ends = self.topology.path_ends
+        self._intersection_paths = self.topology.intersection_paths
+        self._intersection_neighbors = self.topology.intersection_neighbors
+        self._intersection_hexes = self.topology.intersection_hexes
+        self._hex_intersections = self.topology.hex_intersections
+        self._intersection_harbors = self.topology.intersection_harbors
+        self._roll_sources = self.topology.roll_sources
+        # The buildings on the board
+        self.players: List[Player] = []
+        self._player_indices: Dict[Player, int] = {}
+        self.intersection_owners = np.full(len(self.intersection_coords), -1, np.int8)
+        self.intersection_types = np.full(len(self.intersection_coords), -1, np.int8)
+        self.path_owners = np.full(len(self.path_coords), -1, np.int8)
+        self.path_types = np.full(len(self.path_coords), -1, np.int8)
+        # Who can be stolen from on each hex. Gets a column for each player as they are added
+        self.hex_building_counts = np.zeros((len(self.hex_coords), 0), np.int8)
+        self.building_points: List[int] = []
+        # The Zobrist hash of the board under each of the layout's symmetries, starting with the identity. Each player
+        # gets their own keys as they are added
+        self._intersection_keys: List[np.ndarray] = []
+        self._path_keys: List[np.ndarray] = []
+        self._robber_keys = get_zobrist_keys("robber", (len(self.hex_coords),))
+        self._zobrist_hashes: np.ndarray = self._robber_keys[
+            self.topology.hex_symmetries[:, self.hex_indices[self._robber]]
+        ]
+        # The Coords-based views over the arrays, only created when they are used
+        self.intersections: _Views[Coords, Intersection] = _Views(
+            self.intersection_indices, self._create_intersection_view
         )
-        # Add the intersections to self.intersections
-        self.intersections = {}
-        for coords in intersection_coords:
-            self.intersections[coords] = Intersection(coords)
-        # Now add all the edgges inbetween the intersections we just added
-        self.paths = {}
-        for c in self.intersections:
-            for offset in Intersection.CONNECTED_CORNER_OFFSETS:
-                coord = c + offset
-                if coord in self.intersections:
-                    self.paths[frozenset([c, c + offset])] = Path(set([c, c + offset]))
+        self.paths: _Views[FrozenSet[Coords], Path] = _Views(
+            self.path_indices, self._create_path_view
+        )
+        # What each player receives for each roll, kept up to date as buildings are added and the robber moves
+        self._roll_totals: Dict[int, Dict[Player, Dict[Resource, int]]] = {
+            roll: {} for roll in self._roll_sources
+        }
+        self._longest_roads: Dict[Player, int] = {}
+        # The legal building locations, keyed by player (or None when not checking for connection to the player's
+        # buildings). Computed on the first query for each player and then updated around each new building
+        self._legal_placements: Dict[Optional[Player], Dict[BuildingType, Set]] = {}
+        self._frozen_placements: Dict[
+            Tuple[Optional[Player], BuildingType], FrozenSet
+        ] = {}
+        # Where to record how to undo each change, while a Game has a move open
+        self._undo_log: Optional[List[tuple]] = None
+
+    def _create_intersection_view(self, index: int) -> Intersection:
+        return Intersection(self.intersection_coords[index], self, index)
+
+    def _create_path_view(self, index: int) -> Path:
+        return Path(set(self.path_coords[index]), self, index)
+
+    def get_player_index(self, player: Player) -> int:
+        """Get the index used for the player in the owner arrays.
+
+        Args:
+            player: The player
+        Returns:
+            The player's index in `players`, or -1 if the player hasn't been added to the board
+        """
+        return self._player_indices.get(player, -1)
+
+    def _get_owner(self, player: Player) -> int:
+        """Get the index to compare the owner arrays with for the player.
+
+        Returns:
+            The player's index in `players`, or an index that owns nothing if the player hasn't been added to the board
+        """
+        return self._player_indices.get(player, len(self.players))
+
+    def add_player(self, player: Player) -> int:
+        """Add the player to the board, giving them the next index in the owner arrays if they don't have one.
+
+        Players are added when they first build, so this is only needed to fix their index beforehand, i.e. so that it
+        matches their seat in a game.
+
+        Args:
+            player: The player
+        Returns:
+            The player's index in `players`
+        """
+        index = self._player_indices.get(player)
+        if index is None:
+            index = len(self.players)
+            self.players.append(player)
+            self._player_indices[player] = index
+            self.hex_building_counts = np.concatenate(
+                (self.hex_building_counts, np.zeros((len(self.hex_coords), 1), np.int8)), axis=1
+            )
+            self.building_points.append(0)
+            self._intersection_keys.append(
+                get_zobrist_keys(
+                    "intersection", (len(self.intersection_coords), _NUM_BUILDING_TYPES), index
+                )
+            )
+            self._path_keys.append(
+                get_zobrist_keys("path", (len(self.path_coords), _NUM_BUILDING_TYPES), index)
+            )
+        return index
+
+    @property
+    def zobrist_hash(self) -> int:
+        """A 64-bit Zobrist hash of the buildings and the robber, updated as they change.
+
+        Boards with the same layout, buildings and robber have the same hash, whichever Player objects own the buildings.
+        """
+        return int(self._zobrist_hashes[0])
+
+    @property
+    def symmetric_zobrist_hashes(self) -> np.ndarray:
+        """The Zobrist hash of the board after each of the symmetries in `topology`, starting with `zobrist_hash`.
+
+        The smallest of these is the same for two boards if one is a rotation or reflection of the other.
+        """
+        return self._zobrist_hashes.copy()
+
+    @property
+    def robber(self) -> Coords:
+        """The coordinates of the hex the robber is on."""
+        return self._robber
+
+    @robber.setter
+    def robber(self, coords: Coords):
+        if self._undo_log is not None:
+            self._undo_log.append((self._move_robber, self._robber))
+        self._move_robber(coords)
+
+    def _move_robber(self, coords: Coords):
+        symmetries = self.topology.hex_symmetries
+        self._zobrist_hashes ^= self._robber_keys[symmetries[:, self.hex_indices[self._robber]]]
+        self._zobrist_hashes ^= self._robber_keys[symmetries[:, self.hex_indices[coords]]]
+        self._update_hex_roll_totals(self._robber, 1)
+        self._robber = coords
+        self._update_hex_roll_totals(self._robber, -1)
+
+    @property
+    def robber_destinations(self) -> Tuple[Coords, ...]:
+        """The coordinates of the hexes the robber can be moved to (every hex except the robber's), in index order."""
+        return self.topology.other_hex_coords[self.hex_indices[self._robber]]
+
+    @property
+    def robber_destination_indices(self) -> np.ndarray:
+        """The indices of the hexes the robber can be moved to, in the same order as `robber_destinations`.
+
+        Can be used to score every destination at once, e.g. `board.hex_building_counts[board.robber_destination_indices]`
+        """
+        return self.topology.other_hex_indices[self.hex_indices[self._robber]]
 
     def add_path_building(
         self,
@@ -118,10 +356,197 @@ class Board:
             self.assert_valid_road_coords(player, path_coords, ensure_connected)
 
         # Add the building
-        self.paths[frozenset(path_coords)].building = PathBuilding(
-            player, path_coords=path_coords, building_type=building_type
+        index = self.path_indices[frozenset(path_coords)]
+        owner = self.add_player(player)
+        if self._undo_log is not None:
+            self._undo_log.append(
+                (
+                    self._undo_path_building,
+                    index,
+                    self._zobrist_hashes.copy(),
+                    self._longest_roads.get(player),
+                )
+            )
+        self._zobrist_hashes ^= self._path_keys[owner][
+            self.topology.path_symmetries[:, index], building_type.value
+        ]
+        self.path_owners[index] = owner
+        self.path_types[index] = building_type.value
+        self._longest_roads.pop(player, None)
+        ends = self._path_ends[index]
+        self._refresh_legal_placements(
+            intersection_indices=ends,
+            path_indices=[p for i in ends for p in self._intersection_paths[i]],
         )
 
+    def _undo_path_building(
+        self, index: int, zobrist_hashes: np.ndarray, longest_road: Optional[int]
+    ):
+        """Remove the building from a path, as recorded by `add_path_building`.
+
+        Args:
+            index: The index of the path
+            zobrist_hashes: The Zobrist hashes from before the building was added
+            longest_road: The owner's cached longest road from before the building was added, or None
+        """
+        player = self.players[self.path_owners[index]]
+        self.path_owners[index] = -1
+        self.path_types[index] = -1
+        self._zobrist_hashes = zobrist_hashes
+        if longest_road is None:
+            self._longest_roads.pop(player, None)
+        else:
+            self._longest_roads[player] = longest_road
+
+    def _undo_intersection_building(
+        self,
+        index: int,
+        zobrist_hashes: np.ndarray,
+        longest_roads: Dict[Player, int],
+        harbors: List[Harbor],
+    ):
+        """Remove a building from an intersection, or turn a city back into a settlement, as recorded by
+        `add_intersection_building`.
+
+        Args:
+            index: The index of the intersection
+            zobrist_hashes: The Zobrist hashes from before the building was added
+            longest_roads: The cached longest roads from before the building was added
+            harbors: The harbors the owner was connected to by the building
+        """
+        owner = int(self.intersection_owners[index])
+        player = self.players[owner]
+        self._update_intersection_roll_totals(player, index, -1)
+        if self.intersection_types[index] == BuildingType.CITY.value:
+            self.intersection_types[index] = BuildingType.SETTLEMENT.value
+        else:
+            self.hex_building_counts[self._intersection_hexes[index], owner] -= 1
+            self.intersection_owners[index] = -1
+            self.intersection_types[index] = -1
+        self.building_points[owner] -= 1
+        self._zobrist_hashes = zobrist_hashes
+        self._longest_roads = longest_roads
+        player.connected_harbors.difference_update(harbors)
+
+    def clone(self, players: Optional[Sequence[Player]] = None) -> "Board":
+        """Copy the buildings and the robber, sharing the static layout with this board.
+
+        Args:
+            players: The players to own the buildings on the copy, in the order of `players`, i.e. copies of the
+                players. Defaults to None, which keeps the same players
+        Returns:
+            The copy, which can be changed without changing this board
+        """
+        clone = object.__new__(type(self))
+        # Everything that isn't replaced below is static, so is shared
+        clone.__dict__.update(self.__dict__)
+        if players is None:
+            players = self.players
+        swap = dict(zip(self.players, players))
+        swap[None] = None
+        clone.players = list(players)
+        clone._player_indices = {player: i for i, player in enumerate(clone.players)}
+        clone.intersection_owners = self.intersection_owners.copy()
+        clone.intersection_types = self.intersection_types.copy()
+        clone.path_owners = self.path_owners.copy()
+        clone.path_types = self.path_types.copy()
+        clone.hex_building_counts = self.hex_building_counts.copy()
+        clone.building_points = self.building_points[:]
+        clone._intersection_keys = self._intersection_keys[:]
+        clone._path_keys = self._path_keys[:]
+        clone._zobrist_hashes = self._zobrist_hashes.copy()
+        clone.intersections = _Views(self.intersection_indices, clone._create_intersection_view)
+        clone.paths = _Views(self.path_indices, clone._create_path_view)
+        clone._roll_totals = {
+            roll: {swap[player]: dict(resources) for player, resources in totals.items()}
+            for roll, totals in self._roll_totals.items()
+        }
+        clone._longest_roads = {swap[player]: length for player, length in self._longest_roads.items()}
+        clone._legal_placements = {
+            swap[player]: {building_type: set(s) for building_type, s in placements.items()}
+            for player, placements in self._legal_placements.items()
+        }
+        # Cheaper to freeze the placements again when they are next asked for than to copy
+        clone._frozen_placements = {}
+        clone._undo_log = None
+        return clone
+
+    def load_buildings(
+        self,
+        intersection_owners: np.ndarray,
+        intersection_types: np.ndarray,
+        path_owners: np.ndarray,
+        path_types: np.ndarray,
+    ):
+        """Replace every building on the board, i.e. when restoring a saved state.
+
+        The owners are indices into `players`, so the players must already have been added with `add_player`.
+        Does not check that the buildings are in valid locations.
+
+        Args:
+            intersection_owners: The new `intersection_owners`
+            intersection_types: The new `intersection_types`
+            path_owners: The new `path_owners`
+            path_types: The new `path_types`
+        """
+        self.intersection_owners[:] = intersection_owners
+        self.intersection_types[:] = intersection_types
+        self.path_owners[:] = path_owners
+        self.path_types[:] = path_types
+        # Rebuild everything that is kept up to date as buildings are added
+        self._rebuild_roll_totals()
+        # The BuildingType values of settlements and cities are also the victory points they are worth
+        owned = self.intersection_owners >= 0
+        self.building_points = np.bincount(
+            self.intersection_owners[owned],
+            weights=self.intersection_types[owned],
+            minlength=len(self.players),
+        ).astype(int).tolist()
+        self._longest_roads.clear()
+        self._legal_placements.clear()
+        self._frozen_placements.clear()
+        self._zobrist_hashes = self._robber_keys[
+            self.topology.hex_symmetries[:, self.hex_indices[self._robber]]
+        ]
+        for owner, player in enumerate(self.players):
+            intersections = np.flatnonzero(self.intersection_owners == owner)
+            paths = np.flatnonzero(self.path_owners == owner)
+            self._zobrist_hashes ^= np.bitwise_xor.reduce(
+                self._intersection_keys[owner][
+                    self.topology.intersection_symmetries[:, intersections],
+                    self.intersection_types[intersections],
+                ],
+                axis=1,
+            )
+            self._zobrist_hashes ^= np.bitwise_xor.reduce(
+                self._path_keys[owner][
+                    self.topology.path_symmetries[:, paths], self.path_types[paths]
+                ],
+                axis=1,
+            )
+            intersections = intersections.tolist()
+            self.hex_building_counts[:, owner] = np.bincount(
+                [h for i in intersections for h in self._intersection_hexes[i]],
+                minlength=len(self.hex_coords),
+            )
+            for i in intersections:
+                player.connected_harbors.update(self._intersection_harbors[i])
+
+    def _rebuild_roll_totals(self):
+        """Work out what each player receives for each roll from scratch."""
+        owners = self.intersection_owners.tolist()
+        types = self.intersection_types.tolist()
+        self._roll_totals = {roll: {} for roll in self._roll_sources}
+        for roll, sources in self._roll_sources.items():
+            totals = self._roll_totals[roll]
+            for i, hex, resource in sources:
+                if owners[i] < 0 or hex.coords == self._robber:
+                    continue
+                player = self.players[owners[i]]
+                if player not in totals:
+                    totals[player] = dict.fromkeys(_RESOURCES, 0)
+                totals[player][resource] += 2 if types[i] == BuildingType.CITY.value else 1
+
     def assert_valid_road_coords(
         self,
         player: Player,
@@ -134,41 +559,16 @@ class Board:
             player: The player
             path_coords: The coordinates of the two intersections connected by the path
             ensure_connected: Whether to assert that the path is connected to the player's existing roads or settlements
+        Raises:
+            CoordsBlockedError: If there is already a building on the path
+            NotConnectedError: If ensure_connected is True and the path is not connected to the player's buildings
         """
-        path: Path = self.paths[frozenset(path_coords)]
-        if path.building is not None:
-            raise CoordsBlockedError("There is already a building on this path")
-
-        if ensure_connected:
-            # Check if it's connected to a intersection building
-            valid_buildings = set(
-                filter(
-                    lambda b: b is not None and b.owner is player,
-                    map(lambda c: self.intersections[c].building, path_coords),
-                )
-            )
-            if len(valid_buildings) == 0:
-                # Check if it's connected to another path building
-                paths_connected = set()
-                for coords in path_coords:
-                    for c in self.get_intersection_connected_intersections(
-                        self.intersections[coords]
-                    ):
-                        connected_path = self.paths[frozenset({coords, c.coords})]
-                        # Check if there is an path building (i.e. a road) to be connected to here
-                        if (
-                            connected_path.building is not None
-                            and connected_path.building.owner is player
-                        ):
-                            # Checks that we aren't going through an enemy building to be connected
-                            building = self.intersections[coords].building
-                            if building is None or building.owner is player:
-                                paths_connected.add(path)
-
-                if len(paths_connected) == 0:
-                    raise NotConnectedError(
-                        "Road is not connected to any other building"
-                    )
+        index = self.path_indices[frozenset(path_coords)]
+        owner = self._get_owner(player) if ensure_connected else -1
+        if not self._is_valid_road_index(index, owner):
+            if self.path_owners[index] >= 0:
+                raise CoordsBlockedError("There is already a building on this path")
+            raise NotConnectedError("Road is not connected to any other building")
 
     def add_intersection_building(
         self,
@@ -198,13 +598,44 @@ class Board:
                 % building_type
             )
 
-        self.intersections[coords].building = IntersectionBuilding(
-            player, building_type, coords
+        index = self.intersection_indices[coords]
+        owner = self.add_player(player)
+        if self._undo_log is not None:
+            self._undo_log.append(
+                (
+                    self._undo_intersection_building,
+                    index,
+                    self._zobrist_hashes.copy(),
+                    dict(self._longest_roads),
+                    [h for h in self._intersection_harbors[index] if h not in player.connected_harbors],
+                )
+            )
+        symmetries = self.topology.intersection_symmetries[:, index]
+        keys = self._intersection_keys[owner]
+        # A city replaces the settlement
+        if self.intersection_types[index] >= 0:
+            self._zobrist_hashes ^= keys[symmetries, self.intersection_types[index]]
+        self._zobrist_hashes ^= keys[symmetries, building_type.value]
+        self.intersection_owners[index] = owner
+        self.intersection_types[index] = building_type.value
+        # A settlement is worth one point, and a city one more than the settlement it replaces
+        self.building_points[owner] += 1
+        # A city replaces a settlement, so only yields one more of each resource
+        self._update_intersection_roll_totals(player, index, 1)
+        if building_type == BuildingType.SETTLEMENT:
+            self.hex_building_counts[self._intersection_hexes[index], owner] += 1
+        # A settlement breaks any other player's road that goes through it
+        for p in self._intersection_paths[index]:
+            if self.path_owners[p] >= 0 and self.path_owners[p] != owner:
+                self._longest_roads.pop(self.players[self.path_owners[p]], None)
+        self._refresh_legal_placements(
+            intersection_indices=(index,) + self._intersection_neighbors[index],
+            path_indices=self._intersection_paths[index],
         )
 
         # Connect the player to a harbor if they can
-        for harbor in self.harbors.values():
-            if coords in harbor.path_coords and harbor not in player.connected_harbors:
+        for harbor in self._intersection_harbors[index]:
+            if harbor not in player.connected_harbors:
                 player.connected_harbors.add(harbor)
 
     def assert_valid_settlement_coords(
@@ -219,45 +650,24 @@ class Board:
             player: The player building the settlement
             ensure_connected: Whether the check if the settlement will be connected by road
         Raises:
+            InvalidCoordsError: If the coordinates are not an intersection
+            CoordsBlockedError: If the position is already taken
             TooCloseToBuildingError: If the building is too close to another building
-            PositionAlreadyTakenError: If the position is already taken
             NotConnectedError: If `check_connection` is `True` and the settlement is not connected
         """
-        # Check that the coords are referencing a intersection
-        if coords not in self.intersections:
+        if self.is_valid_settlement_coords(player, coords, ensure_connected):
+            return
+        # Work out why the location is not valid
+        index = self.intersection_indices.get(coords)
+        if index is None:
             raise InvalidCoordsError("coords must be the coordinates of a intersection")
-        # Check that the intersection is empty
-        if self.intersections[coords].building is not None:
+        if self.intersection_owners[index] >= 0:
             raise CoordsBlockedError("There is already a building on this intersection")
-        # Check that the surrounding intersections are empty
-        connected_intersections: Set[
-            Intersection
-        ] = self.get_intersection_connected_intersections(self.intersections[coords])
-        if (
-            len(set(filter(lambda c: c.building is not None, connected_intersections)))
-            > 0
-        ):
+        if not self._is_clear_of_buildings(index):
             raise TooCloseToBuildingError(
                 "There is a building that is not at least 2 paths away from this position"
             )
-        if ensure_connected:
-            path_coords = set(
-                map(lambda c: frozenset({coords, c.coords}), connected_intersections)
-            )
-            paths = set(map(lambda e: self.paths[e], path_coords))
-            if (
-                len(
-                    set(
-                        filter(
-                            lambda path: path.building is not None
-                            and path.building.owner is player,
-                            paths,
-                        )
-                    )
-                )
-                == 0
-            ):
-                raise NotConnectedError("The settlement must be connected by road")
+        raise NotConnectedError("The settlement must be connected by road")
 
     def assert_valid_city_coords(self, player: Player, coords: Coords):
         """Check whether the coordinates given are a valid place to build a city by the player given.
@@ -265,20 +675,17 @@ class Board:
         Args:
             player: The player building the city
             coords: Where to build the city
+        Raises:
+            InvalidCoordsError: If the coordinates are not an intersection
+            RequiresSettlementError: If the player does not have a settlement at the coordinates
         """
-        # Check the coords are a intersection
-        if coords not in self.intersections.keys():
+        if self.is_valid_city_coords(player, coords):
+            return
+        if coords not in self.intersection_indices:
             raise InvalidCoordsError("coords must be the coordinates of a intersection")
-        # Check that a settlement owned by player exists here
-        if (
-            self.intersections[coords].building is None
-            or self.intersections[coords].building.owner is not player
-            or self.intersections[coords].building.building_type
-            is not BuildingType.SETTLEMENT
-        ):
-            raise RequiresSettlementError(
-                "You must update an existing settlement owned by the player into a city"
-            )
+        raise RequiresSettlementError(
+            "You must update an existing settlement owned by the player into a city"
+        )
 
     def is_valid_settlement_coords(
         self, player: Player, coords: Coords, ensure_connected: Optional[bool]
@@ -292,13 +699,11 @@ class Board:
         Returns:
             Whether the coordinates are a valid settlement location for the player
         """
-        try:
-            self.assert_valid_settlement_coords(
-                player=player, coords=coords, ensure_connected=ensure_connected
-            )
-        except:  # noqa: E722
+        index = self.intersection_indices.get(coords)
+        if index is None:
             return False
-        return True
+        owner = self._get_owner(player) if ensure_connected else -1
+        return self._is_valid_settlement_index(index, owner)
 
     def is_valid_city_coords(self, player: Player, coords: Coords) -> bool:
         """Check whether the coordinates given are valid city coordinates.
@@ -309,11 +714,10 @@ class Board:
         Returns:
             Whether the coords are a valid place for the player to build a city
         """
-        try:
-            self.assert_valid_city_coords(player=player, coords=coords)
-        except:  # noqa: E722
+        index = self.intersection_indices.get(coords)
+        if index is None:
             return False
-        return True
+        return self._is_valid_city_index(index, self._get_owner(player))
 
     def is_valid_road_coords(
         self,
@@ -330,17 +734,90 @@ class Board:
         Returns:
             Whether the player can build a road on this path
         """
-        try:
-            self.assert_valid_road_coords(
-                player, path_coords, ensure_connected=ensure_connected
-            )
-        except:  # noqa: E722
+        index = self.path_indices.get(frozenset(path_coords))
+        if index is None:
             return False
+        owner = self._get_owner(player) if ensure_connected else -1
+        return self._is_valid_road_index(index, owner)
+
+    def _is_clear_of_buildings(self, index: int) -> bool:
+        """Check whether an intersection and the intersections next to it are empty.
+
+        Args:
+            index: The index of the intersection
+        Returns:
+            Whether there are no buildings on or next to the intersection
+        """
+        owners = self.intersection_owners
+        if owners[index] >= 0:
+            return False
+        for i in self._intersection_neighbors[index]:
+            if owners[i] >= 0:
+                return False
         return True
 
+    def _is_valid_settlement_index(self, index: int, owner: int) -> bool:
+        """Check whether a settlement can be built on an intersection.
+
+        Args:
+            index: The index of the intersection
+            owner: The index of the player building the settlement, or -1 to not check it is connected by road
+        Returns:
+            Whether the settlement can be built
+        """
+        if not self._is_clear_of_buildings(index):
+            return False
+        if owner < 0:
+            return True
+        path_owners = self.path_owners
+        for p in self._intersection_paths[index]:
+            if path_owners[p] == owner:
+                return True
+        return False
+
+    def _is_valid_city_index(self, index: int, owner: int) -> bool:
+        """Check whether a city can be built on an intersection.
+
+        Args:
+            index: The index of the intersection
+            owner: The index of the player building the city
+        Returns:
+            Whether the player has a settlement on the intersection
+        """
+        return (
+            self.intersection_owners[index] == owner
+            and self.intersection_types[index] == BuildingType.SETTLEMENT.value
+        )
+
+    def _is_valid_road_index(self, index: int, owner: int) -> bool:
+        """Check whether a road can be built on a path.
+
+        Args:
+            index: The index of the path
+            owner: The index of the player building the road, or -1 to not check it is connected
+        Returns:
+            Whether the road can be built
+        """
+        if self.path_owners[index] >= 0:
+            return False
+        if owner < 0:
+            return True
+        intersection_owners = self.intersection_owners
+        path_owners = self.path_owners
+        for i in self._path_ends[index]:
+            # Check if it's connected to a intersection building
+            if intersection_owners[i] == owner:
+                return True
+            # Check if it's connected to another path building, without going through an enemy building
+            if intersection_owners[i] < 0:
+                for p in self._intersection_paths[i]:
+                    if path_owners[p] == owner:
+                        return True
+        return False
+
     def get_valid_settlement_coords(
         self, player: Player, ensure_connected: Optional[bool] = True
-    ) -> Set[Coords]:
+    ) -> FrozenSet[Coords]:
         """Get all the valid settlement coordinates for the player to build a settlement.
 
         Args:
@@ -349,15 +826,11 @@ class Board:
         Returns:
             The coordinates of all the valid settlement intersections
         """
-        return set(
-            [
-                i
-                for i in self.intersections.keys()
-                if self.is_valid_settlement_coords(player, i, ensure_connected)
-            ]
+        return self._get_legal_placements(
+            player if ensure_connected else None, BuildingType.SETTLEMENT
         )
 
-    def get_valid_city_coords(self, player: Player) -> Set[Coords]:
+    def get_valid_city_coords(self, player: Player) -> FrozenSet[Coords]:
         """Get all the valid city coordinates for the player to build a city.
 
         Args:
@@ -365,20 +838,14 @@ class Board:
         Returns
             The coordinates of all the valid city locations
         """
-        return set(
-            [
-                i
-                for i in self.intersections.keys()
-                if self.is_valid_city_coords(player, i)
-            ]
-        )
+        return self._get_legal_placements(player, BuildingType.CITY)
 
     def get_valid_road_coords(
         self,
         player: Player,
         ensure_connected: Optional[bool] = True,
         connected_intersection: Optional[Coords] = None,
-    ) -> Set[FrozenSet[Coords]]:
+    ) -> FrozenSet[FrozenSet[Coords]]:
         """Get all the valid coordinates for the player to build a road.
 
         Args:
@@ -389,21 +856,160 @@ class Board:
         Returns:
             The coordinates of all the paths where the player can build a road.
         """
-        to_return = set()
-        for path_coords in self.paths.keys():
-            if self.is_valid_road_coords(
-                player=player,
-                ensure_connected=ensure_connected,
-                path_coords=path_coords,
-            ):
-                if not connected_intersection or connected_intersection in path_coords:
-                    to_return.add(path_coords)
+        valid_coords = self._get_legal_placements(
+            player if ensure_connected else None, BuildingType.ROAD
+        )
+        if connected_intersection is None:
+            return valid_coords
+        return frozenset(p for p in valid_coords if connected_intersection in p)
+
+    def _get_legal_placements(
+        self, player: Optional[Player], building_type: BuildingType
+    ) -> FrozenSet:
+        """Get the cached legal locations for a building type, scanning the board on the first query for the player.
+
+        Args:
+            player: The player, or None for the locations that ignore whether they are connected to a player's buildings
+            building_type: The type of building
+        Returns:
+            The legal coordinates (intersection coords, or path coords for roads)
+        """
+        key = (player, building_type)
+        frozen = self._frozen_placements.get(key)
+        if frozen is None:
+            if player is not None and player not in self._player_indices:
+                # A player who isn't on the board has nothing to build from
+                return frozenset()
+            if player not in self._legal_placements:
+                self._legal_placements[player] = self._scan_legal_placements(player)
+                if self._undo_log is not None:
+                    # The scan saw the buildings of the open moves, so has to be forgotten when they are undone
+                    self._undo_log.append((self._forget_legal_placements, player))
+            placements = self._legal_placements[player][building_type]
+            # Built in index order, so that the order it iterates in only depends on which locations are legal and
+            # not on the order they were found in, i.e. a game restored from a snapshot chooses the same locations
+            coords = self.path_coords if building_type is BuildingType.ROAD else self.intersection_coords
+            frozen = frozenset(c for c in coords if c in placements)
+            self._frozen_placements[key] = frozen
+        return frozen
+
+    def _forget_legal_placements(self, player: Optional[Player]):
+        """Drop the cached legal locations for a player, so that they are scanned again on the next query."""
+        self._legal_placements.pop(player, None)
+        for building_type in BuildingType:
+            self._frozen_placements.pop((player, building_type), None)
+
+    def _scan_legal_placements(self, player: Optional[Player]) -> Dict[BuildingType, Set]:
+        """Check every intersection and path on the board for where the player can build.
+
+        Args:
+            player: The player, or None to ignore whether the locations are connected to a player's buildings
+        Returns:
+            The legal coordinates, keyed by building type
+        """
+        # Checks the whole board at once with the same rules as the _is_valid_*_index methods
+        topology = self.topology
+        # Add an empty element on the end for the padding in the tables to point at
+        intersection_owners = np.append(self.intersection_owners, -1)
+        path_owners = np.append(self.path_owners, -1)
+        occupied = intersection_owners >= 0
+        settlements = ~occupied[:-1] & ~occupied[topology.intersection_neighbor_table].any(axis=1)
+        roads = path_owners[:-1] < 0
+        if player is not None:
+            owner = self._get_owner(player)
+            has_road = (path_owners[topology.intersection_path_table] == owner).any(axis=1)
+            settlements &= has_road
+            # A road connects through its ends if the player has a building there, or has a road there and the
+            # intersection is empty
+            end_owners = intersection_owners[topology.path_end_table]
+            end_has_road = np.append(has_road, False)[topology.path_end_table]
+            roads &= ((end_owners == owner) | ((end_owners < 0) & end_has_road)).any(axis=1)
+        placements = {
+            BuildingType.SETTLEMENT: {
+                self.intersection_coords[i] for i in np.flatnonzero(settlements).tolist()
+            },
+            BuildingType.ROAD: {self.path_coords[p] for p in np.flatnonzero(roads).tolist()},
+        }
+        if player is not None:
+            cities = (self.intersection_owners == owner) & (
+                self.intersection_types == BuildingType.SETTLEMENT.value
+            )
+            placements[BuildingType.CITY] = {
+                self.intersection_coords[i] for i in np.flatnonzero(cities).tolist()
+            }
+        return placements
+
+    def _refresh_legal_placements(
+        self,
+        intersection_indices: Sequence[int],
+        path_indices: Sequence[int],
+    ):
+        """Recheck the legal building locations in the neighbourhood of a new building.
+
+        Args:
+            intersection_indices: The intersections whose settlement/city legality may have changed
+            path_indices: The paths whose road legality may have changed
+        """
+        checks = []
+        for i in intersection_indices:
+            c = self.intersection_coords[i]
+            checks.append((BuildingType.SETTLEMENT, c, self._is_valid_settlement_index, i))
+            checks.append((BuildingType.CITY, c, self._is_valid_city_index, i))
+        for p in path_indices:
+            checks.append((BuildingType.ROAD, self.path_coords[p], self._is_valid_road_index, p))
+        for player, placements in self._legal_placements.items():
+            owner = -1 if player is None else self.get_player_index(player)
+            for building_type, location, is_valid, index in checks:
+                if building_type not in placements:
+                    continue
+                valid = is_valid(index, owner)
+                if self._update_placement(placements[building_type], location, valid):
+                    self._frozen_placements.pop((player, building_type), None)
+                    if self._undo_log is not None:
+                        # Undoing puts the location back rather than checking the board again
+                        self._undo_log.append(
+                            (
+                                self._restore_placement,
+                                player,
+                                building_type,
+                                location,
+                                not valid,
+                            )
+                        )
 
-        return to_return
+    def _restore_placement(
+        self, player: Optional[Player], building_type: BuildingType, location, is_valid: bool
+    ):
+        """Put a legal location back the way it was before a building was added, as recorded by
+        `_refresh_legal_placements`.
+
+        Args:
+            player: The player, or None for the locations that ignore whether they are connected to a player's buildings
+            building_type: The type of building
+            location: The coordinates of the location
+            is_valid: Whether the location was legal
+        """
+        self._update_placement(self._legal_placements[player][building_type], location, is_valid)
+        self._frozen_placements.pop((player, building_type), None)
+
+    @staticmethod
+    def _update_placement(placements: Set, location, is_valid: bool) -> bool:
+        """Add or remove a location from a set of legal placements.
+
+        Returns:
+            Whether the set changed
+        """
+        if is_valid == (location in placements):
+            return False
+        if is_valid:
+            placements.add(location)
+        else:
+            placements.discard(location)
+        return True
 
     def get_intersection_connected_intersections(
         self, intersection: Intersection
-    ) -> Set[Intersection]:
+    ) -> FrozenSet[Intersection]:
         """Get all the intersections connected to the intersection given by an path.
 
         Args:
@@ -412,13 +1018,14 @@ class Board:
         Returns:
             The intersections that are connected to the intersection given
         """
-        connected = set()
-        for c in Intersection.CONNECTED_CORNER_OFFSETS:
-            if c + intersection.coords in self.intersections.keys():
-                connected.add(self.intersections[c + intersection.coords])
-        return connected
+        return frozenset(
+            self.intersections.view(i)
+            for i in self._intersection_neighbors[
+                self.intersection_indices[intersection.coords]
+            ]
+        )
 
-    def get_connected_hex_intersections(self, hex: Hex) -> Set[Intersection]:
+    def get_connected_hex_intersections(self, hex: Hex) -> FrozenSet[Intersection]:
         """Get all of the intersections that are connected to the hex.
 
         Args:
@@ -427,16 +1034,14 @@ class Board:
         Returns:
             All 6 intersections that are around this hex
         """
-        return set(
-            map(
-                lambda offset: self.intersections[hex.coords + offset],
-                Hex.CONNECTED_CORNER_OFFSETS,
-            )
+        return frozenset(
+            self.intersections.view(i)
+            for i in self._hex_intersections[self.hex_indices[hex.coords]]
         )
 
     def get_hexes_connected_to_intersection(
         self, intersection_coords: Coords
-    ) -> Set[Coords]:
+    ) -> FrozenSet[Coords]:
         """Get all the hexes' coordinates that are connected to the intersection with the coordinates provided.
 
         Args:
@@ -444,11 +1049,12 @@ class Board:
         Returns:
             The hexes connected to the intersection
         """
-        return set(
-            [
-                intersection_coords + c
-                for c in Hex.CONNECTED_CORNER_OFFSETS
-                if intersection_coords + c in self.hexes
+        if intersection_coords not in self.intersection_indices:
+            return frozenset()
+        return frozenset(
+            self.hex_coords[h]
+            for h in self._intersection_hexes[
+                self.intersection_indices[intersection_coords]
             ]
         )
 
@@ -461,32 +1067,83 @@ class Board:
             The RollYield object containing the information for what each player gets, keyed by the player
         """
         total_yield: Dict[Player, RollYield] = {}
-        for hex in self.hexes.values():
-            if hex.token_number == roll and self.robber != hex.coords:
-                resource = hex.hex_type.get_resource()
-                # Check around the hex for any settlements/cities
-                for intersection in self.get_connected_hex_intersections(hex):
-                    if intersection.building is not None:
-                        owner = intersection.building.owner
-                        if owner not in total_yield.keys():
-                            total_yield[owner] = RollYield()
-                        amount = (
-                            2
-                            if intersection.building.building_type is BuildingType.CITY
-                            else 1
-                        )
-                        total_yield[owner].add_yield(
-                            resource,
-                            amount,
-                            source=RollYieldSource(
-                                resource,
-                                amount,
-                                intersection.building,
-                                hex,
-                            ),
-                        )
+        for index, hex, resource in self._roll_sources.get(roll, ()):
+            if self.intersection_owners[index] < 0 or hex.coords == self.robber:
+                continue
+            intersection = self.intersections.view(index)
+            owner = intersection.building.owner
+            if owner not in total_yield.keys():
+                total_yield[owner] = RollYield()
+            amount = 2 if intersection.building.building_type is BuildingType.CITY else 1
+            total_yield[owner].add_yield(
+                resource,
+                amount,
+                source=RollYieldSource(
+                    resource,
+                    amount,
+                    intersection.building,
+                    hex,
+                ),
+            )
         return total_yield
 
+    def get_yield_totals_for_roll(self, roll: int) -> Dict[Player, Dict[Resource, int]]:
+        """Get the total resources each player receives for a particular roll, without where they came from.
+
+        The totals are kept up to date as buildings are added and the robber moves, so this does not allocate anything.
+        The dictionaries returned are owned by the board and must not be changed.
+
+        Args:
+            roll: The number rolled
+        Returns:
+            The resources each player receives, keyed by the player
+        """
+        return self._roll_totals.get(roll, {})
+
+    def _update_intersection_roll_totals(
+        self, player: Player, index: int, amount: int
+    ):
+        """Add to what a player receives from the hexes around an intersection.
+
+        Args:
+            player: The player who owns the building on the intersection
+            index: The index of the intersection
+            amount: How many more of each resource the player now receives
+        """
+        for h in self._intersection_hexes[index]:
+            hex = self.hexes[self.hex_coords[h]]
+            if hex.token_number is None or hex.coords == self.robber:
+                continue
+            totals = self._roll_totals[hex.token_number]
+            if player not in totals:
+                totals[player] = dict.fromkeys(_RESOURCES, 0)
+            totals[player][hex.hex_type.get_resource()] += amount
+
+    def _update_hex_roll_totals(self, hex_coords: Coords, sign: int):
+        """Add or remove what the buildings around a hex receive when its number is rolled.
+
+        Args:
+            hex_coords: The coordinates of the hex
+            sign: 1 to add the hex's resources to the totals, -1 to remove them
+        """
+        hex = self.hexes[hex_coords]
+        if hex.token_number is None:
+            return
+        totals = self._roll_totals[hex.token_number]
+        resource = hex.hex_type.get_resource()
+        corners = list(self._hex_intersections[self.hex_indices[hex_coords]])
+        owners = self.intersection_owners[corners].tolist()
+        types = self.intersection_types[corners].tolist()
+        for owner_index, building_type in zip(owners, types):
+            if owner_index < 0:
+                continue
+            owner = self.players[owner_index]
+            if owner not in totals:
+                totals[owner] = dict.fromkeys(_RESOURCES, 0)
+            totals[owner][resource] += sign * (
+                2 if building_type == BuildingType.CITY.value else 1
+            )
+
     def is_valid_hex_coords(self, coords: Coords) -> bool:
         """Check whether the coordinates given are valid hex coordinates.
 
@@ -495,47 +1152,74 @@ class Board:
         Returns:
             Whether there is a hex at those coordinates
         """
-        return len(set(filter(lambda x: x == coords, self.hexes.keys()))) != 0
+        return coords in self.hexes
 
     def calculate_player_longest_road(self, player: Player) -> int:
         """Calculate the length of the longest road segment for the player given.
 
+        The result is cached until the player builds another road or another player builds a settlement on one of
+        the intersections the player's roads pass through.
+
         Args:
             player: The player to calculate the longest road for
         Returns:
             The length of the ongest road segment
         """
-        paths = [
-            e
-            for e in self.paths.values()
-            if e.building is not None and e.building.owner is player
-        ]
-        starting = [(c, [e]) for e in paths for c in e.path_coords]
-        if len(starting) == 0:
-            return 0
+        if player in self._longest_roads:
+            return self._longest_roads[player]
 
-        current_longest = starting[0][1]
+        # Gather the player's road network, using each road's index as its bit so the roads used so far fit in one int
+        owner = self.get_player_index(player)
+        if owner < 0:
+            return 0
+        adjacency: Dict[int, List[Tuple[int, int]]] = {}
+        for p in np.flatnonzero(self.path_owners == owner).tolist():
+            a, b = self._path_ends[p]
+            adjacency.setdefault(a, []).append((1 << p, b))
+            adjacency.setdefault(b, []).append((1 << p, a))
+        # Roads can start or end at, but not go through, another player's building
+        blocked = set(
+            i
+            for i in adjacency
+            if self.intersection_owners[i] >= 0 and self.intersection_owners[i] != owner
+        )
+        longest = 0
+        for roads in adjacency.values():
+            for bit, other in roads:
+                longest = max(
+                    longest, 1 + self._longest_trail(adjacency, blocked, other, bit)
+                )
+        self._longest_roads[player] = longest
+        return longest
+
+    @staticmethod
+    def _longest_trail(
+        adjacency: Dict[int, List[Tuple[int, int]]],
+        blocked: Set[int],
+        index: int,
+        used: int,
+    ) -> int:
+        """Find the longest trail of roads starting at the intersection given that does not reuse any road in `used`.
 
-        potential = starting
-        while len(potential) > 0:
-            current = potential.pop(0)
-            building = self.intersections[current[0]].building
-            if building is not None and building.owner is not player:
-                continue
-            for path in self.get_paths_for_intersection_coords(current[0]):
-                if (
-                    path not in current[1]
-                    and path.building is not None
-                    and path.building.owner is player
-                ):
-                    other_intersection = path.other_intersection(current[0])
-                    potential.append((other_intersection, [path] + current[1]))
-                    if len(current[1]) + 1 > len(current_longest):
-                        current_longest = [path] + current[1]
-
-        return len(current_longest)
-
-    def get_paths_for_intersection_coords(self, coords: Coords) -> Set[Path]:
+        Args:
+            adjacency: The roads attached to each intersection, as (road bit, other intersection) pairs
+            blocked: The intersections that the trail cannot pass through
+            index: The index of the intersection to start from
+            used: The bitmask of the roads that have already been used
+        Returns:
+            The number of roads in the longest trail
+        """
+        if index in blocked:
+            return 0
+        longest = 0
+        for bit, other in adjacency[index]:
+            if not used & bit:
+                length = 1 + Board._longest_trail(adjacency, blocked, other, used | bit)
+                if length > longest:
+                    longest = length
+        return longest
+
+    def get_paths_for_intersection_coords(self, coords: Coords) -> FrozenSet[Path]:
         """Get all the paths who that connected to the intersection given.
 
         Args:
@@ -543,7 +1227,12 @@ class Board:
         Returns:
             A set of the paths attached to that intersection
         """
-        return set(filter(lambda e: coords in e.path_coords, self.paths.values()))
+        if coords not in self.intersection_indices:
+            return frozenset()
+        return frozenset(
+            self.paths.view(p)
+            for p in self._intersection_paths[self.intersection_indices[coords]]
+        )
 
     def get_hex_resources_for_intersection(self, coords: Coords) -> Dict[Resource, int]:
         """Get the associated resources for the hexes around the intersection at the coords given.
@@ -567,13 +1256,18 @@ class Board:
         Returns:
             The players with a building on the edge of the hex
         """
-        return set(
-            [
-                i.building.owner
-                for i in self.get_connected_hex_intersections(self.hexes[coords])
-                if i.building is not None
-            ]
-        )
+        return set(self.get_players_on_hex_in_order(coords))
+
+    def get_players_on_hex_in_order(self, coords: Coords) -> List[Player]:
+        """Get all the players who have a building on the edge of the given hex, in the order of `players`.
+
+        Args:
+            coords: The coords of the hex
+        Returns:
+            The players with a building on the edge of the hex
+        """
+        counts = self.hex_building_counts[self.hex_indices[coords]]
+        return [self.players[p] for p in np.flatnonzero(counts).tolist()]
 
     def __str__(self):
         from ._board_renderer import BoardRenderer
@@ -582,3 +1276,4 @@ class Board:
 
     def __repl__(self):
         return self.__str__()
+
@@ -0,0 +1,338 @@
+from typing import Iterator, Optional, Tuple
+from collections import deque
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ._hex_type import HexType
+from ._board_topology import _BoardGeometry
+from ._random_board import RandomBoard, RandomBoardLayouts, BoardConstraints
+from .._resource import Resource
+
+# The number of dots on each token, indexed by the token number
+_PIPS = np.array([0, 0, 1, 2, 3, 4, 5, 0, 5, 4, 3, 2, 1], dtype=np.int16)
+# Every pip sum is at most the sum over all the tokens, so every histogram has this many bins
+_HISTOGRAM_BINS = int(_PIPS[RandomBoard._TOKEN_DECK].sum()) + 1
+# The Resource value of each HexType value, or -1 for none
+_HEX_RESOURCES = np.array(
+    [-1 if t.get_resource() is None else t.get_resource().value for t in HexType],
+    dtype=np.int8,
+)
+_NUM_RESOURCES = len(Resource)
+
+
+class BoardStatistics:
+    """Summary statistics over a number of random board layouts.
+
+    Only sums and histograms are kept, so statistics over any number of layouts take the same amount of memory and
+    can be merged together. Every pip sum is the total number of dots on the tokens that pay out, i.e. 5 for a 6 or 8.
+
+    Args:
+        num_seats: The number of seats in the opening draft
+
+    Attributes:
+        count (int): The number of layouts
+        resource_pips (np.ndarray): The sum of the pips of each resource, indexed by Resource value
+        resource_pips_squared (np.ndarray): The sum of the squared pips of each resource
+        resource_pips_histogram (np.ndarray): How many layouts have each pip total, with shape (resources, bins)
+        best_opening_histogram (np.ndarray): How many layouts have each best single intersection pip sum
+        best_harbor_opening_histogram (np.ndarray):
+            How many layouts have each best pip sum at an intersection with a harbor
+        harbor_resource_pips_histogram (np.ndarray):
+            How many 2:1 harbors have each pip total of their resource on the board
+        seat_pips (np.ndarray): The sum of the pips each seat gets from its two opening settlements
+        seat_pips_squared (np.ndarray): The sum of the squared pips each seat gets
+        seat_spread_histogram (np.ndarray): How many layouts have each difference between the best and worst seat
+    """
+
+    def __init__(self, num_seats: int):
+        self.num_seats = num_seats
+        self.count = 0
+        self.resource_pips = np.zeros(_NUM_RESOURCES, dtype=np.int64)
+        self.resource_pips_squared = np.zeros(_NUM_RESOURCES, dtype=np.int64)
+        self.resource_pips_histogram = np.zeros(
+            (_NUM_RESOURCES, _HISTOGRAM_BINS), dtype=np.int64
+        )
+        self.best_opening_histogram = np.zeros(_HISTOGRAM_BINS, dtype=np.int64)
+        self.best_harbor_opening_histogram = np.zeros(_HISTOGRAM_BINS, dtype=np.int64)
+        self.harbor_resource_pips_histogram = np.zeros(_HISTOGRAM_BINS, dtype=np.int64)
+        self.seat_pips = np.zeros(num_seats, dtype=np.int64)
+        self.seat_pips_squared = np.zeros(num_seats, dtype=np.int64)
+        self.seat_spread_histogram = np.zeros(_HISTOGRAM_BINS, dtype=np.int64)
+        # The sum of num_seats * sum(x^2) - sum(x)^2 over the seat pips of each layout, which keeps the variance
+        # between seats exact
+        self._seat_deviation = 0
+
+    def merge(self, other: "BoardStatistics"):
+        """Add the statistics of other layouts to these.
+
+        Args:
+            other: The other statistics
+        Raises:
+            ValueError: If the statistics are for a different number of seats
+        """
+        if other.num_seats != self.num_seats:
+            raise ValueError(
+                "Cannot merge statistics for %d seats with statistics for %d seats"
+                % (other.num_seats, self.num_seats)
+            )
+        self.count += other.count
+        for name in (
+            "resource_pips",
+            "resource_pips_squared",
+            "resource_pips_histogram",
+            "best_opening_histogram",
+            "best_harbor_opening_histogram",
+            "harbor_resource_pips_histogram",
+            "seat_pips",
+            "seat_pips_squared",
+            "seat_spread_histogram",
+        ):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self._seat_deviation += other._seat_deviation
+
+    @property
+    def resource_pips_mean(self) -> np.ndarray:
+        """The mean pips of each resource, indexed by Resource value."""
+        return self.resource_pips / max(self.count, 1)
+
+    @property
+    def resource_pips_std(self) -> np.ndarray:
+        """The standard deviation of the pips of each resource between layouts."""
+        mean = self.resource_pips_mean
+        return np.sqrt(np.maximum(self.resource_pips_squared / max(self.count, 1) - mean**2, 0))
+
+    @property
+    def best_opening_mean(self) -> float:
+        """The mean pip sum of the best intersection."""
+        return float(
+            self.best_opening_histogram @ np.arange(_HISTOGRAM_BINS) / max(self.count, 1)
+        )
+
+    @property
+    def seat_pips_mean(self) -> np.ndarray:
+        """The mean pips each seat gets from its opening settlements."""
+        return self.seat_pips / max(self.count, 1)
+
+    @property
+    def seat_pips_std(self) -> np.ndarray:
+        """The standard deviation of the pips each seat gets between layouts."""
+        mean = self.seat_pips_mean
+        return np.sqrt(np.maximum(self.seat_pips_squared / max(self.count, 1) - mean**2, 0))
+
+    @property
+    def seat_advantage_variance(self) -> float:
+        """The mean variance of the opening pips between the seats of a layout."""
+        return self._seat_deviation / (self.num_seats**2 * max(self.count, 1))
+
+
+class BoardAnalyzer:
+    """Measures how balanced random board layouts are, without building any boards.
+
+    The metrics are computed with NumPy on whole batches of layouts from `RandomBoard.generate_many`, and the batches
+    are spread across a pool of processes. Only `BoardStatistics` are returned from each batch, so any number of
+    layouts can be analyzed in bounded memory.
+
+    The seat advantage is measured with a greedy snake draft, where each seat in turn places a settlement on the free
+    intersection with the most pips, following the distance rule, and then places its second settlement in reverse
+    order.
+
+    Args:
+        constraints: The constraints for the generated layouts. Defaults to the default BoardConstraints
+        num_seats: The number of seats in the opening draft. Defaults to 4
+        batch_size: How many layouts to generate and analyze at once. Defaults to 100000
+        workers: How many processes to use. 1 analyzes every batch in this process. Defaults to None, which uses one
+            for every CPU
+    """
+
+    def __init__(
+        self,
+        constraints: Optional[BoardConstraints] = None,
+        num_seats: Optional[int] = 4,
+        batch_size: Optional[int] = 100_000,
+        workers: Optional[int] = None,
+    ):
+        self.constraints = constraints if constraints is not None else BoardConstraints()
+        self.num_seats = num_seats
+        self.batch_size = batch_size
+        self.workers = workers
+
+    def analyze(self, n: int, seed: Optional[int] = None) -> BoardStatistics:
+        """Generate and analyze random layouts.
+
+        Args:
+            n: How many layouts to analyze
+            seed: The seed for generating the layouts. The same seed and batch size always give the same statistics.
+                Defaults to None, which gives different layouts every time
+        Returns:
+            The statistics over all the layouts
+        """
+        statistics = BoardStatistics(self.num_seats)
+        for statistics in self.iter_analyze(n, seed):
+            pass
+        return statistics
+
+    def iter_analyze(self, n: int, seed: Optional[int] = None) -> Iterator[BoardStatistics]:
+        """Generate and analyze random layouts, yielding the statistics so far after every batch.
+
+        The same statistics object is yielded each time, so copy anything that should be kept.
+
+        Args:
+            n: How many layouts to analyze
+            seed: The seed for generating the layouts. The same seed and batch size always give the same statistics.
+                Defaults to None, which gives different layouts every time
+        Returns:
+            The statistics over all the layouts analyzed so far
+        """
+        sizes = [self.batch_size] * (n // self.batch_size)
+        if n % self.batch_size:
+            sizes.append(n % self.batch_size)
+        seeds = [
+            int(child.generate_state(1, np.uint64)[0])
+            for child in np.random.SeedSequence(seed).spawn(len(sizes))
+        ]
+        tasks = [(s, size, self.constraints, self.num_seats) for s, size in zip(seeds, sizes)]
+        statistics = BoardStatistics(self.num_seats)
+        if self.workers == 1:
+            for task in tasks:
+                statistics.merge(_analyze_seeded(task))
+                yield statistics
+            return
+        workers = self.workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Only keep a few batches in flight, so the results never pile up. The results are merged in order, so
+            # the statistics do not depend on which process finishes first
+            in_flight = deque()
+            max_in_flight = 2 * workers
+            for task in tasks:
+                if len(in_flight) >= max_in_flight:
+                    statistics.merge(in_flight.popleft().result())
+                    yield statistics
+                in_flight.append(executor.submit(_analyze_seeded, task))
+            while in_flight:
+                statistics.merge(in_flight.popleft().result())
+                yield statistics
+
+    def analyze_layouts(self, layouts: RandomBoardLayouts) -> BoardStatistics:
+        """Analyze layouts that have already been generated, in this process.
+
+        Args:
+            layouts: The layouts
+        Returns:
+            The statistics over the layouts
+        """
+        return _analyze_layouts(layouts, self.num_seats)
+
+
+def _analyze_seeded(task: Tuple[int, int, BoardConstraints, int]) -> BoardStatistics:
+    """Generate and analyze one batch of layouts. Runs in the worker processes.
+
+    Args:
+        task: The seed, the number of layouts, the constraints and the number of seats
+    Returns:
+        The statistics over the batch
+    """
+    seed, size, constraints, num_seats = task
+    return _analyze_layouts(RandomBoard.generate_many(size, seed, constraints), num_seats)
+
+
+def _analyze_layouts(layouts: RandomBoardLayouts, num_seats: int) -> BoardStatistics:
+    """Compute the statistics over a batch of layouts.
+
+    Args:
+        layouts: The layouts
+        num_seats: The number of seats in the opening draft
+    Returns:
+        The statistics over the layouts
+    """
+    intersection_hexes, intersection_neighbors, harbor_intersections = _get_tables()
+    statistics = BoardStatistics(num_seats)
+    n = len(layouts)
+    statistics.count = n
+    if n == 0:
+        return statistics
+    rows = np.arange(n)
+    pips = _PIPS[layouts.tokens]
+    resources = _HEX_RESOURCES[layouts.hex_types]
+    # Pips of each resource
+    resource_pips = np.stack(
+        [np.where(resources == r, pips, 0).sum(axis=1) for r in range(_NUM_RESOURCES)],
+        axis=1,
+    )
+    statistics.resource_pips = resource_pips.sum(axis=0, dtype=np.int64)
+    statistics.resource_pips_squared = (resource_pips.astype(np.int64) ** 2).sum(axis=0)
+    for r in range(_NUM_RESOURCES):
+        statistics.resource_pips_histogram[r] = np.bincount(
+            resource_pips[:, r], minlength=_HISTOGRAM_BINS
+        )
+    # Pips at each intersection, with an extra hex with no pips for the padding
+    padded_pips = np.concatenate((pips, np.zeros((n, 1), dtype=pips.dtype)), axis=1)
+    intersection_pips = padded_pips[:, intersection_hexes].sum(axis=2)
+    statistics.best_opening_histogram = np.bincount(
+        intersection_pips.max(axis=1), minlength=_HISTOGRAM_BINS
+    )
+    # Harbor access
+    statistics.best_harbor_opening_histogram = np.bincount(
+        intersection_pips[:, harbor_intersections.ravel()].max(axis=1),
+        minlength=_HISTOGRAM_BINS,
+    )
+    specific = layouts.harbors >= 0
+    harbor_resource_pips = np.take_along_axis(
+        resource_pips, np.where(specific, layouts.harbors, 0).astype(np.intp), axis=1
+    )
+    statistics.harbor_resource_pips_histogram = np.bincount(
+        harbor_resource_pips[specific], minlength=_HISTOGRAM_BINS
+    )
+    # The snake draft, with an extra blocked intersection for the padding
+    blocked = np.zeros((n, intersection_pips.shape[1] + 1), dtype=bool)
+    blocked[:, -1] = True
+    seat_pips = np.zeros((n, num_seats), dtype=np.int64)
+    for seat in list(range(num_seats)) + list(reversed(range(num_seats))):
+        choice = np.where(blocked[:, :-1], -1, intersection_pips).argmax(axis=1)
+        seat_pips[:, seat] += intersection_pips[rows, choice]
+        blocked[rows, choice] = True
+        blocked[rows[:, None], intersection_neighbors[choice]] = True
+    statistics.seat_pips = seat_pips.sum(axis=0)
+    statistics.seat_pips_squared = (seat_pips**2).sum(axis=0)
+    statistics.seat_spread_histogram = np.bincount(
+        seat_pips.max(axis=1) - seat_pips.min(axis=1), minlength=_HISTOGRAM_BINS
+    )
+    statistics._seat_deviation = int(
+        (num_seats * (seat_pips**2).sum(axis=1) - seat_pips.sum(axis=1) ** 2).sum()
+    )
+    return statistics
+
+
+_tables: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+
+def _get_tables() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Get the adjacency of the random board in the order of `RandomBoard.HEX_COORDS`.
+
+    Returns:
+        The hexes around each intersection, padded with the number of hexes, the intersections one path away from each
+        intersection, padded with the number of intersections, and the two intersections of each harbor
+    """
+    global _tables
+    if _tables is None:
+        geometry = _BoardGeometry.get(RandomBoard.HEX_COORDS)
+        positions = [RandomBoard.HEX_COORDS.index(c) for c in geometry.hex_coords]
+        intersection_hexes = geometry._pad_table(
+            tuple(tuple(positions[h] for h in hexes) for hexes in geometry.intersection_hexes),
+            len(RandomBoard.HEX_COORDS),
+        )
+        harbor_intersections = np.array(
+            [
+                [geometry.intersection_indices[c] for c in coords]
+                for coords in RandomBoard.HARBOR_COORDS
+            ],
+            dtype=np.intp,
+        )
+        _tables = (
+            intersection_hexes,
+            geometry.intersection_neighbor_table,
+            harbor_intersections,
+        )
+    return _tables
+
@@ -0,0 +1,297 @@
+from typing import Dict, List, Optional, Tuple
+import math
+import weakref
+
+import numpy as np
+
+from . import _board
+from ._board_renderer import BoardRenderer
+from ._building_type import BuildingType
+from ._hex import Hex
+from ._hex_type import HexType
+from .._resource import Resource
+
+# A 3x5 bitmap of each digit, for drawing the numbers on the tokens
+_DIGITS = [
+    ["###", "#.#", "#.#", "#.#", "###"],
+    [".#.", "##.", ".#.", ".#.", "###"],
+    ["###", "..#", "###", "#..", "###"],
+    ["###", "..#", "###", "..#", "###"],
+    ["#.#", "#.#", "###", "..#", "..#"],
+    ["###", "#..", "###", "..#", "###"],
+    ["###", "#..", "###", "#.#", "###"],
+    ["###", "..#", "..#", "..#", "..#"],
+    ["###", "#.#", "###", "#.#", "###"],
+    ["###", "#.#", "###", "..#", "###"],
+]
+
+
+def _to_rgb(color: str) -> np.ndarray:
+    """Convert a string hex code (i.e. '#FF0000') to an RGB array."""
+    return np.array([int(color[i: i + 2], 16) for i in (1, 3, 5)], dtype=np.uint8)
+
+
+class _RasterLayout:
+    """The pixels everything on a board is drawn on, shared by every raster renderer of boards with the same topology and
+    hex size.
+
+    The pixels are stored as flat indices into an image with shape (height, width).
+
+    Args:
+        topology: The board's topology
+        hex_size: The distance from the center of a hex to its corners, in pixels
+
+    Attributes:
+        shape (Tuple[int, int]): The (height, width) of the image
+        hex_centers (np.ndarray): The (x, y) of the center of each hex
+        land_pixels (List[np.ndarray]): The pixels of each hex, including its edges
+        face_pixels (List[np.ndarray]): The pixels of each hex inside its edges
+        token_pixels (List[np.ndarray]): The pixels of the token on each hex
+        harbor_pixels (Dict[frozenset[Coords], np.ndarray]): The pixels of each harbor, keyed by the coords of its path
+        road_pixels (np.ndarray): The pixels of every road
+        road_paths (np.ndarray): The index of the path each pixel in road_pixels belongs to
+        building_pixels (np.ndarray): The pixels of every city
+        building_intersections (np.ndarray): The index of the intersection each pixel in building_pixels belongs to
+        building_is_settlement (np.ndarray): Whether each pixel in building_pixels is also part of a settlement
+        robber_pixels (List[np.ndarray]): The pixels of the robber on each hex
+    """
+
+    _layouts = weakref.WeakKeyDictionary()
+
+    def __init__(self, topology, hex_size: int):
+        s = hex_size
+        # Axial coordinates to pixels, so that the corners of a hex are one hex size away from its center
+        points = np.array(
+            [(c.r * math.sqrt(3) / 2, -(c.q + c.r / 2)) for c in topology.intersection_coords]
+        ) * s
+        # Leave space around the board for the harbors
+        origin = points.min(axis=0) - s
+        points -= origin
+        width, height = np.ceil(points.max(axis=0) + s).astype(int)
+        self.shape: Tuple[int, int] = (int(height), int(width))
+
+        def position(c):
+            return (
+                np.array([c.r * math.sqrt(3) / 2, -(c.q + c.r / 2)]) * s - origin
+            )
+
+        self.hex_centers: np.ndarray = np.array([position(c) for c in topology.hex_coords])
+        self.land_pixels: List[np.ndarray] = [self._hexagon(c, s) for c in self.hex_centers]
+        self.face_pixels: List[np.ndarray] = [
+            self._hexagon(c, 0.88 * s) for c in self.hex_centers
+        ]
+        self.token_pixels: List[np.ndarray] = [self._disc(c, 0.36 * s) for c in self.hex_centers]
+        self.robber_pixels: List[np.ndarray] = [
+            self._disc(c + (0.56 * s, 0), 0.18 * s) for c in self.hex_centers
+        ]
+        self.harbor_pixels: Dict[frozenset, np.ndarray] = {}
+        for path_coords in topology.harbors:
+            # Put the harbor out in the water, between the path and the water hex next to it
+            water = [
+                c
+                for c in (
+                    next(iter(path_coords)) + offset for offset in Hex.CONNECTED_CORNER_OFFSETS
+                )
+                if c not in topology.hexes
+                and all(c - end in Hex.CONNECTED_CORNER_OFFSETS for end in path_coords)
+            ][0]
+            middle = sum(points[topology.intersection_indices[c]] for c in path_coords) / 2
+            self.harbor_pixels[path_coords] = self._disc(
+                middle + 0.5 * (position(water) - middle), 0.22 * s
+            )
+        road_pixels = [
+            self._segment(points[a], points[b], 0.2 * s, max(0.09 * s, 1.0))
+            for a, b in topology.path_ends
+        ]
+        self.road_pixels: np.ndarray = np.concatenate(road_pixels)
+        self.road_paths: np.ndarray = np.repeat(
+            np.arange(len(road_pixels)), [len(p) for p in road_pixels]
+        )
+        cities = [self._square(p, 0.24 * s) for p in points]
+        settlements = [self._square(p, 0.15 * s) for p in points]
+        self.building_pixels: np.ndarray = np.concatenate(cities)
+        self.building_intersections: np.ndarray = np.repeat(
+            np.arange(len(cities)), [len(p) for p in cities]
+        )
+        self.building_is_settlement: np.ndarray = np.concatenate(
+            [np.isin(c, p) for c, p in zip(cities, settlements)]
+        )
+
+    @staticmethod
+    def get(topology, hex_size: int) -> "_RasterLayout":
+        """Get the layout for a topology and hex size, building it the first time they are rendered.
+
+        Args:
+            topology: The board's topology
+            hex_size: The distance from the center of a hex to its corners, in pixels
+        Returns:
+            The shared layout
+        """
+        layouts = _RasterLayout._layouts.setdefault(topology, {})
+        layout = layouts.get(hex_size)
+        if layout is None:
+            layout = layouts[hex_size] = _RasterLayout(topology, hex_size)
+        return layout
+
+    def _window(self, center: np.ndarray, radius: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get the pixels in a square around a point.
+
+        Returns:
+            The flat indices of the pixels and their x and y offsets from the point
+        """
+        x0, y0 = np.maximum(np.floor(center - radius), 0).astype(int)
+        x1, y1 = np.minimum(np.ceil(center + radius) + 1, self.shape[::-1]).astype(int)
+        ys, xs = np.mgrid[y0:y1, x0:x1]
+        return (ys * self.shape[1] + xs).ravel(), xs.ravel() + 0.5 - center[0], ys.ravel() + 0.5 - center[1]
+
+    def _hexagon(self, center: np.ndarray, radius: float) -> np.ndarray:
+        pixels, dx, dy = self._window(center, radius)
+        apothem = radius * math.sqrt(3) / 2
+        inside = (
+            (np.abs(dx) <= apothem)
+            & (np.abs(0.5 * dx + math.sqrt(3) / 2 * dy) <= apothem)
+            & (np.abs(-0.5 * dx + math.sqrt(3) / 2 * dy) <= apothem)
+        )
+        return pixels[inside]
+
+    def _disc(self, center: np.ndarray, radius: float) -> np.ndarray:
+        pixels, dx, dy = self._window(center, radius)
+        return pixels[dx**2 + dy**2 <= radius**2]
+
+    def _square(self, center: np.ndarray, half: float) -> np.ndarray:
+        pixels, dx, dy = self._window(center, half)
+        return pixels[(np.abs(dx) <= half) & (np.abs(dy) <= half)]
+
+    def _segment(self, a: np.ndarray, b: np.ndarray, inset: float, half_width: float) -> np.ndarray:
+        """Get the pixels of a thick line between two points, stopping short of the points by inset."""
+        length = np.linalg.norm(b - a)
+        direction = (b - a) / length
+        pixels, dx, dy = self._window((a + b) / 2, length / 2 + half_width)
+        along = dx * direction[0] + dy * direction[1]
+        across = -dx * direction[1] + dy * direction[0]
+        return pixels[(np.abs(along) <= length / 2 - inset) & (np.abs(across) <= half_width)]
+
+
+class BoardRasterRenderer:
+    """Class for rendering a board into an RGB image, i.e. for recording videos of games.
+
+    Everything that never changes during a game (the water, hexes, tokens and harbors) is drawn once. Each frame copies
+    that and then draws the roads, buildings and robber with a few writes to precomputed pixels.
+
+    Args:
+        board: The board to render
+        hex_size: The distance from the center of a hex to its corners, in pixels. Defaults to 24
+        player_colors:
+            The colors to use for each player, in the order of `board.players`. Colors are string hex codes
+            (i.e. '#FF0000'). Defaults to `BoardRenderer.DEFAULT_PLAYER_COLORS`
+        hex_color_map:
+            A map of which colors to use for the different types of hexes. Colors are string hex codes (i.e. '#FF00000')
+        resource_color_map:
+            A map of which colors to use for the different resource harbors. Colors are string hex codes (i.e. '#FF00000')
+
+    Attributes:
+        shape (Tuple[int, int, int]): The shape of the images, as (height, width, 3)
+    """
+
+    EDGE_COLOR = "#9c7500"
+    TOKEN_COLOR = "#FFFFFF"
+    ROBBER_COLOR = "#000000"
+
+    def __init__(
+        self,
+        board: _board.Board,
+        hex_size: Optional[int] = 24,
+        player_colors: Optional[List[str]] = BoardRenderer.DEFAULT_PLAYER_COLORS,
+        hex_color_map: Optional[Dict[HexType, str]] = BoardRenderer.DEFAULT_HEX_COLORS,
+        resource_color_map: Optional[Dict[Resource, str]] = BoardRenderer.DEFAULT_RESOURCE_COLORS,
+    ):
+        self.board = board
+        self.hex_size = hex_size
+        self.player_colors = player_colors
+        self.hex_color_map = hex_color_map
+        self.resource_color_map = resource_color_map
+        self._layout = _RasterLayout.get(board.topology, hex_size)
+        self.shape: Tuple[int, int, int] = self._layout.shape + (3,)
+        self._robber_color = _to_rgb(BoardRasterRenderer.ROBBER_COLOR)
+        self._player_colors = np.array([_to_rgb(c) for c in player_colors], dtype=np.uint8)
+        self._background = self._draw_background()
+        self._frame = np.empty(self.shape, dtype=np.uint8)
+
+    def _draw_background(self) -> np.ndarray:
+        layout = self._layout
+        image = np.empty(self.shape, dtype=np.uint8)
+        image[:] = _to_rgb(BoardRenderer.WATER_COLOR)
+        flat = image.reshape(-1, 3)
+        for path_coords, pixels in layout.harbor_pixels.items():
+            resource = self.board.harbors[path_coords].resource
+            flat[pixels] = _to_rgb(
+                "#FFFFFF" if resource is None else self.resource_color_map[resource]
+            )
+        for h, coords in enumerate(self.board.hex_coords):
+            hex = self.board.hexes[coords]
+            flat[layout.land_pixels[h]] = _to_rgb(BoardRasterRenderer.EDGE_COLOR)
+            flat[layout.face_pixels[h]] = _to_rgb(self.hex_color_map[hex.hex_type])
+            if hex.token_number is not None:
+                flat[layout.token_pixels[h]] = _to_rgb(BoardRasterRenderer.TOKEN_COLOR)
+                self._draw_number(
+                    image,
+                    hex.token_number,
+                    layout.hex_centers[h],
+                    "#FF0000" if hex.token_number in (6, 8) else "#000000",
+                )
+        return image
+
+    def _draw_number(self, image: np.ndarray, number: int, center: np.ndarray, color: str):
+        scale = max(1, round(self.hex_size / 12))
+        digits = [_DIGITS[int(d)] for d in str(number)]
+        # Put the digits side by side with a gap of one bitmap pixel
+        bitmap = np.array(
+            [
+                [c == "#" for c in ".".join(digit[row] for digit in digits)]
+                for row in range(5)
+            ]
+        )
+        bitmap = np.kron(bitmap, np.ones((scale, scale), dtype=bool))
+        top = int(round(center[1] - bitmap.shape[0] / 2))
+        left = int(round(center[0] - bitmap.shape[1] / 2))
+        window = image[top: top + bitmap.shape[0], left: left + bitmap.shape[1]]
+        window[bitmap] = _to_rgb(color)
+
+    def render(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Draw the board as it is now.
+
+        Args:
+            out: The contiguous uint8 array to draw into, with the shape `shape`. Defaults to an array owned by the
+                renderer, which is overwritten by the next render
+        Returns:
+            The image, with shape (height, width, 3)
+        Raises:
+            ValueError: If out is the wrong shape or type, or there are more players than player colors
+        """
+        if out is None:
+            out = self._frame
+        elif out.shape != self.shape or out.dtype != np.uint8 or not out.flags.c_contiguous:
+            raise ValueError("out must be a contiguous uint8 array with shape %s" % (self.shape,))
+        board = self.board
+        layout = self._layout
+        colors = self._player_colors
+        if len(colors) < len(board.players):
+            raise ValueError(
+                "There are %d players but only %d player colors" % (len(board.players), len(colors))
+            )
+        np.copyto(out, self._background)
+        flat = out.reshape(-1, 3)
+        owners = board.path_owners[layout.road_paths]
+        drawn = owners >= 0
+        flat[layout.road_pixels[drawn]] = colors[owners[drawn]]
+        owners = board.intersection_owners[layout.building_intersections]
+        drawn = (owners >= 0) & (
+            layout.building_is_settlement
+            | (
+                board.intersection_types[layout.building_intersections]
+                == BuildingType.CITY.value
+            )
+        )
+        flat[layout.building_pixels[drawn]] = colors[owners[drawn]]
+        flat[layout.robber_pixels[board.hex_indices[board.robber]]] = self._robber_color
+        return out
@@ -1,5 +1,8 @@
 from colored import stylize, fg, bg
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, List, Tuple
+import weakref
+
+import numpy as np
 
 from . import _board
 from ._coords import Coords
@@ -11,10 +14,156 @@ from ._building_type import BuildingType
 from ._hex import Hex
 from .._resource import Resource
 
+# Styling a character is slow compared to everything else in a render, and only a few hundred different styled
+# characters are ever drawn, so each one is only styled once
+_styled: Dict[tuple, str] = {}
+
+
+def _stylize(text, fore: Optional[str], back: str) -> str:
+    key = (text, fore, back)
+    styled = _styled.get(key)
+    if styled is None:
+        styled = _styled[key] = stylize(text, (fg(fore) if fore else "") + bg(back))
+    return styled
+
+
+class _RenderLayout:
+    """Where everything on a board is drawn, shared by every renderer of boards with the same topology.
+
+    The hexes are drawn overlapping each other, so each cell of the grid only records the last thing drawn on it.
+
+    Args:
+        topology: The board's topology
+
+    Attributes:
+        cells (List[List[tuple]]):
+            What is drawn on each cell, as ("water",), ("hex", hex index, position in the center),
+            ("intersection", intersection index, char), ("path", path index, char) or ("harbor", harbor, position)
+        hex_cells (List[List[Tuple[int, int]]]): The (y, x) of the cells drawn for each hex
+        intersection_cells (List[List[Tuple[int, int]]]): The (y, x) of the cells drawn for each intersection
+        path_cells (List[List[Tuple[int, int]]]): The (y, x) of the cells drawn for each path
+        robber_cells (List[Tuple[int, int]]): The (y, x) of the cell the robber is drawn on for each hex
+        draw_order (List[Tuple[int, int]]):
+            Every intersection and path in the order they are first drawn in, as (0, intersection index) or
+            (1, path index)
+        harbor_paths (np.ndarray): Whether each path has a harbor
+        xy (Dict[Coords, Tuple]): The cached results of `BoardRenderer.get_coords_as_xy`
+    """
+
+    SIZE = 20, 55
+    CENTER = int(SIZE[1] / 2) - 3, int(SIZE[0] / 2) - 1
+
+    # The offsets of a hex's intersections, in the order they are drawn in
+    _CORNERS = (
+        Coords(1, -1),
+        Coords(1, 0),
+        Coords(0, 1),
+        Coords(-1, 1),
+        Coords(-1, 0),
+        Coords(0, -1),
+    )
+
+    _layouts = weakref.WeakKeyDictionary()
+
+    def __init__(self, topology):
+        self.cells: List[List[tuple]] = [
+            [("water",)] * _RenderLayout.SIZE[1] for _ in range(_RenderLayout.SIZE[0])
+        ]
+        center = _RenderLayout.CENTER
+        self.draw_order: List[Tuple[int, int]] = []
+        drawn = set()
+        for coords, h in topology.hex_indices.items():
+            x, y = BoardRenderer._get_hex_center_coords(coords)
+            x, y = x + center[0], y + center[1]
+            corners = [
+                topology.intersection_indices[coords + c] for c in _RenderLayout._CORNERS
+            ]
+            paths = [
+                topology.path_indices[
+                    frozenset(
+                        {
+                            topology.intersection_coords[corners[i]],
+                            topology.intersection_coords[corners[(i + 1) % 6]],
+                        }
+                    )
+                ]
+                for i in range(6)
+            ]
+            rows = [
+                [
+                    ("intersection", corners[0], "."),
+                    ("path", paths[0], "-"),
+                    ("path", paths[0], "-"),
+                    ("intersection", corners[1], "'"),
+                    ("path", paths[1], "-"),
+                    ("path", paths[1], "-"),
+                    ("intersection", corners[2], "."),
+                ],
+                [("path", paths[5], "|")]
+                + [("hex", h, i) for i in range(5)]
+                + [("path", paths[2], "|")],
+                [
+                    ("intersection", corners[5], "'"),
+                    ("path", paths[4], "-"),
+                    ("path", paths[4], "-"),
+                    ("intersection", corners[4], "."),
+                    ("path", paths[3], "-"),
+                    ("path", paths[3], "-"),
+                    ("intersection", corners[3], "'"),
+                ],
+            ]
+            for i, row in enumerate(rows):
+                self.cells[y + i][x: x + len(row)] = row
+            for cell in rows[0] + rows[1] + rows[2]:
+                element = (0 if cell[0] == "intersection" else 1, cell[1])
+                if cell[0] != "hex" and element not in drawn:
+                    drawn.add(element)
+                    self.draw_order.append(element)
+        for harbor in topology.harbors.values():
+            x, y = BoardRenderer._get_harbor_coords(topology.hexes, harbor)
+            x, y = x + center[0], y + center[1]
+            self.cells[y][x: x + 3] = [("harbor", harbor, i) for i in range(3)]
+        self.hex_cells: List[List[Tuple[int, int]]] = [[] for _ in topology.hex_coords]
+        self.intersection_cells: List[List[Tuple[int, int]]] = [
+            [] for _ in topology.intersection_coords
+        ]
+        self.path_cells: List[List[Tuple[int, int]]] = [[] for _ in topology.path_coords]
+        tables = {
+            "hex": self.hex_cells,
+            "intersection": self.intersection_cells,
+            "path": self.path_cells,
+        }
+        for y, row in enumerate(self.cells):
+            for x, cell in enumerate(row):
+                if cell[0] in tables:
+                    tables[cell[0]][cell[1]].append((y, x))
+        self.robber_cells: List[Tuple[int, int]] = [cells[3] for cells in self.hex_cells]
+        self.harbor_paths: np.ndarray = np.array(
+            [p in topology.harbors for p in topology.path_coords], dtype=bool
+        )
+        self.xy: Dict[Coords, Tuple] = {}
+
+    @staticmethod
+    def get(topology) -> "_RenderLayout":
+        """Get the layout for a topology, building it the first time the topology is rendered.
+
+        Args:
+            topology: The board's topology
+        Returns:
+            The shared layout
+        """
+        layout = _RenderLayout._layouts.get(topology)
+        if layout is None:
+            layout = _RenderLayout._layouts[topology] = _RenderLayout(topology)
+        return layout
+
 
 class BoardRenderer:
     """Class for rendering a board in the terminal and configuring its appearance.
 
+    The rendered board is kept between renders, and only the cells of the buildings and robber that have changed since
+    the last render are redrawn. Changes to the color maps after the first render are not picked up.
+
     Args:
         board: The board to render
         player_color_map:
@@ -54,114 +203,90 @@ class BoardRenderer:
         resource_color_map: Optional[Dict[Resource, str]] = DEFAULT_RESOURCE_COLORS,
     ):
         self.board = board
-        self._unused_player_colors = BoardRenderer.DEFAULT_PLAYER_COLORS
+        # Copied so that every renderer can hand out all the colors
+        self._unused_player_colors = list(BoardRenderer.DEFAULT_PLAYER_COLORS)
         self.player_color_map = player_color_map
         self.hex_color_map = hex_color_map
         self.resource_color_map = resource_color_map
+        # The last render, as the styled cells and the joined rows, and the state of the board it shows
+        self._rendered_board: Optional[_board.Board] = None
+        self._cells: List[List[str]] = []
+        self._rows: List[Optional[str]] = []
+        self._intersection_owners: Optional[np.ndarray] = None
+        self._intersection_types: Optional[np.ndarray] = None
+        self._path_owners: Optional[np.ndarray] = None
+        self._robber: Optional[int] = None
 
     def _get_player_color(self, player: Player):
         if player not in self.player_color_map:
             self.player_color_map[player] = self._unused_player_colors.pop(0)
         return self.player_color_map[player]
 
-    def _get_path(self, chars, path, path_labels):
+    def _get_path(self, char: str, path: int, label: Optional[str] = None) -> str:
         fore = "#9c7500"
         back = self.hex_color_map[HexType.DESERT]
-        if path.building is not None:
-            fore = self._get_player_color(path.building.owner)
-        elif frozenset(path.path_coords) in self.board.harbors:
+        owner = self.board.path_owners[path]
+        if owner >= 0:
+            fore = self._get_player_color(self.board.players[owner])
+        elif self._layout.harbor_paths[path]:
             fore = "#000000"
-        if path in path_labels:
-            chars = [path_labels[path]] * len(chars)
-        return list(map(lambda x: stylize(x, fg(fore) + bg(back)), chars))
+        if label is not None:
+            char = label
+        return _stylize(char, fore, back)
 
-    def _get_intersection(self, char, intersection, intersection_labels):
+    def _get_intersection(self, char: str, intersection: int, label: Optional[str] = None) -> str:
         fore = "#9c7500"
         back = self.hex_color_map[HexType.DESERT]
-        if intersection in intersection_labels:
-            return [
-                stylize(intersection_labels[intersection], fg("#000000") + bg(back))
-            ]
-        if intersection.building is not None:
-            fore = self._get_player_color(intersection.building.owner)
+        if label is not None:
+            return _stylize(label, "#000000", back)
+        owner = self.board.intersection_owners[intersection]
+        if owner >= 0:
+            fore = self._get_player_color(self.board.players[owner])
             char = (
                 "s"
-                if intersection.building.building_type is BuildingType.SETTLEMENT
+                if self.board.intersection_types[intersection] == BuildingType.SETTLEMENT.value
                 else "c"
             )
-        return [stylize(char, fg(fore) + bg(back))]
-
-    def _get_hex_center(self, h, hex_labels):
-        space = stylize(" ", bg(self.hex_color_map[h.hex_type]))
-        if h in hex_labels:
-            return [space, space, hex_labels[h], space, space]
-        if h.token_number is None:
-            return [space] * 5
+        return _stylize(char, fore, back)
+
+    def _get_hex_center(self, h: Hex, position: int, label: Optional[str] = None) -> str:
+        space = _stylize(" ", None, self.hex_color_map[h.hex_type])
+        if label is not None:
+            return label if position == 2 else space
+        if h.token_number is None or position not in (1, 2):
+            return space
+        if position == 1:
+            return space if h.token_number < 10 else ""
         token_color = (
             "#FF0000" if h.token_number == 6 or h.token_number == 8 else "#000000"
         )
-        token_chars = [space if h.token_number < 10 else ""] + [
-            stylize(h.token_number, fg(token_color) + bg("#FFFFFF"))
-        ]
-        return [space] + [t for t in token_chars] + [space, space]
-
-    def _get_hex(self, coords, hex_labels, intersection_labels, path_labels):
-        intersection_coords = [
-            c + coords
-            for c in (
-                Coords(1, -1),
-                Coords(1, 0),
-                Coords(0, 1),
-                Coords(-1, 1),
-                Coords(-1, 0),
-                Coords(0, -1),
-            )
-        ]
-        intersections = [self.board.intersections[c] for c in intersection_coords]
-        paths = [
-            self.board.paths[
-                frozenset(
-                    {
-                        intersection_coords[i],
-                        intersection_coords[(i + 1) % len(intersection_coords)],
-                    }
-                )
-            ]
-            for i in range(len(intersection_coords))
-        ]
-        return [
-            self._get_intersection(".", intersections[0], intersection_labels)
-            + self._get_path(["-", "-"], paths[0], path_labels)
-            + self._get_intersection("'", intersections[1], intersection_labels)
-            + self._get_path(["-", "-"], paths[1], path_labels)
-            + self._get_intersection(".", intersections[2], intersection_labels),
-            self._get_path(["|"], paths[5], path_labels)
-            + self._get_hex_center(self.board.hexes[coords], hex_labels)
-            + self._get_path(["|"], paths[2], path_labels),
-            self._get_intersection("'", intersections[5], intersection_labels)
-            + self._get_path(["-", "-"], paths[4], path_labels)
-            + self._get_intersection(".", intersections[4], intersection_labels)
-            + self._get_path(["-", "-"], paths[3], path_labels)
-            + self._get_intersection("'", intersections[3], intersection_labels),
-        ]
-
-    def _stylize_arr(self, arr, styles):
-        return [stylize(s, styles) for s in arr]
+        return _stylize(h.token_number, token_color, "#FFFFFF")
 
-    def _get_harbor(self, harbor):
+    def _get_harbor(self, harbor, position: int) -> str:
         fore = (
             "#FFFFFF"
             if harbor.resource is None
             else self.resource_color_map[harbor.resource]
         )
-        return [
-            self._stylize_arr(
-                ["3" if harbor.resource is None else "2", ":", "1"],
-                fg(fore) + bg(BoardRenderer.WATER_COLOR),
+        char = ("3" if harbor.resource is None else "2", ":", "1")[position]
+        return _stylize(char, fore, BoardRenderer.WATER_COLOR)
+
+    def _get_cell(self, cell: tuple) -> str:
+        kind = cell[0]
+        if kind == "intersection":
+            return self._get_intersection(cell[2], cell[1])
+        if kind == "path":
+            return self._get_path(cell[2], cell[1])
+        if kind == "hex":
+            return self._get_hex_center(
+                self.board.hexes[self.board.hex_coords[cell[1]]], cell[2]
             )
-        ]
+        if kind == "harbor":
+            return self._get_harbor(cell[1], cell[2])
+        return _stylize(" ", None, BoardRenderer.WATER_COLOR)
 
-    def _get_harbor_coords(self, harbor):
+    @staticmethod
+    def _get_harbor_coords(hexes, harbor):
         connected_coords = [
             [c + coord for c in Hex.CONNECTED_CORNER_OFFSETS]
             for coord in harbor.path_coords
@@ -169,17 +294,13 @@ class BoardRenderer:
         overlap = [
             c
             for c in connected_coords[0]
-            if c in connected_coords[1] and c not in self.board.hexes
+            if c in connected_coords[1] and c not in hexes
         ]
-        hex_coords = self._get_hex_center_coords(overlap[0])
+        hex_coords = BoardRenderer._get_hex_center_coords(overlap[0])
         return (hex_coords[0] + 2, hex_coords[1] + 1)
 
-    def _copy_into_array(self, buf, to_copy, x, y):
-        for i in range(len(to_copy)):
-            for j in range(len(to_copy[i])):
-                buf[y + i][x + j] = to_copy[i][j]
-
-    def _get_hex_center_coords(self, coords):
+    @staticmethod
+    def _get_hex_center_coords(coords):
         return ((int)(3 * coords.r), -(int)(1.34 * coords.q + 0.67 * coords.r))
 
     def get_coords_as_xy(self, coords: Coords) -> Tuple:
@@ -190,9 +311,13 @@ class BoardRenderer:
         Returns:
             The (x, y) position
         """
+        xy_table = _RenderLayout.get(self.board.topology).xy
+        xy = xy_table.get(coords)
+        if xy is not None:
+            return xy
         if coords in self.board.hexes:
             x, y = self._get_hex_center_coords(coords)
-            return (x + 2, y + 1)
+            xy = (x + 2, y + 1)
         elif coords in self.board.intersections:
             h = list(self.board.get_hexes_connected_to_intersection(coords))[0]
             y, x = {
@@ -204,8 +329,59 @@ class BoardRenderer:
                 Coords(1, -1): (0, 0),
             }[coords - h]
             hy, hx = self._get_hex_center_coords(h)
-            return (x + hx, y + hy)
-        return 0, 0
+            xy = (x + hx, y + hy)
+        else:
+            return 0, 0
+        xy_table[coords] = xy
+        return xy
+
+    def _set_cells(self, cells: List[Tuple[int, int]]):
+        for y, x in cells:
+            self._cells[y][x] = self._get_cell(self._layout.cells[y][x])
+            self._rows[y] = None
+
+    def _assign_player_colors(self):
+        """Give colors to the players who don't have one yet, in the order the buildings are drawn in."""
+        owners = (self.board.intersection_owners, self.board.path_owners)
+        for kind, index in self._layout.draw_order:
+            owner = owners[kind][index]
+            if owner >= 0:
+                self._get_player_color(self.board.players[owner])
+
+    def _update(self):
+        """Bring the last render up to date with the board, only redrawing the cells that have changed."""
+        board = self.board
+        if self._rendered_board is not board:
+            self._layout = _RenderLayout.get(board.topology)
+            self._assign_player_colors()
+            self._cells = [[self._get_cell(cell) for cell in row] for row in self._layout.cells]
+            self._rows = [None] * len(self._cells)
+            self._rendered_board = board
+            self._robber = None
+        else:
+            changed = (board.intersection_owners != self._intersection_owners) | (
+                board.intersection_types != self._intersection_types
+            )
+            intersections = np.flatnonzero(changed).tolist()
+            paths = np.flatnonzero(board.path_owners != self._path_owners).tolist()
+            owners = board.intersection_owners[intersections].tolist() + board.path_owners[paths].tolist()
+            if any(o >= 0 and board.players[o] not in self.player_color_map for o in owners):
+                self._assign_player_colors()
+            for i in intersections:
+                self._set_cells(self._layout.intersection_cells[i])
+            for p in paths:
+                self._set_cells(self._layout.path_cells[p])
+        self._intersection_owners = board.intersection_owners.copy()
+        self._intersection_types = board.intersection_types.copy()
+        self._path_owners = board.path_owners.copy()
+        robber = board.hex_indices[board.robber]
+        if robber != self._robber:
+            if self._robber is not None:
+                self._set_cells([self._layout.robber_cells[self._robber]])
+            self._robber = robber
+            y, x = self._layout.robber_cells[robber]
+            self._cells[y][x] = _stylize("R", "#FFFFFF", "#000000")
+            self._rows[y] = None
 
     def get_board_as_string(
         self,
@@ -223,38 +399,39 @@ class BoardRenderer:
         Returns:
             str: The board as a string
         """
-        size = 20, 55
-        buf = [
-            [stylize(" ", bg(BoardRenderer.WATER_COLOR)) for j in range(size[1])]
-            for i in range(size[0])
-        ]
-
-        center = int(size[1] / 2) - 3, int(size[0] / 2) - 1
+        self._update()
+        for y, row in enumerate(self._rows):
+            if row is None:
+                self._rows[y] = "".join(self._cells[y])
+        if not (hex_labels or intersection_labels or path_labels):
+            return "\n".join(self._rows)
+        # Draw the labels over a copy of the rows they are on, leaving the last render as it was
+        cells = {}
+        layout = self._layout
+        robber = layout.robber_cells[self._robber]
 
-        for hex_coords in self.board.hexes:
-            x, y = self._get_hex_center_coords(hex_coords)
-            self._copy_into_array(
-                buf,
-                self._get_hex(hex_coords, hex_labels, intersection_labels, path_labels),
-                center[0] + x,
-                center[1] + y,
-            )
-        for harbor in self.board.harbors.values():
-            x, y = self._get_harbor_coords(harbor)
-            self._copy_into_array(
-                buf, self._get_harbor(harbor), center[0] + x, center[1] + y
-            )
+        def draw(y, x, styled):
+            if (y, x) != robber:
+                if y not in cells:
+                    cells[y] = list(self._cells[y])
+                cells[y][x] = styled
 
-        x, y = self._get_hex_center_coords(self.board.robber)
-        self._copy_into_array(
-            buf,
-            [[stylize("R", fg("#FFFFFF") + bg("#000000"))]],
-            center[0] + x + 4,
-            center[1] + y + 1,
+        for h, label in hex_labels.items():
+            index = self.board.hex_indices[h.coords]
+            for y, x in layout.hex_cells[index]:
+                draw(y, x, self._get_hex_center(h, layout.cells[y][x][2], label))
+        for intersection, label in intersection_labels.items():
+            index = self.board.intersection_indices[intersection.coords]
+            for y, x in layout.intersection_cells[index]:
+                draw(y, x, self._get_intersection(layout.cells[y][x][2], index, label))
+        for path, label in path_labels.items():
+            index = self.board.path_indices[frozenset(path.path_coords)]
+            for y, x in layout.path_cells[index]:
+                draw(y, x, self._get_path(layout.cells[y][x][2], index, label))
+        return "\n".join(
+            "".join(cells[y]) if y in cells else row for y, row in enumerate(self._rows)
         )
 
-        return "\n".join(["".join(row) for row in buf])
-
     def render_board(
         self,
         hex_labels: Optional[Dict[Hex, str]] = {},
@@ -270,3 +447,4 @@ class BoardRenderer:
         """
         buf = self.get_board_as_string(hex_labels, intersection_labels, path_labels)
         print(buf)
+
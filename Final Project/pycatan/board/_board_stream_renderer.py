@@ -0,0 +1,189 @@
+from typing import Dict, List, Optional, Sequence, TextIO
+import re
+import sys
+
+from . import _board
+from ._board_renderer import BoardRenderer, _RenderLayout
+
+_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+# How many columns each styled cell takes up on the terminal
+_widths: Dict[str, int] = {}
+
+
+def _get_width(cell: str) -> int:
+    width = _widths.get(cell)
+    if width is None:
+        width = _widths[cell] = len(_ESCAPE.sub("", cell))
+    return width
+
+
+class BoardStreamRenderer:
+    """Class for watching one or more live games in the terminal, by only redrawing the parts of the boards that change.
+
+    The boards are tiled across the terminal, each drawn with a `BoardRenderer`. The last frame written to the terminal
+    is kept, and each new frame is written as ANSI cursor moves followed by the cells that have changed since then.
+
+    Args:
+        boards: The boards to show
+        columns: How many boards to put side by side. Defaults to 1
+        max_bytes_per_frame:
+            The most bytes to write in one frame. Changes that don't fit are written in the following frames. Defaults
+            to None, which writes every change straight away
+        top: The terminal row to put the top of the first board on, starting from 1. Defaults to 1
+        left: The terminal column to put the left of the first board on, starting from 1. Defaults to 1
+
+    Attributes:
+        renderers (List[BoardRenderer]): The renderer used for each board
+
+    Raises:
+        ValueError: If max_bytes_per_frame is less than MIN_BYTES_PER_FRAME
+    """
+
+    # The gap between the tiled boards, in rows and columns
+    TILE_GAP = 1, 2
+    # Enough for clearing the screen and writing at least one cell
+    MIN_BYTES_PER_FRAME = 128
+
+    def __init__(
+        self,
+        boards: Sequence[_board.Board],
+        columns: Optional[int] = 1,
+        max_bytes_per_frame: Optional[int] = None,
+        top: Optional[int] = 1,
+        left: Optional[int] = 1,
+    ):
+        if (
+            max_bytes_per_frame is not None
+            and max_bytes_per_frame < BoardStreamRenderer.MIN_BYTES_PER_FRAME
+        ):
+            raise ValueError(
+                "max_bytes_per_frame must be at least %d" % BoardStreamRenderer.MIN_BYTES_PER_FRAME
+            )
+        self.renderers: List[BoardRenderer] = [
+            BoardRenderer(board, player_color_map={}) for board in boards
+        ]
+        self.columns = columns
+        self.max_bytes_per_frame = max_bytes_per_frame
+        self.top = top
+        self.left = left
+        # What is on the terminal in each cell of each board, or None if it hasn't been drawn yet
+        self._screen: List[List[List[Optional[str]]]] = [
+            [[None] * _RenderLayout.SIZE[1] for _ in range(_RenderLayout.SIZE[0])]
+            for _ in self.renderers
+        ]
+        self._cleared = False
+        # The board to start writing from in the next frame, so that no board is starved when the frames are full
+        self._next_tile = 0
+
+    def set_board(self, index: int, board: _board.Board):
+        """Show a different board in one of the tiles, i.e. after a game has been reset.
+
+        Only the cells that differ from the old board are written in the next frame.
+
+        Args:
+            index: The index of the tile
+            board: The new board
+        """
+        self.renderers[index] = BoardRenderer(board, player_color_map={})
+
+    def _get_position(self, index: int):
+        row, column = divmod(index, self.columns)
+        return (
+            self.top + row * (_RenderLayout.SIZE[0] + BoardStreamRenderer.TILE_GAP[0]),
+            self.left + column * (_RenderLayout.SIZE[1] + BoardStreamRenderer.TILE_GAP[1]),
+        )
+
+    def get_frame(self) -> str:
+        """Get the ANSI sequences to bring the terminal up to date with the boards.
+
+        The frame is assumed to be written to the terminal, so the next frame only contains what has changed since this
+        one.
+
+        Returns:
+            The sequences to write to the terminal, or an empty string if nothing has changed
+        """
+        num_tiles = len(self.renderers)
+        bottom = "\x1b[%d;1H" % (self._get_position(num_tiles - 1)[0] + _RenderLayout.SIZE[0])
+        # Leave room for moving the cursor below the boards at the end
+        budget = None
+        if self.max_bytes_per_frame is not None:
+            budget = self.max_bytes_per_frame - len(bottom)
+        parts = []
+        used = 0
+        if not self._cleared:
+            parts.append("\x1b[2J")
+            used += len(parts[0])
+            self._cleared = True
+        start = self._next_tile
+        self._next_tile = (start + 1) % num_tiles
+        for i in [(start + k) % num_tiles for k in range(num_tiles)]:
+            renderer = self.renderers[i]
+            renderer._update()
+            top, left = self._get_position(i)
+            for y, (row, screen_row) in enumerate(zip(renderer._cells, self._screen[i])):
+                if row == screen_row:
+                    continue
+                for x, end, moved in self._get_changed_runs(row, screen_row):
+                    move = "\x1b[%d;%dH" % (top + y, left + sum(map(_get_width, row[:x])))
+                    cut = end
+                    if budget is not None:
+                        # Write as much of the run as fits
+                        size = used + len(move)
+                        for cut in range(x, end):
+                            size += len(row[cut])
+                            if size > budget:
+                                break
+                        else:
+                            cut = end
+                    if cut > x:
+                        parts.append(move + "".join(row[x:cut]))
+                        used += len(parts[-1])
+                        screen_row[x:cut] = row[x:cut]
+                        if moved:
+                            # The cells after the ones written have moved on the terminal, so have to be rewritten
+                            screen_row[cut:] = [None] * (len(row) - cut)
+                    if cut < end:
+                        # Pick up from this board in the next frame
+                        self._next_tile = i
+                        return "".join(parts) + bottom if parts else ""
+        if parts:
+            parts.append(bottom)
+        return "".join(parts)
+
+    @staticmethod
+    def _get_changed_runs(row: List[str], screen_row: List[Optional[str]]):
+        """Find the runs of cells in a row that differ from the screen.
+
+        Returns:
+            The start and end of each run, and whether the cells after it have moved on the terminal
+        """
+        runs = []
+        x = 0
+        while x < len(row):
+            if row[x] == screen_row[x]:
+                x += 1
+                continue
+            start = x
+            moved = False
+            while x < len(row) and row[x] != screen_row[x]:
+                if screen_row[x] is not None and _get_width(row[x]) != _get_width(screen_row[x]):
+                    # Everything after this cell moves on the terminal, so the rest of the row has to be rewritten
+                    x = len(row)
+                    moved = True
+                    break
+                x += 1
+            runs.append((start, x, moved))
+        return runs
+
+    def render_frame(self, stream: Optional[TextIO] = None):
+        """Write the next frame to the terminal.
+
+        Args:
+            stream: Where to write the frame. Defaults to sys.stdout
+        """
+        if stream is None:
+            stream = sys.stdout
+        frame = self.get_frame()
+        if frame:
+            stream.write(frame)
+            stream.flush()
@@ -0,0 +1,410 @@
+from typing import Dict, Iterable, List, Set, Optional, FrozenSet, Tuple
+from itertools import product
+import struct
+
+import numpy as np
+
+from ._coords import Coords
+from ._hex import Hex
+from ._hex_type import HexType
+from ._intersection import Intersection
+from ._harbor import Harbor
+from .._resource import Resource
+
+_SIZES = struct.Struct("<BB")
+_HEX = struct.Struct("<bbBB")
+_HARBOR = struct.Struct("<bbbbB")
+
+
+class _BoardGeometry:
+    """The parts of a topology that only depend on which hexes are on the board, shared by every layout of those hexes.
+
+    See BoardTopology for the attributes.
+
+    Args:
+        hex_coords: The coordinates of the hexes
+    """
+
+    _cache: Dict[FrozenSet[Coords], "_BoardGeometry"] = {}
+
+    def __init__(self, hex_coords: Iterable[Coords]):
+        # Gather the points around each hex into a set
+        intersection_coords = set(
+            map(
+                lambda x: x[0] + x[1],
+                list(product(*[hex_coords, Hex.CONNECTED_CORNER_OFFSETS])),
+            )
+        )
+        # Number the hexes, intersections and paths
+        self.hex_coords: Tuple[Coords, ...] = tuple(
+            sorted(hex_coords, key=lambda c: (c.q, c.r))
+        )
+        self.hex_indices: Dict[Coords, int] = {
+            c: i for i, c in enumerate(self.hex_coords)
+        }
+        self.intersection_coords: Tuple[Coords, ...] = tuple(
+            sorted(intersection_coords, key=lambda c: (c.q, c.r))
+        )
+        self.intersection_indices: Dict[Coords, int] = {
+            c: i for i, c in enumerate(self.intersection_coords)
+        }
+        # Now add all the edgges inbetween the intersections we just added
+        self.path_ends: Tuple[Tuple[int, int], ...] = tuple(
+            sorted(
+                set(
+                    tuple(sorted((i, self.intersection_indices[c + offset])))
+                    for c, i in self.intersection_indices.items()
+                    for offset in Intersection.CONNECTED_CORNER_OFFSETS
+                    if c + offset in self.intersection_indices
+                )
+            )
+        )
+        self.path_coords: Tuple[FrozenSet[Coords], ...] = tuple(
+            frozenset({self.intersection_coords[a], self.intersection_coords[b]})
+            for a, b in self.path_ends
+        )
+        self.path_indices: Dict[FrozenSet[Coords], int] = {
+            p: i for i, p in enumerate(self.path_coords)
+        }
+        # The adjacency tables
+        intersection_paths: List[List[int]] = [[] for _ in self.intersection_coords]
+        for i, (a, b) in enumerate(self.path_ends):
+            intersection_paths[a].append(i)
+            intersection_paths[b].append(i)
+        self.intersection_paths: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(paths) for paths in intersection_paths
+        )
+        self.intersection_neighbors: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(sum(self.path_ends[p]) - i for p in paths)
+            for i, paths in enumerate(self.intersection_paths)
+        )
+        self.intersection_hexes: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(
+                self.hex_indices[c + offset]
+                for offset in Hex.CONNECTED_CORNER_OFFSETS
+                if c + offset in self.hex_indices
+            )
+            for c in self.intersection_coords
+        )
+        self.hex_intersections: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(
+                self.intersection_indices[c + offset]
+                for offset in Hex.CONNECTED_CORNER_OFFSETS
+            )
+            for c in self.hex_coords
+        )
+        # The adjacency as arrays, for checking the whole board at once. Intersections on the edge of the board have
+        # fewer than 3 paths, so the rows are padded with an index one past the end, which should point at an extra
+        # empty element appended to the array being indexed
+        self.path_end_table: np.ndarray = np.array(self.path_ends, dtype=np.intp)
+        self.intersection_path_table: np.ndarray = self._pad_table(
+            self.intersection_paths, len(self.path_coords)
+        )
+        self.intersection_neighbor_table: np.ndarray = self._pad_table(
+            self.intersection_neighbors, len(self.intersection_coords)
+        )
+        # Where the robber can be moved to from each hex
+        self.other_hex_coords: Tuple[Tuple[Coords, ...], ...] = tuple(
+            self.hex_coords[:h] + self.hex_coords[h + 1:]
+            for h in range(len(self.hex_coords))
+        )
+        self.other_hex_indices: Tuple[np.ndarray, ...] = tuple(
+            np.delete(np.arange(len(self.hex_coords)), h)
+            for h in range(len(self.hex_coords))
+        )
+        symmetries = self._find_symmetries()
+        self.hex_symmetries: np.ndarray = np.array([s[0] for s in symmetries], dtype=np.intp)
+        self.intersection_symmetries: np.ndarray = np.array(
+            [s[1] for s in symmetries], dtype=np.intp
+        )
+        self.path_symmetries: np.ndarray = np.array([s[2] for s in symmetries], dtype=np.intp)
+        for table in (
+            self.path_end_table,
+            self.intersection_path_table,
+            self.intersection_neighbor_table,
+            self.hex_symmetries,
+            self.intersection_symmetries,
+            self.path_symmetries,
+        ) + self.other_hex_indices:
+            table.flags.writeable = False
+
+    @staticmethod
+    def get(hex_coords: Iterable[Coords]) -> "_BoardGeometry":
+        """Get the geometry for a set of hexes, building it the first time the hexes are seen.
+
+        Args:
+            hex_coords: The coordinates of the hexes
+        Returns:
+            The shared geometry
+        """
+        key = frozenset(hex_coords)
+        geometry = _BoardGeometry._cache.get(key)
+        if geometry is None:
+            geometry = _BoardGeometry(key)
+            _BoardGeometry._cache[key] = geometry
+        return geometry
+
+    def _find_symmetries(self) -> List[Tuple[List[int], List[int], List[int]]]:
+        """Find the rotations and reflections around (0, 0) that map the hexes onto themselves.
+
+        Returns:
+            The index each hex, intersection and path is moved to by each symmetry, starting with the identity
+        """
+        symmetries = []
+        for reflect in (False, True):
+            for rotations in range(6):
+
+                def transform(c: Coords) -> Coords:
+                    q, r = (c.r, c.q) if reflect else (c.q, c.r)
+                    # Rotate 60 degrees around the origin
+                    for _ in range(rotations):
+                        q, r = -r, q + r
+                    return Coords(q, r)
+
+                hexes = [self.hex_indices.get(transform(c)) for c in self.hex_coords]
+                if None in hexes:
+                    continue
+                intersections = [
+                    self.intersection_indices[transform(c)] for c in self.intersection_coords
+                ]
+                paths = [
+                    self.path_indices[frozenset(transform(c) for c in p)]
+                    for p in self.path_coords
+                ]
+                symmetries.append((hexes, intersections, paths))
+        return symmetries
+
+    @staticmethod
+    def _pad_table(rows: Tuple[Tuple[int, ...], ...], pad: int) -> np.ndarray:
+        width = max(len(row) for row in rows)
+        return np.array([row + (pad,) * (width - len(row)) for row in rows], dtype=np.intp)
+
+
+class BoardTopology:
+    """The parts of a Catan board that never change during a game.
+
+    Holds the coordinates, the dense numbering of the hexes, intersections and paths, the adjacency between them, the
+    hex types and tokens, and the harbors. A topology is built once per layout and shared by every board using that
+    layout, so use `BoardTopology.get` rather than the constructor. Nothing in a topology should be modified.
+
+    The hexes, intersections and paths are numbered by sorting them by their coordinates.
+
+    Args:
+        hexes: The hexes on the board
+        harbors: The harbors on the board
+
+    Attributes:
+        hexes (Dict[Coords, Hex]): The hexes, keyed by their coordinates, in index order
+        harbors (Dict[frozenset[Coords], Harbor]): The harbors, keyed by the coords of the path they are attached to
+        desert (Coords): The coordinates of the first desert hex, or None if there are none
+        hex_coords (Tuple[Coords]): The coordinates of the hexes, in index order
+        intersection_coords (Tuple[Coords]): The coordinates of the intersections, in index order
+        path_coords (Tuple[frozenset[Coords]]): The coordinates of the paths, in index order
+        hex_indices (Dict[Coords, int]): The index of each hex, keyed by its coordinates
+        intersection_indices (Dict[Coords, int]): The index of each intersection, keyed by its coordinates
+        path_indices (Dict[frozenset[Coords], int]): The index of each path, keyed by its coordinates
+        path_ends (Tuple[Tuple[int, int]]): The indices of the two intersections each path connects
+        intersection_paths (Tuple[Tuple[int, ...]]): The indices of the paths attached to each intersection
+        intersection_neighbors (Tuple[Tuple[int, ...]]): The indices of the intersections one path away from each intersection
+        intersection_hexes (Tuple[Tuple[int, ...]]): The indices of the hexes around each intersection
+        hex_intersections (Tuple[Tuple[int, ...]]): The indices of the six intersections around each hex
+        intersection_harbors (Tuple[Tuple[Harbor, ...]]): The harbors each intersection is connected to
+        roll_sources (Dict[int, Tuple[Tuple[int, Hex, Resource], ...]]):
+            The intersections that receive resources for each roll, as (intersection index, hex, resource)
+        path_end_table (np.ndarray): path_ends as an array with shape (paths, 2)
+        intersection_path_table (np.ndarray):
+            intersection_paths as an array with shape (intersections, 3), padded with the number of paths
+        intersection_neighbor_table (np.ndarray):
+            intersection_neighbors as an array with shape (intersections, 3), padded with the number of intersections
+        other_hex_coords (Tuple[Tuple[Coords, ...]]): The coordinates of every hex except each hex, in index order
+        other_hex_indices (Tuple[np.ndarray]): The indices of every hex except each hex
+        hex_symmetries (np.ndarray):
+            The rotations and reflections that map the layout onto itself (including the hex types, tokens and harbors),
+            as the index each hex is moved to with shape (symmetries, hexes). The first row is the identity
+        intersection_symmetries (np.ndarray): The same symmetries as the index each intersection is moved to
+        path_symmetries (np.ndarray): The same symmetries as the index each path is moved to
+    """
+
+    # Random boards rarely repeat, so only keep the most recently used layouts
+    _CACHE_SIZE = 64
+    _cache: Dict[Tuple, "BoardTopology"] = {}
+    _bytes_cache: Dict[bytes, "BoardTopology"] = {}
+
+    def __init__(self, hexes: Set[Hex], harbors: Set[Harbor]):
+        geometry = _BoardGeometry.get(h.coords for h in hexes)
+        self.hex_coords = geometry.hex_coords
+        self.hex_indices = geometry.hex_indices
+        self.intersection_coords = geometry.intersection_coords
+        self.intersection_indices = geometry.intersection_indices
+        self.path_coords = geometry.path_coords
+        self.path_indices = geometry.path_indices
+        self.path_ends = geometry.path_ends
+        self.intersection_paths = geometry.intersection_paths
+        self.intersection_neighbors = geometry.intersection_neighbors
+        self.intersection_hexes = geometry.intersection_hexes
+        self.hex_intersections = geometry.hex_intersections
+        self.path_end_table = geometry.path_end_table
+        self.intersection_path_table = geometry.intersection_path_table
+        self.intersection_neighbor_table = geometry.intersection_neighbor_table
+        self.other_hex_coords = geometry.other_hex_coords
+        self.other_hex_indices = geometry.other_hex_indices
+
+        hexes_by_coords = {h.coords: h for h in hexes}
+        self.hexes: Dict[Coords, Hex] = {c: hexes_by_coords[c] for c in self.hex_coords}
+        self.harbors: Dict[FrozenSet[Coords], Harbor] = {
+            frozenset(h.path_coords): h for h in harbors
+        }
+        self._bytes: Optional[bytes] = None
+        self.desert: Optional[Coords] = next(
+            (h.coords for h in self.hexes.values() if h.hex_type == HexType.DESERT),
+            None,
+        )
+        intersection_harbors: List[List[Harbor]] = [[] for _ in self.intersection_coords]
+        for harbor in self.harbors.values():
+            for c in harbor.path_coords:
+                if c in self.intersection_indices:
+                    intersection_harbors[self.intersection_indices[c]].append(harbor)
+        self.intersection_harbors: Tuple[Tuple[Harbor, ...], ...] = tuple(
+            tuple(h) for h in intersection_harbors
+        )
+        roll_sources: Dict[int, List[Tuple[int, Hex, Resource]]] = {}
+        for h, hex in enumerate(self.hexes.values()):
+            if hex.token_number is None:
+                continue
+            for i in self.hex_intersections[h]:
+                roll_sources.setdefault(hex.token_number, []).append(
+                    (i, hex, hex.hex_type.get_resource())
+                )
+        self.roll_sources: Dict[int, Tuple[Tuple[int, Hex, Resource], ...]] = {
+            roll: tuple(sources) for roll, sources in roll_sources.items()
+        }
+        # Only keep the symmetries of the hexes that also keep the hex types, tokens and harbors the same
+        hex_types = np.array([h.hex_type.value for h in self.hexes.values()])
+        tokens = np.array([h.token_number or 0 for h in self.hexes.values()])
+        harbor_resources = np.full(len(self.path_coords), -2)
+        for path, harbor in self.harbors.items():
+            if path in self.path_indices:
+                harbor_resources[self.path_indices[path]] = (
+                    -1 if harbor.resource is None else harbor.resource.value
+                )
+        hex_symmetries = geometry.hex_symmetries
+        path_symmetries = geometry.path_symmetries
+        valid = (
+            (hex_types[hex_symmetries] == hex_types).all(axis=1)
+            & (tokens[hex_symmetries] == tokens).all(axis=1)
+            & (harbor_resources[path_symmetries] == harbor_resources).all(axis=1)
+        )
+        self.hex_symmetries: np.ndarray = hex_symmetries[valid]
+        self.intersection_symmetries: np.ndarray = geometry.intersection_symmetries[valid]
+        self.path_symmetries: np.ndarray = path_symmetries[valid]
+        for table in (
+            self.hex_symmetries,
+            self.intersection_symmetries,
+            self.path_symmetries,
+        ):
+            table.flags.writeable = False
+
+    @staticmethod
+    def get(hexes: Set[Hex], harbors: Optional[Set[Harbor]] = None) -> "BoardTopology":
+        """Get the topology for a layout, building it the first time the layout is seen.
+
+        Args:
+            hexes: The hexes on the board
+            harbors: The harbors on the board
+        Returns:
+            The topology shared by all boards with this layout
+        """
+        if harbors is None:
+            harbors = set()
+        key = (
+            tuple(
+                sorted(
+                    (h.coords.q, h.coords.r, h.hex_type.value, h.token_number or 0)
+                    for h in hexes
+                )
+            ),
+            tuple(
+                sorted(
+                    (
+                        tuple(sorted((c.q, c.r) for c in h.path_coords)),
+                        -1 if h.resource is None else h.resource.value,
+                    )
+                    for h in harbors
+                )
+            ),
+        )
+        topology = BoardTopology._cache.get(key)
+        if topology is None:
+            topology = BoardTopology(hexes, harbors)
+        BoardTopology._cache_topology(BoardTopology._cache, key, topology)
+        return topology
+
+    @staticmethod
+    def _cache_topology(cache: Dict, key, topology: "BoardTopology"):
+        """Add a topology to the end of a cache, removing the least recently used topology if it is full."""
+        cache.pop(key, None)
+        if len(cache) >= BoardTopology._CACHE_SIZE:
+            del cache[next(iter(cache))]
+        cache[key] = topology
+
+    def to_bytes(self) -> bytes:
+        """Encode the layout (the hexes and harbors) in a compact binary format.
+
+        Layouts that are the same give the same bytes. Decode with `BoardTopology.from_bytes`.
+
+        Returns:
+            The encoded layout
+        """
+        if self._bytes is None:
+            harbors = sorted(
+                (sorted((c.q, c.r) for c in path), harbor.resource)
+                for path, harbor in self.harbors.items()
+            )
+            self._bytes = b"".join(
+                [_SIZES.pack(len(self.hexes), len(harbors))]
+                + [
+                    _HEX.pack(c.q, c.r, h.hex_type.value, h.token_number or 0)
+                    for c, h in self.hexes.items()
+                ]
+                + [
+                    _HARBOR.pack(*a, *b, 255 if resource is None else resource.value)
+                    for (a, b), resource in harbors
+                ]
+            )
+        return self._bytes
+
+    @staticmethod
+    def from_bytes(data: bytes) -> "BoardTopology":
+        """Get the topology for a layout encoded by `BoardTopology.to_bytes`.
+
+        Args:
+            data: The encoded layout
+        Returns:
+            The topology shared by all boards with this layout
+        Raises:
+            ValueError: If the data is not the size given by its header
+        """
+        data = bytes(data)
+        topology = BoardTopology._bytes_cache.get(data)
+        if topology is None:
+            num_hexes, num_harbors = _SIZES.unpack_from(data)
+            if len(data) != _SIZES.size + num_hexes * _HEX.size + num_harbors * _HARBOR.size:
+                raise ValueError("The encoded layout is the wrong size")
+            hexes = set()
+            for q, r, hex_type, token in _HEX.iter_unpack(
+                data[_SIZES.size:_SIZES.size + num_hexes * _HEX.size]
+            ):
+                hexes.add(Hex(Coords(q, r), HexType(hex_type), token or None))
+            harbors = set()
+            for q1, r1, q2, r2, resource in _HARBOR.iter_unpack(
+                data[_SIZES.size + num_hexes * _HEX.size:]
+            ):
+                harbors.add(
+                    Harbor(
+                        path_coords={Coords(q1, r1), Coords(q2, r2)},
+                        resource=None if resource == 255 else Resource(resource),
+                    )
+                )
+            topology = BoardTopology.get(hexes, harbors)
+        BoardTopology._cache_topology(BoardTopology._bytes_cache, data, topology)
+        return topology
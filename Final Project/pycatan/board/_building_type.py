@@ -1,3 +1,4 @@
+from typing import Tuple
 from enum import Enum
 from .._resource import Resource
 
@@ -29,3 +30,23 @@ class BuildingType(Enum):
             }
         elif self == BuildingType.CITY:
             return {Resource.ORE: 3, Resource.GRAIN: 2}
+
+    def get_required_resource_counts(self) -> Tuple[int, ...]:
+        """Get the resources required to build this building, as a count of each resource.
+
+        The counts are precomputed, so this is cheaper than `get_required_resources` for checking whether a player can
+        afford the building.
+
+        Returns:
+            How many of each resource is required to build this building, indexed by the Resource value
+        """
+        return _REQUIRED_RESOURCE_COUNTS[self]
+
+
+_REQUIRED_RESOURCE_COUNTS = {
+    building_type: tuple(
+        building_type.get_required_resources().get(res, 0)
+        for res in Resource
+    )
+    for building_type in BuildingType
+}
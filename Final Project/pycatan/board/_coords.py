@@ -1,3 +1,6 @@
+from typing import Dict, Tuple
+
+
 class Coords:
     """
     A class used to represent coordinates on the Catan board.
@@ -5,29 +8,49 @@ class Coords:
     Stores a coordinate on a triangular grid, so that each
     hex and point both has a unique coord.
 
+    Coords are interned, so creating the same coordinates twice returns the same instance. They should be treated as
+    immutable.
+
     Args:
             q (int): The q coordinate
             r (int): The r coordinate
     """
 
-    def __init__(self, q, r):
-        self.q = q
-        self.r = r
+    __slots__ = ("q", "r", "_hash")
+
+    _interned: Dict[Tuple[int, int], "Coords"] = {}
+
+    def __new__(cls, q, r):
+        key = (q, r)
+        coords = cls._interned.get(key)
+        if coords is None:
+            coords = super().__new__(cls)
+            coords.q = q
+            coords.r = r
+            coords._hash = hash(key)
+            cls._interned[key] = coords
+        return coords
+
+    def __reduce__(self):
+        return (Coords, (self.q, self.r))
 
     def __hash__(self):
-        return hash((self.q, self.r))
+        return self._hash
 
     def __eq__(self, other):
-        return self.q == other.q and self.r == other.r
+        return self is other or (self.q == other.q and self.r == other.r)
 
     def __add__(self, other):
-        return Coords(self.q + other.q, self.r + other.r)
+        key = (self.q + other.q, self.r + other.r)
+        return Coords._interned.get(key) or Coords(*key)
 
     def __sub__(self, other):
-        return Coords(self.q - other.q, self.r - other.r)
+        key = (self.q - other.q, self.r - other.r)
+        return Coords._interned.get(key) or Coords(*key)
 
     def __str__(self):
         return "(q: %d, r:%d)" % (self.q, self.r)
 
     def __repr__(self):
         return self.__str__()
+
@@ -2,16 +2,26 @@ from typing import Set, Optional
 
 from ._coords import Coords
 from ._building import IntersectionBuilding
+from ._building_type import BuildingType
+
+
+# Looking up the enum by value is slow, so index the members by their value instead
+_BUILDING_TYPES = list(BuildingType)
 
 
 class Intersection:
     """A intersection on the Catan board.
 
+    A thin view over the board's arrays; the building is read from the board's owner and building type arrays. The
+    same IntersectionBuilding is returned until the building on the intersection changes.
+
     Args:
         coords:
                 The coordinates of the intersection.
-        building:
-                The building on the intersection.
+        board:
+                The board the intersection is on.
+        index:
+                The index of the intersection in the board's arrays.
 
     Attributes:
             CONNECTED_CORNER_OFFSETS (Set[Coords]):
@@ -20,8 +30,11 @@ class Intersection:
                     and then filter for which coords are valid intersection coords.
             coords (Coords):
                     The coordinates of the intersection.
+            index (int):
+                    The index of the intersection in the board's arrays.
             building (IntersectionBuilding, optional):
-                    The building on the intersection.
+                    The building on the intersection. Setting it replaces the building without checking the location,
+                    through `Board.load_buildings`.
     """
 
     CONNECTED_CORNER_OFFSETS: Set[Coords] = {
@@ -33,6 +46,34 @@ class Intersection:
         Coords(1, -1),
     }
 
-    def __init__(self, coords: Coords, building: Optional[IntersectionBuilding] = None):
+    def __init__(self, coords: Coords, board, index: int):
         self.coords = coords
-        self.building = building
+        self.index = index
+        self._board = board
+        self._building: Optional[IntersectionBuilding] = None
+
+    @property
+    def building(self) -> Optional[IntersectionBuilding]:
+        board = self._board
+        owner = board.intersection_owners[self.index]
+        if owner < 0:
+            return None
+        player = board.players[owner]
+        building_type = _BUILDING_TYPES[board.intersection_types[self.index]]
+        building = self._building
+        if building is None or building.owner is not player or building.building_type is not building_type:
+            building = self._building = IntersectionBuilding(player, building_type, self.coords)
+        return building
+
+    @building.setter
+    def building(self, building: Optional[IntersectionBuilding]):
+        board = self._board
+        owners = board.intersection_owners.copy()
+        types = board.intersection_types.copy()
+        if building is None:
+            owners[self.index] = types[self.index] = -1
+        else:
+            owners[self.index] = board.add_player(building.owner)
+            types[self.index] = building.building_type.value
+        board.load_buildings(owners, types, board.path_owners, board.path_types)
+        self._building = building
@@ -1,26 +1,63 @@
 from ._coords import Coords
 from typing import Set, Optional
 from ._building import PathBuilding
+from ._building_type import BuildingType
+
+
+# Looking up the enum by value is slow, so index the members by their value instead
+_BUILDING_TYPES = list(BuildingType)
 
 
 class Path:
     """A path on a Catan board.
 
+    A thin view over the board's arrays; the building is read from the board's owner and building type arrays. The
+    same PathBuilding is returned until the building on the path changes.
+
     Args:
             path_coords: The coordinates of the two intersections
                 that the path connects.
-            building: The building on this path.
+            board: The board the path is on.
+            index: The index of the path in the board's arrays.
     Attributes:
             path_coords (set(Coords, Coords)): The coordinates of the two intersections
                 that the path connects.
-            building (PathBuilding, optional): The building on this path.
+            index (int): The index of the path in the board's arrays.
+            building (PathBuilding, optional): The building on this path. Setting it replaces the building without
+                checking the location, through `Board.load_buildings`.
     """
 
-    def __init__(
-        self, path_coords: Set[Coords], building: Optional[PathBuilding] = None
-    ):
+    def __init__(self, path_coords: Set[Coords], board, index: int):
         self.path_coords = path_coords
-        self.building = building
+        self.index = index
+        self._board = board
+        self._building: Optional[PathBuilding] = None
+
+    @property
+    def building(self) -> Optional[PathBuilding]:
+        board = self._board
+        owner = board.path_owners[self.index]
+        if owner < 0:
+            return None
+        player = board.players[owner]
+        building_type = _BUILDING_TYPES[board.path_types[self.index]]
+        building = self._building
+        if building is None or building.owner is not player or building.building_type is not building_type:
+            building = self._building = PathBuilding(player, building_type, self.path_coords)
+        return building
+
+    @building.setter
+    def building(self, building: Optional[PathBuilding]):
+        board = self._board
+        owners = board.path_owners.copy()
+        types = board.path_types.copy()
+        if building is None:
+            owners[self.index] = types[self.index] = -1
+        else:
+            owners[self.index] = board.add_player(building.owner)
+            types[self.index] = building.building_type.value
+        board.load_buildings(board.intersection_owners, board.intersection_types, owners, types)
+        self._building = building
 
     def other_intersection(self, coords: Coords) -> Coords:
         """Given one of the intersection coords for this path, returns the other one.
@@ -1,5 +1,8 @@
+from typing import Optional, Sequence, Tuple
 import random
 
+import numpy as np
+
 from ._hex_type import HexType
 from ._hex import Hex
 from ._harbor import Harbor
@@ -8,78 +11,306 @@ from ._board import Board
 from .._resource import Resource
 
 
+class BoardConstraints:
+    """Fairness constraints for randomly generated boards.
+
+    Args:
+        separate_red_numbers: Whether to keep the 6 and 8 tokens off adjacent hexes. Defaults to True
+        separate_equal_numbers: Whether to keep tokens with the same number off adjacent hexes. Defaults to False
+        desert_in_center: Whether to always put the desert in the center of the board. Defaults to False
+        shuffle_tokens:
+            Whether to shuffle the tokens. If False, the tokens are placed in the spiral order from the Catan rules,
+            skipping the desert. Defaults to False
+    """
+
+    def __init__(
+        self,
+        separate_red_numbers: Optional[bool] = True,
+        separate_equal_numbers: Optional[bool] = False,
+        desert_in_center: Optional[bool] = False,
+        shuffle_tokens: Optional[bool] = False,
+    ):
+        self.separate_red_numbers = separate_red_numbers
+        self.separate_equal_numbers = separate_equal_numbers
+        self.desert_in_center = desert_in_center
+        self.shuffle_tokens = shuffle_tokens
+
+
 class RandomBoard(Board):
-    """A board where the hexes, numbered tokens and harbors are all shuffled randomly."""
-
-    def __init__(self):
-        hex_deck = (
-            [HexType.FOREST] * 4
-            + [HexType.PASTURE] * 4
-            + [HexType.FIELDS] * 4
-            + [HexType.HILLS] * 3
-            + [HexType.MOUNTAINS] * 3
-            + [HexType.DESERT]
-        )
-        token_deck = [5, 2, 6, 3, 8, 10, 9, 12, 11, 4, 8, 10, 9, 4, 5, 6, 3, 11]
-        random.shuffle(hex_deck)
-        hex_coords = [
-            Coords(4, -2),
-            Coords(3, 0),
-            Coords(2, 2),
-            Coords(0, 3),
-            Coords(-2, 4),
-            Coords(-3, 3),
-            Coords(-4, 2),
-            Coords(-3, 0),
-            Coords(-2, -2),
-            Coords(0, -3),
-            Coords(2, -4),
-            Coords(3, -3),
-            Coords(2, -1),
-            Coords(1, 1),
-            Coords(-1, 2),
-            Coords(-2, 1),
-            Coords(-1, -1),
-            Coords(1, -2),
-            Coords(0, 0),
+    """A board where the hexes, numbered tokens and harbors are all shuffled randomly.
+
+    Use `RandomBoard.generate_many` to generate lots of layouts at once, i.e. one for every episode of a training run.
+
+    Args:
+        hex_types: The HexType value of each hex, in the order of `HEX_COORDS`. Shuffled randomly if None
+        tokens: The token on each hex, or 0 for none, in the order of `HEX_COORDS`. Required if hex_types is given
+        harbors: The Resource value of each harbor, or -1 for a 3:1 harbor, in the order of `HARBOR_COORDS`. Required
+            if hex_types is given
+
+    Attributes:
+        HEX_COORDS (Tuple[Coords]): The coordinates of the hexes, spiraling in from the outside
+        HARBOR_COORDS (Tuple[frozenset[Coords]]): The coordinates of the paths the harbors are attached to
+    """
+
+    HEX_COORDS: Tuple[Coords, ...] = (
+        Coords(4, -2),
+        Coords(3, 0),
+        Coords(2, 2),
+        Coords(0, 3),
+        Coords(-2, 4),
+        Coords(-3, 3),
+        Coords(-4, 2),
+        Coords(-3, 0),
+        Coords(-2, -2),
+        Coords(0, -3),
+        Coords(2, -4),
+        Coords(3, -3),
+        Coords(2, -1),
+        Coords(1, 1),
+        Coords(-1, 2),
+        Coords(-2, 1),
+        Coords(-1, -1),
+        Coords(1, -2),
+        Coords(0, 0),
+    )
+
+    HARBOR_COORDS: Tuple[frozenset, ...] = (
+        frozenset({Coords(5, -2), Coords(5, -3)}),
+        frozenset({Coords(4, 0), Coords(3, 1)}),
+        frozenset({Coords(1, 3), Coords(0, 4)}),
+        frozenset({Coords(-2, 5), Coords(-3, 5)}),
+        frozenset({Coords(-4, 3), Coords(-4, 4)}),
+        frozenset({Coords(-4, 0), Coords(-4, 1)}),
+        frozenset({Coords(-3, -2), Coords(-2, -3)}),
+        frozenset({Coords(1, -4), Coords(0, -4)}),
+        frozenset({Coords(3, -4), Coords(4, -4)}),
+    )
+
+    # The decks that are shuffled, as HexType values, token numbers in spiral order and Resource values
+    _HEX_DECK = np.array(
+        [HexType.FOREST.value] * 4
+        + [HexType.PASTURE.value] * 4
+        + [HexType.FIELDS.value] * 4
+        + [HexType.HILLS.value] * 3
+        + [HexType.MOUNTAINS.value] * 3
+        + [HexType.DESERT.value],
+        dtype=np.int8,
+    )
+    _TOKEN_DECK = np.array(
+        [5, 2, 6, 3, 8, 10, 9, 12, 11, 4, 8, 10, 9, 4, 5, 6, 3, 11], dtype=np.int8
+    )
+    _HARBOR_DECK = np.array(
+        [
+            Resource.BRICK.value,
+            Resource.LUMBER.value,
+            Resource.ORE.value,
+            Resource.WOOL.value,
+            Resource.GRAIN.value,
         ]
-        hexes = set()
-        for h in hex_coords:
-            hex_type = hex_deck.pop()
-            hexes.add(
-                Hex(
-                    hex_type=hex_type,
-                    token_number=None
-                    if hex_type is HexType.DESERT
-                    else token_deck.pop(0),
-                    coords=h,
-                )
+        + 4 * [-1],
+        dtype=np.int8,
+    )
+    # Give up on constraints that are (almost) impossible to meet after this many layouts in a row break them
+    _MAX_REJECTED = 1_000_000
+    # The most layouts to generate at once, to bound the memory used
+    _MAX_BATCH_SIZE = 1 << 18
+
+    def __init__(
+        self,
+        hex_types: Optional[Sequence[int]] = None,
+        tokens: Optional[Sequence[int]] = None,
+        harbors: Optional[Sequence[int]] = None,
+    ):
+        if hex_types is None:
+            layouts = RandomBoard.generate_many(
+                1, seed=random.getrandbits(64), constraints=BoardConstraints(False)
+            )
+            hex_types, tokens, harbors = (
+                layouts.hex_types[0],
+                layouts.tokens[0],
+                layouts.harbors[0],
+            )
+        hex_types = [HexType(t) for t in np.asarray(hex_types).tolist()]
+        tokens = np.asarray(tokens).tolist()
+        resources = [None if r < 0 else Resource(r) for r in np.asarray(harbors).tolist()]
+        super().__init__(
+            hexes={
+                Hex(coords=c, hex_type=t, token_number=n or None)
+                for c, t, n in zip(RandomBoard.HEX_COORDS, hex_types, tokens)
+            },
+            harbors={
+                Harbor(path_coords=set(c), resource=r)
+                for c, r in zip(RandomBoard.HARBOR_COORDS, resources)
+            },
+        )
+
+    @staticmethod
+    def generate_many(
+        n: int, seed: Optional[int] = None, constraints: Optional[BoardConstraints] = None
+    ) -> "RandomBoardLayouts":
+        """Generate random layouts in bulk, without building any boards.
+
+        The constraints are met by generating layouts in batches and rejecting the ones that break them.
+
+        Args:
+            n: How many layouts to generate
+            seed: The seed for the random number generator. The same seed always gives the same layouts. Defaults to
+                None, which gives different layouts every time
+            constraints: The constraints the layouts must meet. Defaults to the default BoardConstraints
+        Returns:
+            The layouts
+        Raises:
+            ValueError: If n is negative, or the constraints are too hard to meet
+        """
+        if n < 0:
+            raise ValueError("Cannot generate a negative number of layouts")
+        if n == 0:
+            return RandomBoardLayouts(
+                np.empty((0, len(RandomBoard.HEX_COORDS)), np.int8),
+                np.empty((0, len(RandomBoard.HEX_COORDS)), np.int8),
+                np.empty((0, len(RandomBoard.HARBOR_COORDS)), np.int8),
             )
-        harbor_deck = [
-            Resource.BRICK,
-            Resource.LUMBER,
-            Resource.ORE,
-            Resource.WOOL,
-            Resource.GRAIN,
-        ] + 4 * [None]
-        random.shuffle(harbor_deck)
-        harbor_coords = {
-            frozenset({Coords(5, -2), Coords(5, -3)}),
-            frozenset({Coords(4, 0), Coords(3, 1)}),
-            frozenset({Coords(1, 3), Coords(0, 4)}),
-            frozenset({Coords(-2, 5), Coords(-3, 5)}),
-            frozenset({Coords(-4, 3), Coords(-4, 4)}),
-            frozenset({Coords(-4, 0), Coords(-4, 1)}),
-            frozenset({Coords(-3, -2), Coords(-2, -3)}),
-            frozenset({Coords(1, -4), Coords(0, -4)}),
-            frozenset({Coords(3, -4), Coords(4, -4)}),
-        }
-        harbors = set()
-        for h in harbor_coords:
-            harbors.add(Harbor(path_coords=h, resource=harbor_deck.pop()))
-        super().__init__(hexes=hexes, harbors=harbors)
-
-
-if __name__ == "__main__":
-    b = RandomBoard()
-    print(b)
+        if constraints is None:
+            constraints = BoardConstraints()
+        rng = np.random.default_rng(seed)
+        batches = []
+        found = 0
+        sampled = 0
+        # How many layouts have been generated since a batch last had one that met the constraints
+        rejected = 0
+        while found < n:
+            if rejected >= RandomBoard._MAX_REJECTED:
+                raise ValueError("Could not generate layouts that meet the constraints")
+            # Generate extra layouts to make up for the ones that will be rejected, going by how many have been so far
+            if found:
+                size = int((n - found) * sampled / found * 1.25)
+            else:
+                size = 2 * max(n, sampled)
+            size = min(max(size, 16), RandomBoard._MAX_BATCH_SIZE)
+            hex_types, tokens, harbors = RandomBoard._sample_layouts(size, rng, constraints)
+            valid = RandomBoard._check_constraints(hex_types, tokens, constraints)
+            batches.append((hex_types[valid], tokens[valid], harbors[valid]))
+            accepted = int(valid.sum())
+            found += accepted
+            sampled += size
+            rejected = 0 if accepted else rejected + size
+        return RandomBoardLayouts(*(np.concatenate(arrays)[:n] for arrays in zip(*batches)))
+
+    @staticmethod
+    def _sample_layouts(
+        n: int, rng: np.random.Generator, constraints: BoardConstraints
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Shuffle the decks to make layouts, ignoring the constraints other than where the desert goes.
+
+        Args:
+            n: How many layouts to make
+            rng: The random number generator
+            constraints: The constraints
+        Returns:
+            The hex types, tokens and harbors of each layout, with one row for each layout
+        """
+        num_hexes = len(RandomBoard.HEX_COORDS)
+        if constraints.desert_in_center:
+            # The center is the last hex in the spiral
+            others = RandomBoard._HEX_DECK[RandomBoard._HEX_DECK != HexType.DESERT.value]
+            hex_types = np.concatenate(
+                (
+                    rng.permuted(np.tile(others, (n, 1)), axis=1),
+                    np.full((n, 1), HexType.DESERT.value, np.int8),
+                ),
+                axis=1,
+            )
+        else:
+            hex_types = rng.permuted(np.tile(RandomBoard._HEX_DECK, (n, 1)), axis=1)
+        token_deck = np.tile(RandomBoard._TOKEN_DECK, (n, 1))
+        if constraints.shuffle_tokens:
+            token_deck = rng.permuted(token_deck, axis=1)
+        # Place the tokens in spiral order, skipping the desert
+        is_desert = hex_types == HexType.DESERT.value
+        token_index = np.arange(num_hexes) - np.cumsum(is_desert, axis=1)
+        tokens = np.take_along_axis(
+            token_deck, np.clip(token_index, 0, token_deck.shape[1] - 1), axis=1
+        )
+        tokens[is_desert] = 0
+        harbors = rng.permuted(np.tile(RandomBoard._HARBOR_DECK, (n, 1)), axis=1)
+        return hex_types, tokens, harbors
+
+    @staticmethod
+    def _check_constraints(
+        hex_types: np.ndarray, tokens: np.ndarray, constraints: BoardConstraints
+    ) -> np.ndarray:
+        """Check which layouts meet the constraints.
+
+        Args:
+            hex_types: The hex types of each layout
+            tokens: The tokens of each layout
+            constraints: The constraints
+        Returns:
+            Whether each layout meets the constraints
+        """
+        a, b = RandomBoard._get_adjacent_hexes()
+        valid = np.ones(len(tokens), dtype=bool)
+        if constraints.separate_red_numbers:
+            red = (tokens == 6) | (tokens == 8)
+            valid &= ~(red[:, a] & red[:, b]).any(axis=1)
+        if constraints.separate_equal_numbers:
+            valid &= ~((tokens[:, a] == tokens[:, b]) & (tokens[:, a] > 0)).any(axis=1)
+        return valid
+
+    _adjacent_hexes: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @staticmethod
+    def _get_adjacent_hexes() -> Tuple[np.ndarray, np.ndarray]:
+        """Get every pair of hexes that share a side, as two arrays of indices into `HEX_COORDS`."""
+        if RandomBoard._adjacent_hexes is None:
+            corners = [
+                {c + offset for offset in Hex.CONNECTED_CORNER_OFFSETS}
+                for c in RandomBoard.HEX_COORDS
+            ]
+            pairs = [
+                (i, j)
+                for i in range(len(corners))
+                for j in range(i + 1, len(corners))
+                if len(corners[i] & corners[j]) == 2
+            ]
+            RandomBoard._adjacent_hexes = (
+                np.array([i for i, _ in pairs]),
+                np.array([j for _, j in pairs]),
+            )
+        return RandomBoard._adjacent_hexes
+
+
+class RandomBoardLayouts:
+    """Layouts generated by `RandomBoard.generate_many`.
+
+    Args:
+        hex_types: The hex types of each layout
+        tokens: The tokens of each layout
+        harbors: The harbors of each layout
+
+    Attributes:
+        hex_types (np.ndarray): The HexType value of each hex, with shape (layouts, hexes) in the order of
+            `RandomBoard.HEX_COORDS`
+        tokens (np.ndarray): The token on each hex, or 0 for none, with shape (layouts, hexes)
+        harbors (np.ndarray): The Resource value of each harbor, or -1 for a 3:1 harbor, with shape (layouts, harbors)
+            in the order of `RandomBoard.HARBOR_COORDS`
+    """
+
+    def __init__(self, hex_types: np.ndarray, tokens: np.ndarray, harbors: np.ndarray):
+        self.hex_types = hex_types
+        self.tokens = tokens
+        self.harbors = harbors
+
+    def __len__(self) -> int:
+        return len(self.hex_types)
+
+    def get_board(self, index: int) -> RandomBoard:
+        """Build the board for one of the layouts.
+
+        Args:
+            index: The index of the layout
+        Returns:
+            The board
+        """
+        return RandomBoard(self.hex_types[index], self.tokens[index], self.harbors[index])
+
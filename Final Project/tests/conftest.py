@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The package and the environments are imported from the project directory, which isn't installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
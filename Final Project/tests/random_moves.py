@@ -0,0 +1,66 @@
+import random
+
+from pycatan import DevelopmentCard, Game, Resource
+
+
+def play(game: Game, rng: random.Random, moves: int):
+    """Make random moves: free connected and unconnected building, upgrades, rolls and robber moves."""
+    board = game.board
+    for _ in range(moves):
+        player = rng.choice(game.players)
+        kind = rng.random()
+        if kind < 0.5:
+            ensure_connected = rng.random() < 0.9
+            options = sorted(
+                board.get_valid_road_coords(player, ensure_connected),
+                key=lambda p: sorted((c.q, c.r) for c in p),
+            )
+            if options:
+                game.build_road(
+                    player,
+                    rng.choice(options),
+                    cost_resources=False,
+                    ensure_connected=ensure_connected,
+                )
+        elif kind < 0.7:
+            ensure_connected = rng.random() < 0.5
+            options = sorted(
+                board.get_valid_settlement_coords(player, ensure_connected),
+                key=lambda c: (c.q, c.r),
+            )
+            if options:
+                game.build_settlement(
+                    player,
+                    rng.choice(options),
+                    cost_resources=False,
+                    ensure_connected=ensure_connected,
+                )
+        elif kind < 0.8:
+            options = sorted(board.get_valid_city_coords(player), key=lambda c: (c.q, c.r))
+            if options:
+                game.upgrade_settlement_to_city(player, rng.choice(options), cost_resources=False)
+        elif kind < 0.9:
+            game.add_yield_for_roll(game.roll_dice())
+        else:
+            game.move_robber(rng.choice(board.robber_destinations))
+
+
+def play_with_cards(game: Game, rng: random.Random, moves: int):
+    """Make the random moves of `play`, as well as changing turns, gaining resources and development cards."""
+    for _ in range(moves):
+        player = rng.choice(game.players)
+        kind = rng.random()
+        if kind < 0.6:
+            play(game, rng, 1)
+        elif kind < 0.7:
+            game.set_turn(rng.randrange(len(game.players)), rng.randrange(4))
+        elif kind < 0.8:
+            player.add_resource_counts([rng.randrange(3) for _ in Resource])
+        elif kind < 0.9:
+            if game.development_card_deck:
+                player.add_resource_counts(DevelopmentCard.get_required_resource_counts())
+                game.build_development_card(player)
+        else:
+            cards = [card for card in DevelopmentCard if player.development_card_counts[card.value]]
+            if cards:
+                game.play_development_card(player, rng.choice(cards))
@@ -0,0 +1,97 @@
+import random
+
+import numpy as np
+import pytest
+
+from pycatan import Game
+from pycatan.board import BeginnerBoard, BuildingType, Coords, IntersectionBuilding, PathBuilding
+from tests.random_moves import play
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_kept_state_matches_a_full_check(seed):
+    # The state kept up to date as buildings are added must match checking the whole board again, after every move
+    rng = random.Random(seed)
+    game = Game(BeginnerBoard(), seed=seed)
+    board = game.board
+    for move in range(250):
+        play(game, rng, 1)
+        for owner, player in enumerate(game.players):
+            for ensure_connected in (True, False):
+                assert board.get_valid_settlement_coords(player, ensure_connected) == {
+                    c
+                    for c in board.intersection_coords
+                    if board.is_valid_settlement_coords(player, c, ensure_connected)
+                }, move
+                assert board.get_valid_road_coords(player, ensure_connected) == {
+                    p
+                    for p in board.path_coords
+                    if board.is_valid_road_coords(player, p, ensure_connected)
+                }, move
+            assert board.get_valid_city_coords(player) == {
+                c for c in board.intersection_coords if board.is_valid_city_coords(player, c)
+            }, move
+            scanned = board._scan_legal_placements(player)
+            for building_type, placements in board._legal_placements[player].items():
+                assert placements == scanned[building_type], move
+            longest_road = board.calculate_player_longest_road(player)
+            del board._longest_roads[player]
+            assert board.calculate_player_longest_road(player) == longest_road, move
+            owned = np.flatnonzero(board.intersection_owners == owner).tolist()
+            assert board.building_points[owner] == sum(
+                2 if board.intersection_types[i] == BuildingType.CITY.value else 1 for i in owned
+            ), move
+            assert player.connected_harbors == {
+                h for i in owned for h in board._intersection_harbors[i]
+            }, move
+        for roll in range(2, 13):
+            totals = {
+                player: {r: n for r, n in counts.items() if n}
+                for player, counts in board.get_yield_totals_for_roll(roll).items()
+            }
+            assert {p: t for p, t in totals.items() if t} == {
+                player: {r: n for r, n in roll_yield.total_yield.items() if n}
+                for player, roll_yield in board.get_yield_for_roll(roll).items()
+            }, (move, roll)
+
+
+def test_buildings_keep_their_identity():
+    game = Game(BeginnerBoard())
+    board = game.board
+    player = game.players[0]
+    coords = Coords(1, 2)
+    path_coords = {Coords(1, 2), Coords(2, 1)}
+    game.build_settlement(player, coords, cost_resources=False, ensure_connected=False)
+    game.build_road(player, path_coords, cost_resources=False)
+    intersection = board.intersections[coords]
+    settlement = intersection.building
+    assert intersection.building is settlement
+    assert board.paths[frozenset(path_coords)].building is board.paths[frozenset(path_coords)].building
+    game.upgrade_settlement_to_city(player, coords, cost_resources=False)
+    city = intersection.building
+    assert city is not settlement and city.building_type is BuildingType.CITY
+    assert intersection.building is city
+
+
+def test_setting_buildings_changes_the_board():
+    built = Game(BeginnerBoard())
+    game = Game(BeginnerBoard())
+    coords = Coords(1, 2)
+    path_coords = {Coords(1, 2), Coords(2, 1)}
+    built.build_settlement(built.players[1], coords, cost_resources=False, ensure_connected=False)
+    built.build_road(built.players[1], path_coords, cost_resources=False)
+    player = game.players[1]
+    settlement = IntersectionBuilding(player, BuildingType.SETTLEMENT, coords)
+    road = PathBuilding(player, BuildingType.ROAD, path_coords)
+    game.board.intersections[coords].building = settlement
+    game.board.paths[frozenset(path_coords)].building = road
+    assert game.board.intersections[coords].building is settlement
+    assert game.board.paths[frozenset(path_coords)].building is road
+    assert game.board.zobrist_hash == built.board.zobrist_hash
+    assert game.board.building_points == built.board.building_points
+    assert game.board.get_valid_road_coords(player) == built.board.get_valid_road_coords(built.players[1])
+    game.board.intersections[coords].building = None
+    game.board.paths[frozenset(path_coords)].building = None
+    assert game.board.intersections[coords].building is None
+    assert game.board.paths[frozenset(path_coords)].building is None
+    assert game.board.zobrist_hash == Game(BeginnerBoard()).board.zobrist_hash
@@ -0,0 +1,8 @@
+from pycatan.board import BoardAnalyzer, BoardConstraints
+
+
+def test_constraints_that_reject_most_layouts():
+    # At the default batch size, this used to hit the limit on the total number of layouts sampled
+    analyzer = BoardAnalyzer(BoardConstraints(separate_equal_numbers=True, shuffle_tokens=True), workers=1)
+    statistics = analyzer.analyze(100_000, seed=1)
+    assert statistics.count == 100_000
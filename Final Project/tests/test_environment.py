@@ -0,0 +1,138 @@
+import random
+
+import numpy as np
+
+import funcs
+from enums import GameStage
+from environment import CatanEnvironmentCoop, CatanEnvironmentDQN
+from pycatan import DevelopmentCard, Replay, Resource
+from pycatan.board import BuildingType
+
+
+def _owned_by(building, player) -> bool:
+    return building is not None and building.owner is player
+
+
+def _players(env) -> list:
+    return [env.game.players[(env.current_player_number + i) % 4] for i in range(4)]
+
+
+def _encode_dict_by_loops(env) -> dict:
+    """Encode a dict observation by looping over the board in the old order, as the environments used to."""
+    board = env.game.board
+    buildings = np.zeros((4, 180))
+    cards = np.zeros((4, 11))
+    for i, player in enumerate(_players(env)):
+        for j, coords in enumerate(funcs.BASELINE_INTERSECTION_COORDS):
+            building = board.intersections[coords].building
+            if _owned_by(building, player):
+                buildings[i, j + (54 if building.building_type is BuildingType.CITY else 0)] = 1
+        for j, path_coords in enumerate(funcs.BASELINE_PATH_COORDS):
+            if _owned_by(board.paths[path_coords].building, player):
+                buildings[i, 108 + j] = 1
+        for j, res in enumerate(Resource):
+            cards[i, j] = player.resources[res]
+        for j, dev in enumerate(DevelopmentCard):
+            cards[i, j + 5] = player.development_cards[dev]
+        cards[i, 10] = player.number_played_knights
+    return {
+        'stage': env.stage.value,
+        'robber location': funcs.BASELINE_HEX_COORDS.index(board.robber),
+        'buildings': buildings,
+        'cards in hand': cards,
+    }
+
+
+def _encode_box_by_loops(env) -> np.ndarray:
+    """Encode a box observation by looping over the board in the old order, as the environments used to."""
+    board = env.game.board
+    obs = np.zeros((4, 253))
+    obs[..., env.stage.value] = 255
+    obs[..., 8 + funcs.BASELINE_HEX_COORDS.index(board.robber)] = 255
+    for i, player in enumerate(_players(env)):
+        for j, coords in enumerate(funcs.BASELINE_INTERSECTION_COORDS):
+            if _owned_by(board.intersections[coords].building, player):
+                obs[i, j] = 255
+        for j, path_coords in enumerate(funcs.BASELINE_PATH_COORDS):
+            if _owned_by(board.paths[path_coords].building, player):
+                obs[i, 170 + j] = 255
+        for j, res in enumerate(Resource):
+            obs[i, 242 + j] = player.resources[res]
+        for j, dev in enumerate(DevelopmentCard):
+            obs[i, 247 + j] = player.development_cards[dev]
+        obs[i, 252] = player.number_played_knights
+    return obs
+
+
+def _play(env, steps: int):
+    """Take random actions, yielding the environment after each of them."""
+    env.reset(seed=0)
+    rng = np.random.default_rng(0)
+    for _ in range(steps):
+        env._apply_action(np.array([rng.integers(10), rng.integers(25), rng.integers(54)]))
+        yield env
+
+
+def test_dict_observations_use_the_old_board_order():
+    for env in _play(CatanEnvironmentCoop(), 1500):
+        obs = env._next_observation()
+        expected = _encode_dict_by_loops(env)
+        assert obs.keys() == expected.keys()
+        for key in obs:
+            np.testing.assert_array_equal(obs[key], expected[key])
+
+
+def test_box_observations_use_the_old_board_order():
+    for env in _play(CatanEnvironmentDQN([], False), 1500):
+        np.testing.assert_array_equal(env._next_observation(), _encode_box_by_loops(env))
+
+
+def test_choices_do_not_depend_on_the_order_of_the_legal_locations():
+    rng = random.Random(0)
+    for _ in range(200):
+        for choose, locations in (
+            (funcs.choose_intersection, funcs.BASELINE_INTERSECTION_COORDS),
+            (funcs.choose_path, funcs.BASELINE_PATH_COORDS),
+        ):
+            legal = rng.sample(locations, rng.randint(1, 30))
+            chosen = [choose(frozenset(legal), k) for k in range(len(legal))]
+            assert sorted(map(locations.index, chosen)) == sorted(map(locations.index, legal))
+            rng.shuffle(legal)
+            assert [choose(legal, k) for k in range(len(legal))] == chosen
+
+
+def test_robber_moves_follow_the_old_hex_order():
+    env = CatanEnvironmentCoop()
+    env.reset(seed=0)
+    for start in funcs.BASELINE_HEX_COORDS:
+        destinations = [c for c in funcs.BASELINE_HEX_COORDS if c != start]
+        for k in range(20):
+            env.game.board.robber = start
+            env.stage = GameStage.MOVING_ROBBER
+            env._apply_action(np.array([0, 0, k]))
+            assert env.game.board.robber == destinations[k % len(destinations)]
+
+
+def _replay_state(env) -> tuple:
+    return env.game.to_bytes(), env.game.get_random_state(), env._get_replay_state()
+
+
+def test_seeking_a_replay_matches_replaying_from_the_start():
+    env = CatanEnvironmentCoop()
+    env.record_replays = True
+    env.reset(seed=0)
+    rng = np.random.default_rng(0)
+    recorded = [_replay_state(env)]
+    for _ in range(2100):
+        env._apply_action(np.array([rng.integers(10), rng.integers(25), rng.integers(54)]))
+        recorded.append(_replay_state(env))
+    replay = env.get_replay()
+    assert sorted(replay.snapshots) == [1024, 2048]
+    without_snapshots = Replay(replay.seed, replay.layout, replay.num_players, replay.actions)
+    seeking = CatanEnvironmentCoop()
+    from_start = CatanEnvironmentCoop()
+    # Either side of each snapshot, and the last step
+    for step in (0, 1, 1023, 1024, 1025, 2047, 2048, 2049, 2100):
+        seeking.load_replay(replay, step)
+        from_start.load_replay(without_snapshots, step)
+        assert _replay_state(seeking) == _replay_state(from_start) == recorded[step], step
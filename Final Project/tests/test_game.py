@@ -0,0 +1,185 @@
+import random
+
+import pytest
+
+from pycatan import DevelopmentCard, Game, Resource
+from pycatan._zobrist import get_zobrist_keys
+from pycatan.board import BeginnerBoard, BuildingType, Coords
+from tests.random_moves import play, play_with_cards
+
+# How many values of each count in a hand have their own Zobrist key, after which the keys repeat
+HASHED_COUNTS = 64
+# How many cards are in the development card deck at the start of a game
+DECK_SIZE = 25
+
+
+def _late_game(seed: int) -> Game:
+    """Play random moves until a player has 10 points, then give each player a development card."""
+    rng = random.Random(seed)
+    game = Game(BeginnerBoard(), seed=seed)
+    while max(game.victory_points_vector()) < 10:
+        play(game, rng, 1)
+    for player in game.players:
+        player.add_resource_counts(DevelopmentCard.get_required_resource_counts())
+        game.build_development_card(player)
+    return game
+
+
+def test_clone_matches_the_game():
+    game = _late_game(0)
+    clone = game.clone()
+    assert clone.to_bytes() == game.to_bytes()
+    assert clone.zobrist_hash == game.zobrist_hash
+    assert clone.get_random_state() == game.get_random_state()
+    assert list(clone.victory_points_vector()) == list(game.victory_points_vector())
+    assert not set(clone.players) & set(game.players)
+
+
+def test_changing_a_clone_leaves_the_game_alone():
+    game = _late_game(0)
+    data = game.to_bytes()
+    zobrist_hash = game.zobrist_hash
+    clone = game.clone()
+    play(clone, random.Random(1), 100)
+    for player in clone.players:
+        player.add_resource_counts([1] * 5)
+    assert clone.to_bytes() != data
+    assert game.to_bytes() == data
+    assert game.zobrist_hash == zobrist_hash
+
+
+def _hash_from_scratch(game: Game) -> int:
+    """Work out the Zobrist hash of a game from its state alone, rather than from the changes made to it."""
+    board = game.board
+    zobrist_hash = int(get_zobrist_keys("robber", (len(board.hex_coords),))[board.hex_indices[board.robber]])
+    for owner in range(len(board.players)):
+        for table, types, size in (
+            ("intersection", board.intersection_types, len(board.intersection_coords)),
+            ("path", board.path_types, len(board.path_coords)),
+        ):
+            keys = get_zobrist_keys(table, (size, len(BuildingType)), owner)
+            owners = board.intersection_owners if table == "intersection" else board.path_owners
+            for index in (owners == owner).nonzero()[0].tolist():
+                zobrist_hash ^= int(keys[index, types[index]])
+    # Each player's seat is their place in the turn order
+    for seat, player in enumerate(game.players):
+        keys = get_zobrist_keys("hand", (len(Resource) + len(DevelopmentCard) + 1, HASHED_COUNTS), seat)
+        counts = player.resource_counts + player.development_card_counts + [player.number_played_knights]
+        for row, count in zip(keys.tolist(), counts):
+            # A player starts with a hash of 0, and so with the keys of the empty hand left out
+            zobrist_hash ^= row[count % HASHED_COUNTS] ^ row[0]
+    num_players = len(game.players)
+    for table, owner in (("longest_road", game.longest_road_owner), ("largest_army", game.largest_army_owner)):
+        index = -1 if owner is None else board.players.index(owner)
+        zobrist_hash ^= int(get_zobrist_keys(table, (num_players + 1,))[index])
+    zobrist_hash ^= int(get_zobrist_keys("deck", (DECK_SIZE + 1,))[len(game.development_card_deck)])
+    zobrist_hash ^= int(get_zobrist_keys("turn", (num_players,))[game.current_turn])
+    return zobrist_hash ^ int(get_zobrist_keys("stage", (1,), game.turn_stage)[0])
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_zobrist_hash_matches_a_hash_from_scratch(seed):
+    rng = random.Random(seed)
+    game = Game(BeginnerBoard(), seed=seed)
+    for move in range(300):
+        play_with_cards(game, rng, 1)
+        assert game.zobrist_hash == _hash_from_scratch(game), move
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_bytes_round_trip(seed):
+    rng = random.Random(seed)
+    game = Game(BeginnerBoard(), seed=seed)
+    for move in range(300):
+        play_with_cards(game, rng, 1)
+        data = game.to_bytes()
+        restored = Game.from_bytes(data)
+        assert restored.to_bytes() == data, move
+        assert restored.zobrist_hash == game.zobrist_hash, move
+
+
+def _legal_placements(game: Game) -> list:
+    board = game.board
+    return [
+        (
+            board.get_valid_settlement_coords(player, ensure_connected),
+            board.get_valid_road_coords(player, ensure_connected),
+            board.get_valid_city_coords(player),
+        )
+        for player in game.players
+        for ensure_connected in (True, False)
+    ]
+
+
+def _snapshot(game: Game) -> tuple:
+    return game.to_bytes(), game.zobrist_hash, _legal_placements(game), game.get_random_state()
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_undo_restores_the_game(seed):
+    rng = random.Random(seed)
+    game = Game(BeginnerBoard(), seed=seed)
+    for move in range(100):
+        before = _snapshot(game)
+        game.begin_move()
+        play_with_cards(game, rng, rng.randint(1, 5))
+        # A nested move, undone along with the outer one
+        game.begin_move()
+        play_with_cards(game, rng, rng.randint(1, 5))
+        game.end_move()
+        game.undo()
+        assert game.open_moves == 0
+        assert _snapshot(game) == before, move
+        # Keep some of the moves, so the game goes on
+        play_with_cards(game, rng, 3)
+    # The random number generators carry on from where they were before the move
+    clone = game.clone()
+    game.begin_move()
+    play_with_cards(game, rng, 20)
+    game.undo()
+    assert [game.roll_dice() for _ in range(10)] == [clone.roll_dice() for _ in range(10)]
+    assert game.steal_rng.random() == clone.steal_rng.random()
+
+
+def _draws(game: Game, rng_name: str) -> list:
+    if rng_name == "dice":
+        return [game.roll_dice() for _ in range(5)]
+    if rng_name == "steal":
+        return [game.steal_rng.random() for _ in range(5)]
+    return game.deck_rng.integers(0, 100, 5).tolist()
+
+
+@pytest.mark.parametrize("first", ["game", "clone"])
+def test_clone_and_game_draw_independently(first):
+    game = _late_game(0)
+    # Draw from the shared generators before cloning, so the clone is taken partway through the streams
+    game.roll_dice()
+    reference = game.clone()
+    clone = game.clone()
+    games = (game, clone) if first == "game" else (clone, game)
+    expected = {name: [] for name in ("dice", "steal", "deck")}
+    drawn = {g: {name: [] for name in expected} for g in games}
+    for _ in range(3):
+        for name in expected:
+            expected[name] += _draws(reference, name)
+            for g in games:
+                drawn[g][name] += _draws(g, name)
+    for g in games:
+        assert drawn[g] == expected
+    # The deck is drawn from by each game separately too
+    cards = []
+    for g in (reference,) + games:
+        player = g.players[0]
+        player.add_resource_counts(DevelopmentCard.get_required_resource_counts())
+        cards.append(g.build_development_card(player))
+    assert cards[1:] == cards[:1] * 2
+
+
+def test_victory_points_of_players_not_on_the_board():
+    game = Game(BeginnerBoard())
+    # A board that only the second player has been added to, by building on it
+    game.board = BeginnerBoard()
+    game.build_settlement(game.players[1], Coords(1, 2), cost_resources=False, ensure_connected=False)
+    game.players[0].add_development_card(DevelopmentCard.VICTORY_POINT)
+    assert list(game.victory_points_vector()) == [1, 1, 0, 0]
+    assert list(game.victory_points_vector()) == [game.get_victory_points(p) for p in game.players]
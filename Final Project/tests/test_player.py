@@ -0,0 +1,115 @@
+import math
+import random
+
+import pytest
+
+from pycatan import DevelopmentCard, Player, Resource
+from pycatan.board import Harbor
+from pycatan.errors import NotEnoughResourcesError
+
+# A hand to draw from, with a resource missing
+HAND = [7, 0, 3, 6, 4]
+
+
+def _trades_by_loops(player) -> list:
+    """List the trades as the original implementation did, taking the 2:1 harbors in resource order."""
+    trades = []
+    two_to_one = {h.resource for h in player.connected_harbors if h.resource is not None}
+    for res in Resource:
+        if res in two_to_one and player.has_resources({res: 2}):
+            for r in Resource:
+                if r != res:
+                    trades.append({res: -2, r: 1})
+    amount = 3 if any(h.resource is None for h in player.connected_harbors) else 4
+    for res in Resource:
+        if res not in two_to_one and player.has_resources({res: amount}):
+            for r in Resource:
+                if r != res:
+                    trades.append({res: -amount, r: 1})
+    return [dict(t) for t in {tuple(d.items()) for d in trades}]
+
+
+def test_trades_come_in_the_old_order():
+    rng = random.Random(0)
+    harbor_resources = [None] + list(Resource)
+    for _ in range(2000):
+        player = Player()
+        for resource in rng.sample(harbor_resources, rng.randint(0, 3)):
+            player.connected_harbors.add(Harbor(set(), resource))
+        player.add_resources({res: rng.randint(0, 5) for res in Resource})
+        assert player.get_possible_trades() == _trades_by_loops(player)
+
+
+def test_single_draws_follow_the_hand():
+    rng = random.Random(0)
+    player = Player()
+    player.add_resource_counts(HAND)
+    total = sum(HAND)
+    draws = 200_000
+    drawn = [0] * len(HAND)
+    for _ in range(draws):
+        drawn[player.get_random_resource(rng).value] += 1
+    assert all(d == 0 for d, h in zip(drawn, HAND) if h == 0), drawn
+    # 16.27 is the 0.1% critical value of the chi-square distribution for 3 degrees of freedom
+    chi_square = sum((d - draws * h / total) ** 2 / (draws * h / total) for d, h in zip(drawn, HAND) if h)
+    assert chi_square < 16.27, chi_square
+
+
+def test_batches_follow_the_hypergeometric_distribution():
+    rng = random.Random(0)
+    player = Player()
+    player.add_resource_counts(HAND)
+    total = sum(HAND)
+    amount = 10
+    batches = 50_000
+    sums = [0] * len(HAND)
+    squares = [0] * len(HAND)
+    for _ in range(batches):
+        picked = player.get_random_resource_counts(amount, rng)
+        assert sum(picked) == amount and all(p <= h for p, h in zip(picked, HAND)), picked
+        for i, p in enumerate(picked):
+            sums[i] += p
+            squares[i] += p * p
+    assert player.resource_counts == HAND
+    for i, h in enumerate(HAND):
+        p = h / total
+        expected_mean = amount * p
+        expected_variance = amount * p * (1 - p) * (total - amount) / (total - 1)
+        mean = sums[i] / batches
+        variance = squares[i] / batches - mean**2
+        # Within 5 standard errors of the mean, and 5% of the variance
+        assert abs(mean - expected_mean) <= 5 * math.sqrt(expected_variance / batches), (i, mean)
+        assert abs(variance - expected_variance) <= 0.05 * expected_variance + 1e-9, (i, variance)
+
+
+def test_drawing_the_whole_hand_or_nothing():
+    rng = random.Random(0)
+    player = Player()
+    player.add_resource_counts(HAND)
+    assert player.get_random_resource_counts(sum(HAND), rng) == HAND
+    assert player.get_random_resource_counts(0, rng) == [0] * len(HAND)
+
+
+def test_drawing_from_an_empty_hand():
+    rng = random.Random(0)
+    player = Player()
+    assert player.get_random_resource(rng) is None
+    assert player.get_random_resource_counts(0, rng) == [0] * len(HAND)
+    with pytest.raises(NotEnoughResourcesError):
+        player.get_random_resource_counts(1, rng)
+
+
+def test_hands_only_have_their_own_keys():
+    player = Player()
+    for hand, key in (
+        (player.resources, DevelopmentCard.KNIGHT),
+        (player.development_cards, Resource.WOOL),
+        (player.resources, "wool"),
+        (player.resources, 0),
+    ):
+        with pytest.raises(KeyError):
+            hand[key]
+        with pytest.raises(KeyError):
+            hand[key] = 1
+        assert key not in hand
+        assert hand.get(key) is None
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from pycatan.board import BoardConstraints, RandomBoard
+
+
+@pytest.mark.parametrize(
+    "n, constraints",
+    [
+        (600_000, BoardConstraints(shuffle_tokens=True)),
+        (100_000, BoardConstraints(separate_equal_numbers=True, shuffle_tokens=True)),
+    ],
+)
+def test_many_layouts_with_constraints_that_reject_most(n, constraints):
+    # These used to hit the limit on the total number of layouts sampled
+    layouts = RandomBoard.generate_many(n, seed=1, constraints=constraints)
+    assert len(layouts) == n
+    assert RandomBoard._check_constraints(layouts.hex_types, layouts.tokens, constraints).all()
+
+
+def test_no_layouts():
+    layouts = RandomBoard.generate_many(0, seed=1)
+    assert len(layouts) == 0
+    assert layouts.hex_types.shape == (0, 19) and layouts.hex_types.dtype == np.int8
+    assert layouts.tokens.shape == (0, 19) and layouts.tokens.dtype == np.int8
+    assert layouts.harbors.shape == (0, 9) and layouts.harbors.dtype == np.int8
+
+
+def test_negative_number_of_layouts():
+    with pytest.raises(ValueError):
+        RandomBoard.generate_many(-1)